@@ -1,4 +1,5 @@
-import React, { useCallback, useEffect, useState } from 'react';
+import React, { useCallback, useEffect, useRef, useState } from 'react';
+import { observer } from 'mobx-react-lite';
 import type { TestCasesWS } from '../../types';
 import { TestPlan, TestFile, TestFileStructure } from './components';
 import { TestCaseBlock } from './components/testCaseBlock';
@@ -8,10 +9,12 @@ import styles from './testCases.module.scss';
 import { Divider } from '@snack-uikit/divider';
 import { toaster } from '@snack-uikit/toaster';
 
-export const TestCases = () => {
+export const TestCases = observer(() => {
   const [testCasesWs, setTestCasesWs] = useState<WebSocket>();
   const { testCases } = useMobxStore();
-  const { setTestCases } = testCases;
+  const { setTestCases, runId } = testCases;
+  // Прогон, на который подписано текущее соединение
+  const subscribedRunId = useRef<string>();
 
   const setWebSocketConnect = useCallback(() => {
     const newChat = new WebSocket(`ws://${import.meta.env.VITE_APP_API}/api/v1/ws`);
@@ -38,6 +41,12 @@ export const TestCases = () => {
         description: 'Успешное соединение с сервером',
       });
       console.log('open');
+      // После переподключения подписка восстанавливается
+      subscribedRunId.current = undefined;
+      if (testCases.runId) {
+        newChat.send(JSON.stringify({ subscribe: testCases.runId }));
+        subscribedRunId.current = testCases.runId;
+      }
     };
 
     newChat.onmessage = (event: MessageEvent<string>) => {
@@ -76,6 +85,18 @@ export const TestCases = () => {
     if (!testCasesWs) setWebSocketConnect();
   }, [testCasesWs]);
 
+  useEffect(() => {
+    if (testCasesWs?.readyState !== WebSocket.OPEN || subscribedRunId.current === runId) return;
+
+    if (subscribedRunId.current) {
+      testCasesWs.send(JSON.stringify({ unsubscribe: subscribedRunId.current }));
+    }
+    if (runId) {
+      testCasesWs.send(JSON.stringify({ subscribe: runId }));
+    }
+    subscribedRunId.current = runId;
+  }, [runId, testCasesWs]);
+
   return (
     <div className={styles.grid}>
       <div className={styles.col}>
@@ -95,4 +116,4 @@ export const TestCases = () => {
       </div>
     </div>
   );
-};
+});
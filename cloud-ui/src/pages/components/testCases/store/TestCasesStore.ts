@@ -6,6 +6,8 @@ export class TestCasesStore implements TestCasesWS {
   test_plan: TestCasesWS['test_plan'] = '';
   selectedFile = '';
   selectedFileName = '';
+  // ID прогона (job_id), на события которого подписан WebSocket
+  runId?: string = undefined;
 
   constructor() {
     makeAutoObservable(this);
@@ -23,6 +25,10 @@ export class TestCasesStore implements TestCasesWS {
     this.selectedFileName = selectedFileName;
   };
 
+  setRunId = (runId?: string) => {
+    this.runId = runId;
+  };
+
   clearCases = () => {
     this.selectedFile = '';
     this.selectedFileName = '';
@@ -16,7 +16,7 @@ export const ChatRequirements = observer(() => {
 
   const { testSettings, testCases } = useMobxStore();
   const { changeTestSettings, tags, text, base_endpoint, ui_url, token, caseType } = testSettings;
-  const { clearCases } = testCases;
+  const { clearCases, setRunId } = testCases;
 
   const changeText = useCallback<onBlurCallback>(({ target }) => {
     changeTestSettings({ key: 'text', value: target.value });
@@ -59,9 +59,11 @@ export const ChatRequirements = observer(() => {
       }
 
       if ((response as CreateTestCaseResponse)?.success) {
+        // Результаты прогона приходят по WebSocket только его подписчикам
+        setRunId((response as CreateTestCaseResponse).job_id);
         await toaster.systemEvent.success({
           title: 'Success',
-          description: 'Тесты успешно сгенирировались',
+          description: 'Генерация тестов запущена',
         });
       } else {
         await toaster.systemEvent.error({
@@ -74,7 +76,7 @@ export const ChatRequirements = observer(() => {
     } finally {
       changeTestSettings({ key: 'loading', value: false });
     }
-  }, [sendRequirementsByApi, sendRequirementsByUi, caseType]);
+  }, [sendRequirementsByApi, sendRequirementsByUi, caseType, setRunId]);
 
   useLayoutEffect(() => {
     if (textRef.current) {
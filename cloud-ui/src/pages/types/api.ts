@@ -8,4 +8,6 @@ export type TestCasesWS = {
 
 export interface CreateTestCaseResponse {
   success: boolean;
+  job_id?: string;
+  status?: string;
 }
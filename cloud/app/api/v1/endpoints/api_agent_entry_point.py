@@ -2,7 +2,9 @@ from fastapi import APIRouter, Depends, HTTPException, status
 
 from app.schemas.agent_api import AgentAPIRequest, AgentAPIResponse
 from app.schemas.response import ProcessResponse, ProcessedData
-from app.services.agent_service import api_agent_init
+from app.schemas.job import JobSubmitResponse
+from app.services.jobs import job_backend
+from app.services.openapi_spec import spec_registry
 from app.core.logger import logger
 from app.core.exceptions import ProcessingException
 
@@ -11,14 +13,14 @@ router = APIRouter(tags=["processing"])
 
 @router.post(
     "/api_agent_entry_point",
-    response_model=ProcessResponse,
-    status_code=status.HTTP_200_OK,
+    response_model=JobSubmitResponse,
+    status_code=status.HTTP_202_ACCEPTED,
     summary="Запуск API агента",
     description="Принимает базовый endpoint, URL в свободной текстовой форме"
 )
 async def process_text_and_url(
         request: AgentAPIRequest
-) -> AgentAPIResponse:
+) -> JobSubmitResponse:
     """
     Обработка URL и текста.
 
@@ -26,13 +28,16 @@ async def process_text_and_url(
         request: Запрос с URL и текстом
 
     Returns:
-        Результат обработки
+        Идентификатор задачи; ход выполнения передаётся в сокет,
+        результат — через /jobs/{job_id}
     """
     try:
         logger.info(f"Получен запрос на обработку API агентом")
-        processed_result = await api_agent_init(request)
-        logger.info(f"Успешная обработка запроса")
-        return processed_result
+        if request.spec not in spec_registry.names():
+            raise ValueError(f"OpenAPI спецификация '{request.spec}' не зарегистрирована")
+        job = await job_backend.submit("api", request.model_dump())
+        logger.info(f"Задача {job.job_id} поставлена в очередь")
+        return JobSubmitResponse(success=True, job_id=job.job_id, status=job.status)
 
     except ValueError as e:
         logger.warning(f"Ошибка валидации: {str(e)}")
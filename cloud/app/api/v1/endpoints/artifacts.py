@@ -0,0 +1,124 @@
+import asyncio
+import mimetypes
+from dataclasses import asdict
+
+from fastapi import APIRouter, HTTPException, Response, status
+
+from app.schemas.artifact import ArtifactListResponse, ArtifactResponse
+from app.services.artifact_store import Manifest, artifact_store
+
+router = APIRouter(tags=["artifacts"])
+
+# Типы, которые браузер исполняет (скрипты в HTML/SVG/XML): файлы артефактов
+# пишет модель, поэтому такие файлы отдаются как текст
+_ACTIVE_TYPES = frozenset({
+    "text/html", "application/xhtml+xml", "image/svg+xml", "text/xml", "application/xml",
+})
+_TEXT_TYPE = "text/plain; charset=utf-8"
+
+
+def _to_response(manifest: Manifest, with_files: bool = True) -> ArtifactResponse:
+    data = asdict(manifest)
+    if not with_files:
+        data["files"] = {}
+    return ArtifactResponse(size=manifest.size, **data)
+
+
+async def _get_manifest(run_id: str, name: str) -> Manifest:
+    try:
+        manifest = await asyncio.to_thread(artifact_store.load, run_id, name)
+    except ValueError:
+        manifest = None
+    if manifest is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Артефакт не найден"
+        )
+    return manifest
+
+
+@router.get(
+    "/runs/{run_id}/artifacts",
+    response_model=ArtifactListResponse,
+    summary="Артефакты прогона",
+    description="Тест-план, сгенерированное дерево, попытки исправления и итоговое дерево прогона"
+)
+async def list_artifacts(run_id: str) -> ArtifactListResponse:
+    """
+    Артефакты прогона.
+
+    Args:
+        run_id: Идентификатор прогона
+
+    Returns:
+        Манифесты прогона без списка файлов
+    """
+    try:
+        manifests = await asyncio.to_thread(artifact_store.list_manifests, run_id)
+    except ValueError:
+        manifests = []
+    if not manifests:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Прогон не найден"
+        )
+    return ArtifactListResponse(run_id=run_id, artifacts=[_to_response(m, with_files=False) for m in manifests])
+
+
+@router.get(
+    "/runs/{run_id}/artifacts/{name}",
+    response_model=ArtifactResponse,
+    summary="Манифест артефакта",
+    description="Список файлов артефакта со ссылками на содержимое"
+)
+async def get_artifact(run_id: str, name: str) -> ArtifactResponse:
+    """
+    Манифест артефакта.
+
+    Args:
+        run_id: Идентификатор прогона
+        name: Имя артефакта
+
+    Returns:
+        Манифест с файлами
+    """
+    return _to_response(await _get_manifest(run_id, name))
+
+
+@router.get(
+    "/runs/{run_id}/artifacts/{name}/files/{path:path}",
+    summary="Файл артефакта",
+    description="Содержимое файла из артефакта прогона"
+)
+async def get_artifact_file(run_id: str, name: str, path: str) -> Response:
+    """
+    Файл артефакта.
+
+    Args:
+        run_id: Идентификатор прогона
+        name: Имя артефакта
+        path: Путь файла в артефакте
+
+    Returns:
+        Содержимое файла
+    """
+    manifest = await _get_manifest(run_id, name)
+    ref = manifest.files.get(path)
+    if ref is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Файл не найден"
+        )
+    content = await asyncio.to_thread(artifact_store.get_blob, ref.blob)
+    media_type = mimetypes.guess_type(path)[0] or _TEXT_TYPE
+    if media_type in _ACTIVE_TYPES:
+        media_type = _TEXT_TYPE
+    return Response(
+        content=content,
+        media_type=media_type,
+        headers={
+            "ETag": f'"{ref.blob}"',
+            "X-Content-Type-Options": "nosniff",
+            "Content-Security-Policy": "sandbox",
+        }
+    )
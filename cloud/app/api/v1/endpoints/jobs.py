@@ -0,0 +1,68 @@
+from dataclasses import asdict
+from typing import Any, Dict
+
+from fastapi import APIRouter, HTTPException, status
+
+from app.schemas.job import JobStatusResponse
+from app.services.jobs import JOB_COMPLETED, JOB_FAILED, job_backend
+
+router = APIRouter(tags=["jobs"])
+
+
+async def _get_job(job_id: str):
+    job = await job_backend.get(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Задача не найдена"
+        )
+    return job
+
+
+@router.get(
+    "/jobs/{job_id}",
+    response_model=JobStatusResponse,
+    summary="Статус задачи агента",
+    description="Возвращает статус задачи и результат, если она завершена"
+)
+async def get_job_status(job_id: str) -> JobStatusResponse:
+    """
+    Статус задачи.
+
+    Args:
+        job_id: Идентификатор задачи
+
+    Returns:
+        Статус задачи
+    """
+    job = await _get_job(job_id)
+    return JobStatusResponse(**asdict(job))
+
+
+@router.get(
+    "/jobs/{job_id}/result",
+    summary="Результат задачи агента",
+    description="Возвращает ответ агента для завершённой задачи"
+)
+async def get_job_result(job_id: str) -> Dict[str, Any]:
+    """
+    Результат задачи.
+
+    Args:
+        job_id: Идентификатор задачи
+
+    Returns:
+        Ответ агента
+    """
+    job = await _get_job(job_id)
+    if job.status == JOB_FAILED:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Задача завершилась с ошибкой: {job.error}"
+        )
+    if job.status != JOB_COMPLETED:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Задача ещё не завершена: {job.status}"
+        )
+    return job.result
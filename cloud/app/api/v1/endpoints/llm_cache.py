@@ -0,0 +1,27 @@
+from dataclasses import asdict
+
+from fastapi import APIRouter
+
+from app.schemas.llm_cache import LLMCacheStatsResponse
+from app.services.llm_client import get_llm_client
+
+router = APIRouter(tags=["llm_cache"])
+
+
+@router.get(
+    "/llm_cache/stats",
+    response_model=LLMCacheStatsResponse,
+    summary="Статистика кэша ответов LLM",
+    description="Попадания, промахи и размер кэша ответов LLM"
+)
+async def get_llm_cache_stats() -> LLMCacheStatsResponse:
+    """
+    Статистика кэша ответов LLM.
+
+    Returns:
+        Счётчики кэша
+    """
+    cache = get_llm_client().cache
+    if cache is None:
+        return LLMCacheStatsResponse(enabled=False)
+    return LLMCacheStatsResponse(enabled=True, **asdict(cache.stats()))
@@ -0,0 +1,25 @@
+import asyncio
+
+from fastapi import APIRouter, Response
+
+from app.services.metrics import render_metrics
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get(
+    "/metrics",
+    summary="Метрики Prometheus",
+    description="Длительности этапов агентов, токены LLM, прогоны, WebSocket и очереди",
+    include_in_schema=False
+)
+async def get_metrics() -> Response:
+    """
+    Метрики в текстовом формате Prometheus.
+
+    Returns:
+        Текст метрик
+    """
+    # В режиме нескольких процессов метрики читаются из файлов — вне event loop
+    content, content_type = await asyncio.to_thread(render_metrics)
+    return Response(content=content, media_type=content_type)
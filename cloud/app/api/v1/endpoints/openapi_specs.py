@@ -0,0 +1,74 @@
+import asyncio
+import os
+from typing import List
+
+from fastapi import APIRouter, HTTPException, status
+
+from app.core.config import settings
+from app.core.logger import logger
+from app.schemas.openapi_spec import OpenAPISpecInfo, OpenAPISpecRequest
+from app.services.openapi_spec import ParsedSpec, spec_registry
+
+router = APIRouter(tags=["openapi"])
+
+
+def _spec_info(spec: ParsedSpec) -> OpenAPISpecInfo:
+    return OpenAPISpecInfo(
+        name=spec.name,
+        operations_count=len(spec.operations),
+        tags=spec.tags
+    )
+
+
+@router.get(
+    "/openapi_specs",
+    response_model=List[OpenAPISpecInfo],
+    summary="Список OpenAPI спецификаций",
+    description="Возвращает зарегистрированные спецификации и их теги"
+)
+async def list_specs() -> List[OpenAPISpecInfo]:
+    """
+    Список зарегистрированных спецификаций.
+
+    Returns:
+        Описание спецификаций
+    """
+    result = []
+    for name in spec_registry.names():
+        try:
+            result.append(_spec_info(await spec_registry.aget(name)))
+        except Exception as e:
+            logger.warning(f"OpenAPI спецификация '{name}' недоступна: {e}")
+    return result
+
+
+@router.post(
+    "/openapi_specs",
+    response_model=OpenAPISpecInfo,
+    status_code=status.HTTP_201_CREATED,
+    summary="Регистрация OpenAPI спецификации",
+    description="Сохраняет спецификацию и делает её доступной API агенту без перезапуска"
+)
+async def register_spec(request: OpenAPISpecRequest) -> OpenAPISpecInfo:
+    """
+    Регистрация новой спецификации.
+
+    Args:
+        request: Имя и текст спецификации
+
+    Returns:
+        Описание зарегистрированной спецификации
+    """
+    path = os.path.join(settings.OPENAPI_SPECS_DIR, f"{request.name}.yaml")
+
+    try:
+        spec = await asyncio.to_thread(spec_registry.save, request.name, path, request.content)
+    except Exception as e:
+        logger.warning(f"Ошибка регистрации спецификации '{request.name}': {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Не удалось разобрать спецификацию: {str(e)}"
+        )
+
+    logger.info(f"OpenAPI спецификация '{request.name}' зарегистрирована")
+    return _spec_info(spec)
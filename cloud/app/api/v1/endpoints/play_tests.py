@@ -1,67 +1,73 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.responses import FileResponse
-import pytest
-import zipfile
-import subprocess
-import sys
-import os
-import webbrowser
+import asyncio
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query, Request, Response, status
+from fastapi.responses import FileResponse, StreamingResponse
+
+from app.services.archive import FORMAT_TAR_ZST, FORMAT_ZIP, MEDIA_TYPES, archive_cache, scan_tree
+from app.services.workspace import workspace_manager
 
 router = APIRouter(tags=["processing"])
 
 
-@router.post(
+def _etag_matches(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+@router.api_route(
     "/play_tests",
+    methods=["GET", "POST"],
     status_code=status.HTTP_200_OK,
     summary="Скачать тесты",
-    description="Скачать тесты"
+    description="Скачать архив с тестами прогона (zip или tar.zst)"
 )
-async def process_text_and_url() -> FileResponse:
+async def process_text_and_url(
+        request: Request,
+        run_id: Optional[str] = None,
+        format: str = Query(default=FORMAT_ZIP, pattern=f"^({FORMAT_ZIP}|{FORMAT_TAR_ZST})$")
+) -> Response:
     """
     Скачать тесты
 
+    Args:
+        request: Запрос (заголовок If-None-Match)
+        run_id: Идентификатор прогона (по умолчанию — последний завершённый)
+        format: Формат архива: zip или tar.zst (быстрее и компактнее)
+
     Returns:
-        Архив с тестами
+        Архив с тестами: из кэша, если проект не менялся, иначе собирается
+        и отдаётся потоком
     """
-    try:
-    # Запускаем pytest
-        paths_to_archive = [
-            'tests',
-            'pages',
-            'requirements.txt',
-            'pytest.ini'
-        ]
-
-        archive_name = 'tests_from_agent.zip'
-
-        def add_to_zip(zipf, path):
-            if os.path.isdir(path):
-                for root, dirs, files in os.walk(path):
-                    for file in files:
-                        file_path = os.path.join(root, file)
-                        # Сохраняем относительный путь внутри архива
-                        arcname = os.path.relpath(file_path, start='.')
-                        zipf.write(file_path, arcname=arcname)
-            elif os.path.isfile(path):
-                zipf.write(path, arcname=os.path.basename(path))
-            else:
-                print(f"Предупреждение: {path} не найден и будет пропущен.")
-
-        # Создаём архив
-        with zipfile.ZipFile(archive_name, 'w', zipfile.ZIP_DEFLATED) as zipf:
-            for path in paths_to_archive:
-                add_to_zip(zipf, path)
+    workspace = workspace_manager.get(run_id) if run_id else workspace_manager.latest()
+    if workspace is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Прогон не найден"
+        )
 
-        print(f"Архив '{archive_name}' успешно создан.")
+    source = await asyncio.to_thread(scan_tree, workspace.tree_path)
+    etag = source.etag(format)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if _etag_matches(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
 
+    filename = f"tests_from_agent_{workspace.run_id}.{format}"
+    cached = await asyncio.to_thread(archive_cache.get, source, format)
+    if cached is not None:
         return FileResponse(
-            path="tests_from_agent.zip",
-            media_type='application/zip',
-            filename="tests_from_agent.zip"  # имя файла, которое увидит пользователь
+            path=cached,
+            media_type=MEDIA_TYPES[format],
+            filename=filename,
+            headers=headers
         )
 
-
-    except Exception as e:
-        print(f"❌ Ошибка при запуске pytest: {e}")
-
-    return 0
+    # Синхронный генератор Starlette выполняет в пуле потоков, сжатие не блокирует event loop
+    return StreamingResponse(
+        archive_cache.stream(source, format),
+        media_type=MEDIA_TYPES[format],
+        headers={**headers, "Content-Disposition": f'attachment; filename="{filename}"'}
+    )
@@ -0,0 +1,91 @@
+import asyncio
+from typing import Any, Dict, List, Optional
+
+from fastapi import APIRouter, HTTPException, status
+
+from app.schemas.timeline import TimelineEventResponse, TimelineResponse, TimelineSpanResponse
+from app.services.tracing import TRACE_FILE, tracer
+from app.services.workspace import workspace_manager
+
+router = APIRouter(tags=["timeline"])
+
+
+def _ms(start: int, end: Optional[int]) -> Optional[float]:
+    return round((end - start) / 1_000_000, 3) if end is not None else None
+
+
+def _to_response(run_id: str, trace: Dict[str, Any]) -> TimelineResponse:
+    spans = trace.get("spans") or []
+    children: Dict[Optional[str], List[Dict[str, Any]]] = {}
+    for span in spans:
+        children.setdefault(span["parent_span_id"], []).append(span)
+    root = next((s for s in spans if s["parent_span_id"] is None), None)
+    started = root["start_time_unix_nano"] if root is not None else 0
+
+    # Обход в глубину: дочерние спаны идут сразу за родителем в порядке начала
+    ordered: List[TimelineSpanResponse] = []
+    stack = [(s, 0) for s in sorted(children.get(None, []), key=lambda s: s["start_time_unix_nano"], reverse=True)]
+    while stack:
+        span, depth = stack.pop()
+        ordered.append(TimelineSpanResponse(
+            span_id=span["span_id"],
+            parent_span_id=span["parent_span_id"],
+            name=span["name"],
+            kind=span["kind"],
+            depth=depth,
+            start_time_unix_nano=span["start_time_unix_nano"],
+            end_time_unix_nano=span["end_time_unix_nano"],
+            offset_ms=_ms(started, span["start_time_unix_nano"]),
+            duration_ms=_ms(span["start_time_unix_nano"], span["end_time_unix_nano"]),
+            status_code=span["status_code"],
+            status_message=span["status_message"],
+            attributes=span["attributes"],
+            events=[
+                TimelineEventResponse(
+                    name=event["name"],
+                    offset_ms=_ms(started, event["time_unix_nano"]),
+                    attributes=event["attributes"]
+                )
+                for event in span["events"]
+            ]
+        ))
+        nested = sorted(children.get(span["span_id"], []), key=lambda s: s["start_time_unix_nano"], reverse=True)
+        stack.extend((child, depth + 1) for child in nested)
+
+    finished = root is not None and root["end_time_unix_nano"] is not None
+    return TimelineResponse(
+        run_id=run_id,
+        trace_id=trace["trace_id"],
+        finished=finished,
+        duration_ms=_ms(started, root["end_time_unix_nano"]) if finished else None,
+        dropped_spans=trace.get("dropped_spans", 0),
+        spans=ordered
+    )
+
+
+@router.get(
+    "/runs/{run_id}/timeline",
+    response_model=TimelineResponse,
+    summary="Шкала времени прогона",
+    description="Дерево этапов прогона с таймингами: план, генерация, попытки исправления, pytest, запросы к LLM"
+)
+async def get_timeline(run_id: str) -> TimelineResponse:
+    """
+    Шкала времени прогона.
+
+    Args:
+        run_id: Идентификатор прогона
+
+    Returns:
+        Спаны трассы прогона; для идущего прогона — уже начатые этапы
+    """
+    workspace = workspace_manager.get(run_id)
+    trace = tracer.snapshot(run_id)
+    if trace is None and workspace is not None:
+        trace = await asyncio.to_thread(tracer.load, workspace.file_path(TRACE_FILE))
+    if trace is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Трасса прогона не найдена"
+        )
+    return _to_response(run_id, trace)
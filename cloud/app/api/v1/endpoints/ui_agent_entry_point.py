@@ -2,7 +2,8 @@ from fastapi import APIRouter, Depends, HTTPException, status
 
 from app.schemas.agent_ui import AgentUIRequest, AgentUIResponse
 from app.schemas.response import ProcessResponse, ProcessedData
-from app.services.agent_service import ui_agent_init
+from app.schemas.job import JobSubmitResponse
+from app.services.jobs import job_backend
 from app.core.logger import logger
 from app.core.exceptions import ProcessingException
 
@@ -11,14 +12,14 @@ router = APIRouter(tags=["processing"])
 
 @router.post(
     "/ui_agent_entry_point",
-    response_model=AgentUIResponse,
-    status_code=status.HTTP_200_OK,
+    response_model=JobSubmitResponse,
+    status_code=status.HTTP_202_ACCEPTED,
     summary="Запуск UI агента",
     description="Принимает url и UI-спецификации в свободной текстовой форме"
 )
 async def process_text_and_url(
         request: AgentUIRequest
-) -> AgentUIResponse:
+) -> JobSubmitResponse:
     """
     Обработка URL и текста.
 
@@ -26,13 +27,14 @@ async def process_text_and_url(
         request: Запрос с URL и текстом
 
     Returns:
-        Результат обработки
+        Идентификатор задачи; ход выполнения передаётся в сокет,
+        результат — через /jobs/{job_id}
     """
     try:
         logger.info(f"Получен запрос на обработку")
-        processed_result = await ui_agent_init(request)
-        logger.info(f"Успешная обработка запроса")
-        return AgentUIResponse(success=True)
+        job = await job_backend.submit("ui", request.model_dump())
+        logger.info(f"Задача {job.job_id} поставлена в очередь")
+        return JobSubmitResponse(success=True, job_id=job.job_id, status=job.status)
 
     except ValueError as e:
         logger.warning(f"Ошибка валидации: {str(e)}")
@@ -1,5 +1,7 @@
 # backend/app/api/v1/endpoints/websocket.py
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from typing import List, Optional
+
+from fastapi import APIRouter, Query, WebSocket, WebSocketDisconnect
 from fastapi.responses import HTMLResponse
 import json
 import asyncio
@@ -10,8 +12,17 @@ from app.api.v1.endpoints.ws_manager import manager
 router = APIRouter(tags=["sokot"])
 
 @router.websocket("/ws")
-async def websocket_endpoint(websocket: WebSocket):
-    await manager.connect(websocket)
+async def websocket_endpoint(websocket: WebSocket, run_id: Optional[List[str]] = Query(default=None)):
+    """
+    Сокет с событиями прогонов агентов.
+
+    Клиент подписывается на прогоны параметром `?run_id=<id>` (можно
+    несколько) или сообщениями `{"subscribe": "<id>"}` /
+    `{"unsubscribe": "<id>"}` (ID прогона — job_id из ответа
+    *_agent_entry_point). Клиент без подписок получает только общие
+    сообщения; события всех прогонов — только при WS_FIREHOSE=true.
+    """
+    await manager.connect(websocket, run_id or ())
     try:
         # # Отправляем приветственное сообщение при подключении
         # await manager.broadcast({
@@ -28,26 +39,38 @@ async def websocket_endpoint(websocket: WebSocket):
                 # Пытаемся распарсить JSON
                 logger.info(data)
                 message_data = json.loads(data)
-                await websocket.send_json({
+
+                if isinstance(message_data, dict) and "subscribe" in message_data:
+                    manager.subscribe(websocket, str(message_data["subscribe"]))
+                    await manager.send_personal_message({"subscribed": message_data["subscribe"]}, websocket)
+                    continue
+                if isinstance(message_data, dict) and "unsubscribe" in message_data:
+                    manager.unsubscribe(websocket, str(message_data["unsubscribe"]))
+                    await manager.send_personal_message({"unsubscribed": message_data["unsubscribe"]}, websocket)
+                    continue
+
+                await manager.send_personal_message({
                     "list_of_ids": message_data
-                })
+                }, websocket)
 
             except json.JSONDecodeError:
                 # Если не JSON, обрабатываем как обычный текст
-                await websocket.send_json({
+                await manager.send_personal_message({
                     "type": "text",
                     "message": f"Получено: {data}",
                     "echo": data
-                })
+                }, websocket)
 
     except WebSocketDisconnect:
-        print("WebSocket клиент отключился")
+        logger.info("WebSocket клиент отключился")
     except Exception as e:
-        print(f"Ошибка в WebSocket: {e}")
+        logger.error(f"Ошибка в WebSocket: {e}", exc_info=True)
         try:
             await websocket.send_json({
                 "type": "error",
                 "message": str(e)
             })
         except:
-            pass
\ No newline at end of file
+            pass
+    finally:
+        manager.disconnect(websocket)
@@ -0,0 +1,106 @@
+import asyncio
+import json
+from typing import Callable, Optional
+
+from app.core.config import settings
+from app.core.logger import logger
+
+# Доставка сериализованного сообщения локальным подключениям: (run_id, text)
+Deliver = Callable[[Optional[str], str], None]
+
+
+class InMemoryBackplane:
+    """Шина событий в пределах одного процесса: сообщения доставляются сразу."""
+
+    def __init__(self, deliver: Deliver) -> None:
+        self._deliver = deliver
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+    async def publish(self, run_id: Optional[str], text: str) -> None:
+        self._deliver(run_id, text)
+
+
+class RedisBackplane:
+    """
+    Шина событий на Redis pub/sub.
+
+    Все процессы (воркеры uvicorn, контейнеры за балансировщиком, воркеры
+    Celery) публикуют события в общий канал, а процессы с WebSocket-
+    подключениями слушают его и доставляют события своим клиентам. Локальные
+    события тоже проходят через канал, поэтому каждый клиент получает
+    сообщение ровно один раз.
+    """
+
+    def __init__(self, deliver: Deliver, url: str, channel: str, reconnect_delay: float = 1.0) -> None:
+        self._deliver = deliver
+        self.url = url
+        self.channel = channel
+        self.reconnect_delay = reconnect_delay
+        self._redis = None
+        self._listener: Optional[asyncio.Task] = None
+
+    def _client(self):
+        if self._redis is None:
+            import redis.asyncio as redis
+
+            self._redis = redis.from_url(self.url)
+        return self._redis
+
+    async def start(self) -> None:
+        if self._listener is None:
+            self._listener = asyncio.create_task(self._listen())
+            logger.info(f"WebSocket события слушаются в канале redis {self.channel}")
+
+    async def stop(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            await asyncio.gather(self._listener, return_exceptions=True)
+            self._listener = None
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+
+    async def publish(self, run_id: Optional[str], text: str) -> None:
+        envelope = json.dumps({"run_id": run_id, "text": text}, ensure_ascii=False)
+        try:
+            await self._client().publish(self.channel, envelope)
+        except Exception as e:
+            logger.error(f"Не удалось опубликовать WebSocket событие в redis: {e}")
+
+    async def _listen(self) -> None:
+        while True:
+            pubsub = self._client().pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(self.channel)
+                async for message in pubsub.listen():
+                    if message.get("type") != "message":
+                        continue
+                    try:
+                        envelope = json.loads(message["data"])
+                        self._deliver(envelope.get("run_id"), envelope["text"])
+                    except (ValueError, KeyError, TypeError) as e:
+                        logger.warning(f"Некорректное WebSocket событие в redis: {e}")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Потеряно подключение к redis pub/sub: {e}")
+                await asyncio.sleep(self.reconnect_delay)
+            finally:
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
+
+
+def create_backplane(deliver: Deliver):
+    """Создаёт шину событий согласно настройке WS_BACKPLANE."""
+    if settings.WS_BACKPLANE == "redis":
+        return RedisBackplane(deliver, url=settings.WS_REDIS_URL, channel=settings.WS_REDIS_CHANNEL)
+    if settings.WS_BACKPLANE != "memory":
+        raise ValueError(f"Неизвестная шина WebSocket событий: {settings.WS_BACKPLANE}")
+    return InMemoryBackplane(deliver)
@@ -1,23 +1,199 @@
+import asyncio
+import json
+from typing import Dict, Iterable, Optional, Set
+
 from fastapi import WebSocket
-from typing import List
+
+from app.api.v1.endpoints.ws_backplane import create_backplane
+from app.core.config import settings
+from app.core.logger import logger
+from app.services.metrics import WS_CONNECTIONS, WS_MESSAGES, WS_QUEUE_DEPTH
+
+# Политики для клиентов, не успевающих забирать сообщения
+POLICY_DROP_OLDEST = "drop_oldest"
+POLICY_DISCONNECT = "disconnect"
+
+
+def serialize_message(message: dict) -> str:
+    """Сериализует сообщение так же, как WebSocket.send_json."""
+    return json.dumps(message, separators=(",", ":"), ensure_ascii=False)
+
+
+class _Client:
+    """Подключение с собственной ограниченной очередью исходящих сообщений."""
+
+    def __init__(self, websocket: WebSocket, queue_size: int) -> None:
+        self.websocket = websocket
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.run_ids: Set[str] = set()
+        self.dropped = 0
+        self.sender: Optional[asyncio.Task] = None
+
 
 class ConnectionManager:
-    def __init__(self):
-        self.active_connections: List[WebSocket] = []
+    """
+    Менеджер WebSocket-подключений с подписками по run ID.
+
+    Сообщение сериализуется один раз и кладётся в очереди получателей;
+    каждое подключение отправляет свою очередь отдельной задачей, поэтому
+    медленный клиент не задерживает остальных. Переполненная очередь
+    обрабатывается по политике WS_SLOW_CONSUMER_POLICY, а подключения,
+    на которые не удаётся отправить сообщение, удаляются.
+
+    Сообщения публикуются через шину (backplane): при WS_BACKPLANE=redis
+    события любого процесса доходят до клиентов, подключённых к другим.
+
+    События прогона получают только его подписчики; клиенты без подписок —
+    только сообщения для всех (broadcast). Режим firehose (WS_FIREHOSE)
+    отдаёт клиентам без подписок события всех прогонов — только для
+    отладки и нагрузочных тестов.
+    """
+
+    def __init__(
+            self,
+            queue_size: int = 256,
+            send_timeout: float = 10.0,
+            slow_consumer_policy: str = POLICY_DROP_OLDEST,
+            firehose: bool = False
+    ) -> None:
+        self.queue_size = queue_size
+        self.send_timeout = send_timeout
+        self.slow_consumer_policy = slow_consumer_policy
+        self.firehose = firehose
+        self._clients: Dict[WebSocket, _Client] = {}
+        self._subscribers: Dict[str, Set[_Client]] = {}
+        self.backplane = create_backplane(self.deliver)
+
+    @property
+    def active_connections(self) -> list:
+        return list(self._clients)
 
-    async def connect(self, websocket: WebSocket):
+    async def start(self) -> None:
+        await self.backplane.start()
+
+    async def stop(self) -> None:
+        await self.backplane.stop()
+
+    async def connect(self, websocket: WebSocket, run_ids: Iterable[str] = ()) -> None:
         await websocket.accept()
-        self.active_connections.append(websocket)
+        client = _Client(websocket, self.queue_size)
+        self._clients[websocket] = client
+        WS_CONNECTIONS.inc()
+        for run_id in run_ids:
+            self.subscribe(websocket, run_id)
+        client.sender = asyncio.create_task(self._send_loop(client))
+
+    def disconnect(self, websocket: WebSocket) -> None:
+        client = self._clients.pop(websocket, None)
+        if client is None:
+            return
+        WS_CONNECTIONS.dec()
+        # Неотправленные сообщения отключённого клиента больше не в очереди
+        WS_QUEUE_DEPTH.dec(client.queue.qsize())
+        for run_id in list(client.run_ids):
+            self._remove_subscription(client, run_id)
+        if client.sender is not None and client.sender is not asyncio.current_task():
+            client.sender.cancel()
+
+    def subscribe(self, websocket: WebSocket, run_id: str) -> None:
+        client = self._clients.get(websocket)
+        if client is None:
+            return
+        client.run_ids.add(run_id)
+        self._subscribers.setdefault(run_id, set()).add(client)
 
-    def disconnect(self, websocket: WebSocket):
-        self.active_connections.remove(websocket)
+    def unsubscribe(self, websocket: WebSocket, run_id: str) -> None:
+        client = self._clients.get(websocket)
+        if client is not None:
+            self._remove_subscription(client, run_id)
+
+    def _remove_subscription(self, client: _Client, run_id: str) -> None:
+        client.run_ids.discard(run_id)
+        subscribers = self._subscribers.get(run_id)
+        if subscribers is not None:
+            subscribers.discard(client)
+            if not subscribers:
+                del self._subscribers[run_id]
 
     async def send_personal_message(self, message: dict, websocket: WebSocket):
-        await websocket.send_json(message)
+        client = self._clients.get(websocket)
+        if client is not None:
+            self._enqueue(client, serialize_message(message))
 
     async def broadcast(self, message: dict):
-        for connection in self.active_connections:
-            await connection.send_json(message)
+        """Отправляет сообщение всем подключениям."""
+        await self.backplane.publish(None, serialize_message(message))
+
+    async def publish(self, run_id: str, message: dict):
+        """Отправляет сообщение подписчикам прогона."""
+        await self.backplane.publish(run_id, serialize_message({**message, "run_id": run_id}))
+
+    def deliver(self, run_id: Optional[str], text: str) -> None:
+        """
+        Раскладывает уже сериализованное сообщение по очередям локальных
+        получателей (вызывается шиной).
+
+        Args:
+            run_id: Прогон, к которому относится сообщение (None — всем)
+            text: Сериализованное сообщение
+        """
+        if run_id is None:
+            recipients = list(self._clients.values())
+        else:
+            recipients = list(self._subscribers.get(run_id, ()))
+            if self.firehose:
+                recipients.extend(c for c in self._clients.values() if not c.run_ids)
+        for client in recipients:
+            self._enqueue(client, text)
+
+    def _enqueue(self, client: _Client, text: str) -> None:
+        try:
+            client.queue.put_nowait(text)
+            WS_QUEUE_DEPTH.inc()
+            return
+        except asyncio.QueueFull:
+            pass
+
+        client.dropped += 1
+        WS_MESSAGES.labels("dropped").inc()
+        if self.slow_consumer_policy == POLICY_DISCONNECT:
+            logger.warning("WebSocket клиент не успевает получать сообщения и будет отключён")
+            self.disconnect(client.websocket)
+            asyncio.create_task(self._close(client.websocket))
+            return
+
+        # POLICY_DROP_OLDEST: вытесняем самое старое сообщение
+        try:
+            client.queue.get_nowait()
+        except asyncio.QueueEmpty:
+            pass
+        client.queue.put_nowait(text)
+
+    async def _send_loop(self, client: _Client) -> None:
+        try:
+            while True:
+                text = await client.queue.get()
+                WS_QUEUE_DEPTH.dec()
+                await asyncio.wait_for(client.websocket.send_text(text), self.send_timeout)
+                WS_MESSAGES.labels("sent").inc()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.info(f"WebSocket клиент удалён: {e!r}")
+            self.disconnect(client.websocket)
+
+    @staticmethod
+    async def _close(websocket: WebSocket) -> None:
+        try:
+            await websocket.close()
+        except Exception:
+            pass
+
 
 # Экземпляр менеджера — глобальный для всего приложения
-manager = ConnectionManager()
\ No newline at end of file
+manager = ConnectionManager(
+    queue_size=settings.WS_SEND_QUEUE_SIZE,
+    send_timeout=settings.WS_SEND_TIMEOUT,
+    slow_consumer_policy=settings.WS_SLOW_CONSUMER_POLICY,
+    firehose=settings.WS_FIREHOSE
+)
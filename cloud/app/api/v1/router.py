@@ -1,6 +1,6 @@
 from fastapi import APIRouter
 
-from app.api.v1.endpoints import health, play_tests, websocket, ui_agent_entry_point, api_agent_entry_point
+from app.api.v1.endpoints import health, play_tests, websocket, ui_agent_entry_point, api_agent_entry_point, openapi_specs, jobs, llm_cache, artifacts, timeline
 from app.core.config import settings
 
 api_router = APIRouter(prefix=settings.API_V1_PREFIX)
@@ -10,4 +10,9 @@ api_router.include_router(health.router)
 api_router.include_router(websocket.router)
 api_router.include_router(ui_agent_entry_point.router)
 api_router.include_router(api_agent_entry_point.router)
-api_router.include_router(play_tests.router)
\ No newline at end of file
+api_router.include_router(play_tests.router)
+api_router.include_router(openapi_specs.router)
+api_router.include_router(jobs.router)
+api_router.include_router(llm_cache.router)
+api_router.include_router(artifacts.router)
+api_router.include_router(timeline.router)
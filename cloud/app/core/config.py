@@ -1,12 +1,14 @@
 import os
 from typing import Optional
-from pydantic_settings import BaseSettings
-from pydantic import ConfigDict
+from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
 class Settings(BaseSettings):
     """Настройки приложения."""
 
+    # Значения берутся из переменных среды и файла .env в рабочем каталоге
+    model_config = SettingsConfigDict(env_file=".env", case_sensitive=True, extra="ignore")
+
     # Настройки приложения
     APP_NAME: str = "AI DevTools Hack"
     APP_VERSION: str = "1.0.0"
@@ -26,9 +28,139 @@ class Settings(BaseSettings):
     # Время жизни (если понадобится для токенов, сессий и т.д.)
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
 
-    class ConfigDict:
-        env_file = ".env"
-        case_sensitive = True
+    # LLM (foundation models)
+    LLM_BASE_URL: str = "https://foundation-models.api.cloud.ru/v1"
+    # Ключ задаётся только через переменную среды или .env, в коде его нет
+    LLM_API_KEY: str = ""
+    LLM_MAX_CONNECTIONS: int = 100
+    LLM_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    LLM_MAX_CONCURRENCY: int = 32
+    LLM_TIMEOUT: float = 600.0
+    LLM_CONNECT_TIMEOUT: float = 10.0
+    LLM_MAX_RETRIES: int = 2
+    LLM_STREAMING: bool = True
+    LLM_STREAM_FLUSH_CHARS: int = 512
+    # Запрашивать usage (токены) в потоковых ответах (stream_options.include_usage)
+    LLM_STREAM_USAGE: bool = True
+
+    # Провайдер LLM: "openai" — API, "record" — API с записью ответов,
+    # "replay" — только записанные ответы (без сети)
+    LLM_PROVIDER: str = "openai"
+    LLM_RECORDINGS_DIR: str = "llm_recordings"
+    # Скорость воспроизведения: 0 — без задержек, 1 — исходное время ответа
+    LLM_REPLAY_SPEED: float = 0.0
+
+    # Кэш ответов LLM (по умолчанию только запросы с temperature <= порога;
+    # генерация кода и исправления идут с 0.3 и по умолчанию не кэшируются)
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_DIR: str = "llm_cache"
+    LLM_CACHE_MAX_MB: int = 512
+    LLM_CACHE_MAX_TEMPERATURE: float = 0.1
+
+    # Загрузка тестируемых страниц (кэш на диске, сжатый zstd)
+    PAGE_CACHE_DIR: str = "page_cache"
+    PAGE_CACHE_TTL: float = 5 * 60
+    # Очистка кэша страниц: квота размера и срок хранения неиспользуемых
+    # (устаревшие по TTL страницы хранятся для условных запросов)
+    PAGE_CACHE_MAX_MB: int = 256
+    PAGE_CACHE_MAX_AGE: float = 24 * 60 * 60
+    PAGE_MAX_BYTES: int = 10 * 1024 * 1024
+    PAGE_FETCH_TIMEOUT: float = 10.0
+    PAGE_FETCH_MAX_CONNECTIONS: int = 20
+    PAGE_USER_AGENT: str = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36"
+
+    # Сжатие HTML страницы для промптов UI агента
+    HTML_MAX_TOKENS: int = 12000
+    HTML_TOKENIZER: str = "cl100k_base"
+
+    # OpenAPI спецификации для API агента (имя -> путь к файлу)
+    OPENAPI_SPECS: dict = {"default": "openapi.yaml"}
+    OPENAPI_SPECS_DIR: str = "openapi_specs"
+    OPENAPI_SLICE_CACHE_SIZE: int = 128
+
+    # Проверка сгенерированных тестов (pytest)
+    VERIFICATION_SLOTS: int = os.cpu_count() or 2
+    VERIFICATION_TIMEOUT: float = 600.0
+    VERIFICATION_MAX_OUTPUT: int = 1_000_000
+    VERIFICATION_MAX_ATTEMPTS: int = 3
+    # Прогретые процессы pytest (fork на запуск, только POSIX)
+    VERIFICATION_PREWARMED: bool = os.name == "posix"
+    VERIFICATION_WORKER_MAX_RUNS: int = 20
+
+    # Общие браузеры для проверки UI тестов (playwright launch-server)
+    BROWSER_POOL_ENABLED: bool = True
+    BROWSER_POOL_SIZE: int = 2
+    BROWSER_POOL_BROWSER: str = "chromium"
+    BROWSER_POOL_HEADLESS: bool = True
+    BROWSER_POOL_MAX_SESSIONS: int = 4
+    BROWSER_POOL_START_TIMEOUT: float = 30.0
+
+    # Точечное исправление по отчёту pytest
+    REPAIR_MAX_TOKENS: int = 16000
+    REPAIR_OUTPUT_TAIL: int = 4000
+
+    # Рабочие каталоги прогонов агентов
+    WORKSPACES_DIR: str = "workspaces"
+    WORKSPACES_TMPFS_DIR: Optional[str] = None
+    WORKSPACE_MAX_AGE: float = 24 * 60 * 60
+    WORKSPACES_MAX_TOTAL_MB: int = 2048
+    WORKSPACE_GC_INTERVAL: float = 600.0
+
+    # Архивы сгенерированных тестов (кэш по хэшу содержимого проекта)
+    ARCHIVE_CACHE_DIR: str = "archive_cache"
+    ARCHIVE_CACHE_MAX_MB: int = 512
+    ARCHIVE_ZSTD_LEVEL: int = 3
+
+    # Хранилище артефактов прогонов (blob-ы по хэшу содержимого + манифесты)
+    ARTIFACTS_DIR: str = "artifacts"
+    ARTIFACTS_ZSTD_LEVEL: int = 3
+    # Через сколько у прогона остаются только план, исходное и итоговое дерево
+    ARTIFACTS_COMPACT_AFTER: float = 24 * 60 * 60
+    ARTIFACTS_MAX_AGE: float = 30 * 24 * 60 * 60
+    ARTIFACTS_GC_INTERVAL: float = 60 * 60
+
+    # Логирование: формат (json или text), файл, размер очереди фонового потока
+    LOG_FORMAT: str = "json"
+    LOG_FILE: Optional[str] = None
+    LOG_QUEUE_SIZE: int = 10000
+    # Строковые поля записи длиннее этого обрезаются (с длиной и хэшем исходного)
+    LOG_FIELD_MAX_CHARS: int = 4000
+    # Записи DEBUG: не чаще LOG_DEBUG_RATE в секунду с одного места вызова
+    # (0 — без ограничения), доля сохраняемых записей
+    LOG_DEBUG_RATE: float = 20.0
+    LOG_DEBUG_SAMPLE: float = 1.0
+    # Логировать SQL-запросы (через общую очередь логов)
+    DATABASE_ECHO: bool = False
+
+    # Период замера задержки event loop, с (0 — не замерять)
+    EVENT_LOOP_LAG_INTERVAL: float = 0.25
+
+    # Трассировка прогонов (доля сэмплируемых прогонов, 0 — выключено)
+    TRACE_SAMPLE_RATE: float = 1.0
+    TRACE_MAX_SPANS: int = 5000
+
+    # Пакетная вставка кейсов: строк в одном INSERT ... RETURNING
+    CASES_INSERT_CHUNK_SIZE: int = 1000
+
+    # Очередь задач агентов: "local" (в процессе) или "celery"
+    JOB_BACKEND: str = "local"
+    JOB_WORKERS: int = 4
+    JOB_RESULT_TTL: float = 60 * 60
+    CELERY_BROKER_URL: str = "redis://localhost:6379/0"
+    CELERY_RESULT_BACKEND: str = "redis://localhost:6379/1"
+
+    # WebSocket: очередь исходящих сообщений на подключение и политика
+    # для медленных клиентов ("drop_oldest" или "disconnect")
+    WS_SEND_QUEUE_SIZE: int = 256
+    WS_SEND_TIMEOUT: float = 10.0
+    WS_SLOW_CONSUMER_POLICY: str = "drop_oldest"
+    # Клиенты без подписок получают события всех прогонов (отладка, нагрузочные тесты)
+    WS_FIREHOSE: bool = False
+
+    # Шина WebSocket событий между процессами: "memory" (один процесс) или "redis"
+    WS_BACKPLANE: str = "memory"
+    WS_REDIS_URL: str = "redis://localhost:6379/2"
+    WS_REDIS_CHANNEL: str = "cloud_ai:ws_events"
 
 
 settings = Settings()
\ No newline at end of file
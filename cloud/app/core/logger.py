@@ -1,10 +1,209 @@
+"""
+Логирование без блокировок event loop.
+
+Логгер приложения пишет записи в ограниченную очередь (QueueHandler), а
+форматирование в JSON и запись в stdout/файл выполняет фоновый поток
+(QueueListener). В вызывающем потоке остаются только подстановка
+аргументов и обрезка полей: строки длиннее LOG_FIELD_MAX_CHARS
+укорачиваются, к ним дописываются исходная длина и хэш содержимого.
+При переполнении очереди записи отбрасываются, а не ждут места.
+
+Отладочные записи ограничиваются по частоте для каждого места вызова
+(LOG_DEBUG_RATE в секунду) и могут сэмплироваться (LOG_DEBUG_SAMPLE).
+Записи внутри прогона агента получают поле run_id (см. bind_run_id).
+"""
+import atexit
+import copy
+import json
 import logging
+import queue
+import random
 import sys
-from logging.handlers import RotatingFileHandler
-from typing import Optional
+import threading
+import time
+from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Any, Dict, Optional, Tuple
+
+import xxhash
 
 from .config import settings
 
+# Идентификатор прогона, к которому относятся записи текущей задачи
+_run_id: ContextVar[Optional[str]] = ContextVar("cloud_ai_log_run_id", default=None)
+
+# Стандартные атрибуты LogRecord: всё остальное пришло через extra=
+_RECORD_FIELDS = frozenset(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+
+def bind_run_id(run_id: Optional[str]) -> Any:
+    """Помечает записи текущей задачи (и её дочерних задач) идентификатором прогона."""
+    return _run_id.set(run_id)
+
+
+def reset_run_id(token: Any) -> None:
+    _run_id.reset(token)
+
+
+def truncate(value: str, max_chars: int) -> str:
+    """Обрезает строку; к обрезанной дописываются длина и хэш исходной."""
+    if len(value) <= max_chars:
+        return value
+    digest = xxhash.xxh3_64_hexdigest(value.encode("utf-8", errors="replace"))
+    return f"{value[:max_chars]}… [обрезано, {len(value)} символов, xxh3={digest}]"
+
+
+class _DebugRateLimiter(logging.Filter):
+    """Ограничение частоты и сэмплирование записей уровня DEBUG по месту вызова."""
+
+    def __init__(self, rate: float, sample: float) -> None:
+        super().__init__()
+        self.rate = rate
+        self.sample = sample
+        self._buckets: Dict[Tuple[str, int], Tuple[float, float, int]] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG:
+            return True
+        if self.sample < 1.0 and random.random() >= self.sample:
+            return False
+        if self.rate <= 0:
+            return True
+
+        key = (record.pathname, record.lineno)
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated, suppressed = self._buckets.get(key, (self.rate, now, 0))
+            tokens = min(self.rate, tokens + (now - updated) * self.rate)
+            if tokens < 1:
+                self._buckets[key] = (tokens, now, suppressed + 1)
+                return False
+            self._buckets[key] = (tokens - 1, now, 0)
+        if suppressed:
+            record.suppressed = suppressed
+        return True
+
+
+class _NonBlockingQueueHandler(QueueHandler):
+    """QueueHandler, который не ждёт места в очереди и обрезает поля записи."""
+
+    def __init__(self, log_queue: "queue.Queue[logging.LogRecord]", max_chars: int) -> None:
+        super().__init__(log_queue)
+        self.max_chars = max_chars
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Сообщение и traceback собираются здесь: аргументы могут измениться,
+        # пока запись ждёт в очереди
+        record = copy.copy(record)
+        record.msg = truncate(record.getMessage(), self.max_chars)
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        for key, value in list(vars(record).items()):
+            if key not in _RECORD_FIELDS and isinstance(value, str):
+                setattr(record, key, truncate(value, self.max_chars))
+        run_id = _run_id.get()
+        if run_id is not None and getattr(record, "run_id", None) is None:
+            record.run_id = run_id
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class JsonFormatter(logging.Formatter):
+    """Одна запись — одна строка JSON."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            "ts": self.formatTime(record, "%Y-%m-%dT%H:%M:%S") + f".{int(record.msecs):03d}",
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if getattr(record, "run_id", None) is not None:
+            entry["run_id"] = record.run_id
+        for key, value in vars(record).items():
+            if key not in _RECORD_FIELDS and key not in entry:
+                entry[key] = value
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        if record.levelno >= logging.WARNING:
+            entry["source"] = f"{record.module}:{record.lineno}"
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class _TextFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        run_id = getattr(record, "run_id", None)
+        return f"{line} [run_id={run_id}]" if run_id else line
+
+
+_queue_handler: Optional[_NonBlockingQueueHandler] = None
+_listener: Optional[QueueListener] = None
+
+
+def _start_listener(log_file: Optional[str]) -> _NonBlockingQueueHandler:
+    global _queue_handler, _listener
+    if _queue_handler is not None:
+        return _queue_handler
+
+    if settings.LOG_FORMAT == "json":
+        formatter: logging.Formatter = JsonFormatter()
+    else:
+        formatter = _TextFormatter(
+            "%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+            datefmt="%Y-%m-%d %H:%M:%S"
+        )
+
+    # Консольный обработчик
+    console_handler = logging.StreamHandler(sys.stdout)
+    console_handler.setFormatter(formatter)
+    handlers = [console_handler]
+
+    # Файловый обработчик (если указан файл)
+    if log_file:
+        file_handler = RotatingFileHandler(
+            log_file,
+            maxBytes=10 * 1024 * 1024,  # 10 MB
+            backupCount=5
+        )
+        file_handler.setFormatter(formatter)
+        handlers.append(file_handler)
+
+    _queue_handler = _NonBlockingQueueHandler(queue.Queue(settings.LOG_QUEUE_SIZE), settings.LOG_FIELD_MAX_CHARS)
+    _queue_handler.addFilter(_DebugRateLimiter(settings.LOG_DEBUG_RATE, settings.LOG_DEBUG_SAMPLE))
+    _listener = QueueListener(_queue_handler.queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+    return _queue_handler
+
+
+def shutdown_logging() -> None:
+    """Дописывает записи из очереди и останавливает фоновый поток."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+        if _queue_handler is not None and _queue_handler.dropped:
+            sys.stderr.write(f"Логирование: отброшено записей при переполнении очереди: {_queue_handler.dropped}\n")
+
+
+def attach_logger(name: str, level: int = logging.INFO) -> logging.Logger:
+    """Направляет сторонний логгер (sqlalchemy.engine и т.п.) в общую очередь."""
+    external = logging.getLogger(name)
+    external.setLevel(level)
+    external.addHandler(_start_listener(settings.LOG_FILE))
+    external.propagate = False
+    return external
+
 
 def setup_logger(
         name: str = __name__,
@@ -27,27 +226,8 @@ def setup_logger(
 
     logger = logging.getLogger(name)
     logger.setLevel(getattr(logging, log_level.upper()))
-
-    # Форматтер
-    formatter = logging.Formatter(
-        "%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-        datefmt="%Y-%m-%d %H:%M:%S"
-    )
-
-    # Консольный обработчик
-    console_handler = logging.StreamHandler(sys.stdout)
-    console_handler.setFormatter(formatter)
-    logger.addHandler(console_handler)
-
-    # Файловый обработчик (если указан файл)
-    if log_file:
-        file_handler = RotatingFileHandler(
-            log_file,
-            maxBytes=10 * 1024 * 1024,  # 10 MB
-            backupCount=5
-        )
-        file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
+    logger.addHandler(_start_listener(log_file))
+    logger.propagate = False
 
     # Отключаем логирование от других библиотек, если не в режиме DEBUG
     if not settings.DEBUG:
@@ -57,4 +237,4 @@ def setup_logger(
 
 
 # Глобальный логгер
-logger = setup_logger(settings.APP_NAME)
\ No newline at end of file
+logger = setup_logger(settings.APP_NAME, log_file=settings.LOG_FILE)
@@ -1,11 +1,23 @@
+import asyncio
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from app.api.v1.endpoints.ws_manager import manager
+from app.api.v1.endpoints import metrics
 from app.api.v1.router import api_router
 from app.core.config import settings
 from app.core.logger import logger
+from app.services.artifact_store import artifact_store
+from app.services.browser_pool import browser_pool
+from app.services.jobs import job_backend
+from app.services.llm_client import init_llm_client, close_llm_client
+from app.services.metrics import mark_process_dead, monitor_event_loop
+from app.services.openapi_spec import spec_registry
+from app.services.page_fetcher import page_fetcher
+from app.services.verification import verification_pool
+from app.services.workspace import workspace_manager
 
 
 @asynccontextmanager
@@ -18,12 +30,35 @@ async def lifespan(app: FastAPI):
     # Здесь можно инициализировать подключения к БД, кэшу и т.д.
     # async with lifespan_manager():
     #     yield
+    init_llm_client()
+    await manager.start()
+    await spec_registry.warm_up()
+    workspace_gc = asyncio.create_task(workspace_manager.run_gc_forever(settings.WORKSPACE_GC_INTERVAL))
+    artifacts_gc = asyncio.create_task(artifact_store.run_gc_forever(settings.ARTIFACTS_GC_INTERVAL))
+    loop_monitor = (
+        asyncio.create_task(monitor_event_loop(settings.EVENT_LOOP_LAG_INTERVAL))
+        if settings.EVENT_LOOP_LAG_INTERVAL > 0 else None
+    )
+    await verification_pool.start()
+    await browser_pool.start()
+    await job_backend.start()
 
     yield
 
     # Остановка приложения
     # Здесь можно закрывать подключения к БД, кэшу и т.д.
     logger.info("Остановка приложения...")
+    await job_backend.stop()
+    await verification_pool.stop()
+    await browser_pool.stop()
+    workspace_gc.cancel()
+    artifacts_gc.cancel()
+    if loop_monitor is not None:
+        loop_monitor.cancel()
+    await manager.stop()
+    await page_fetcher.aclose()
+    await close_llm_client()
+    mark_process_dead()
 
 
 def create_application() -> FastAPI:
@@ -49,6 +84,8 @@ def create_application() -> FastAPI:
 
     # Подключение роутеров
     app.include_router(api_router)
+    # /metrics — в корне, по адресу по умолчанию для Prometheus
+    app.include_router(metrics.router)
 
     # Корневой эндпоинт
     @app.get("/")
@@ -5,11 +5,9 @@ from sqlalchemy import text
 import os
 import asyncio
 from contextlib import asynccontextmanager
-import logging
 
-# Настройка логирования
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(__name__)
+from app.core.config import settings
+from app.core.logger import attach_logger, logger
 
 DATABASE_URL = os.getenv(
     "DATABASE_URL",
@@ -17,7 +15,11 @@ DATABASE_URL = os.getenv(
 )
 
 # Асинхронный движок
-engine = create_async_engine(DATABASE_URL, echo=True)
+engine = create_async_engine(DATABASE_URL)
+
+# SQL-запросы пишутся через очередь логов, а не синхронным echo
+if settings.DATABASE_ECHO:
+    attach_logger("sqlalchemy.engine")
 
 # Фабрика сессий
 AsyncSessionLocal = async_sessionmaker(
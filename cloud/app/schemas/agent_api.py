@@ -25,6 +25,17 @@ class AgentAPIRequest(BaseModel):
         max_length=10000
     )
 
+    spec: str = Field(
+        default="default",
+        description="Имя зарегистрированной OpenAPI спецификации",
+        max_length=100
+    )
+
+    use_llm_cache: bool = Field(
+        default=True,
+        description="Использовать кэш ответов LLM для детерминированных запросов"
+    )
+
 
 class AgentAPIResponse(BaseModel):
     """Схема ответа от API агента."""
@@ -33,4 +44,10 @@ class AgentAPIResponse(BaseModel):
         ...,
         description="Успешность операции",
         example=True
-    )
\ No newline at end of file
+    )
+
+    run_id: Optional[str] = Field(
+        None,
+        description="Идентификатор прогона агента",
+        example="3f2b9c1e0d8a4f6b9e7c5a1d2b3c4d5e"
+    )
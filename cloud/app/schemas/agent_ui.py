@@ -15,6 +15,11 @@ class AgentUIRequest(BaseModel):
         max_length=10000
     )
 
+    use_llm_cache: bool = Field(
+        default=True,
+        description="Использовать кэш ответов LLM для детерминированных запросов"
+    )
+
 
 class AgentUIResponse(BaseModel):
     """Схема ответа от UI агента."""
@@ -23,4 +28,10 @@ class AgentUIResponse(BaseModel):
         ...,
         description="Успешность операции",
         example=True
-    )
\ No newline at end of file
+    )
+
+    run_id: Optional[str] = Field(
+        None,
+        description="Идентификатор прогона агента",
+        example="3f2b9c1e0d8a4f6b9e7c5a1d2b3c4d5e"
+    )
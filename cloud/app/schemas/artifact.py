@@ -0,0 +1,29 @@
+from typing import Any, Dict, List
+
+from pydantic import BaseModel, Field
+
+
+class ArtifactFileResponse(BaseModel):
+    """Файл артефакта."""
+
+    blob: str = Field(..., description="Хэш содержимого (xxh3_128)", example="9f86d081884c7d659a2feaa0c55ad015")
+    size: int = Field(..., description="Размер без сжатия, байт", example=2048)
+
+
+class ArtifactResponse(BaseModel):
+    """Артефакт прогона (манифест)."""
+
+    run_id: str = Field(..., description="Идентификатор прогона", example="3f2b9c1e0d8a4f6b9e7c5a1d2b3c4d5e")
+    name: str = Field(..., description="Имя артефакта", example="iteration-1")
+    seq: int = Field(..., description="Порядковый номер в прогоне", example=1)
+    created_at: float = Field(..., description="Время создания (unix)", example=1700000000.0)
+    size: int = Field(..., description="Суммарный размер файлов без сжатия, байт", example=40960)
+    meta: Dict[str, Any] = Field(default_factory=dict, description="Дополнительные сведения")
+    files: Dict[str, ArtifactFileResponse] = Field(default_factory=dict, description="Файлы артефакта")
+
+
+class ArtifactListResponse(BaseModel):
+    """Артефакты прогона без списка файлов."""
+
+    run_id: str = Field(..., description="Идентификатор прогона", example="3f2b9c1e0d8a4f6b9e7c5a1d2b3c4d5e")
+    artifacts: List[ArtifactResponse] = Field(default_factory=list, description="Артефакты в порядке создания")
@@ -0,0 +1,71 @@
+from typing import Any, Dict, Optional
+from pydantic import BaseModel, Field
+
+
+class JobSubmitResponse(BaseModel):
+    """Схема ответа при постановке задачи агента в очередь."""
+
+    success: bool = Field(
+        ...,
+        description="Задача принята",
+        example=True
+    )
+
+    job_id: str = Field(
+        ...,
+        description="Идентификатор задачи (он же идентификатор прогона)",
+        example="3f2b9c1e0d8a4f6b9e7c5a1d2b3c4d5e"
+    )
+
+    status: str = Field(
+        ...,
+        description="Статус задачи",
+        example="queued"
+    )
+
+
+class JobStatusResponse(BaseModel):
+    """Схема ответа со статусом задачи агента."""
+
+    job_id: str = Field(
+        ...,
+        description="Идентификатор задачи",
+        example="3f2b9c1e0d8a4f6b9e7c5a1d2b3c4d5e"
+    )
+
+    kind: str = Field(
+        "",
+        description="Тип агента (ui или api)",
+        example="ui"
+    )
+
+    status: str = Field(
+        ...,
+        description="Статус задачи: queued, running, completed, failed",
+        example="running"
+    )
+
+    result: Optional[Dict[str, Any]] = Field(
+        None,
+        description="Ответ агента (для завершённой задачи)"
+    )
+
+    error: Optional[str] = Field(
+        None,
+        description="Описание ошибки (если есть)"
+    )
+
+    created_at: Optional[float] = Field(
+        None,
+        description="Время постановки в очередь (unix time)"
+    )
+
+    started_at: Optional[float] = Field(
+        None,
+        description="Время начала выполнения (unix time)"
+    )
+
+    finished_at: Optional[float] = Field(
+        None,
+        description="Время завершения (unix time)"
+    )
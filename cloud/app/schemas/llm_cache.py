@@ -0,0 +1,14 @@
+from pydantic import BaseModel, Field
+
+
+class LLMCacheStatsResponse(BaseModel):
+    """Счётчики кэша ответов LLM."""
+
+    enabled: bool = Field(..., description="Кэш включён", example=True)
+    hits: int = Field(0, description="Ответов взято из кэша", example=12)
+    misses: int = Field(0, description="Запросов без ответа в кэше", example=30)
+    bypassed: int = Field(0, description="Запросов мимо кэша (температура или отказ)", example=4)
+    stores: int = Field(0, description="Ответов сохранено", example=30)
+    evictions: int = Field(0, description="Записей вытеснено по квоте", example=0)
+    entries: int = Field(0, description="Записей в кэше", example=30)
+    size_bytes: int = Field(0, description="Размер кэша на диске", example=1048576)
@@ -0,0 +1,38 @@
+from typing import List
+from pydantic import BaseModel, Field
+
+
+class OpenAPISpecRequest(BaseModel):
+    """Схема запроса для регистрации OpenAPI спецификации."""
+
+    name: str = Field(
+        description="Имя спецификации",
+        pattern=r"^[A-Za-z0-9_\-]+$",
+        max_length=100
+    )
+
+    content: str = Field(
+        description="Текст спецификации в формате YAML или JSON",
+        min_length=1
+    )
+
+
+class OpenAPISpecInfo(BaseModel):
+    """Схема описания зарегистрированной OpenAPI спецификации."""
+
+    name: str = Field(
+        ...,
+        description="Имя спецификации",
+        example="default"
+    )
+
+    operations_count: int = Field(
+        ...,
+        description="Количество операций",
+        example=120
+    )
+
+    tags: List[str] = Field(
+        default_factory=list,
+        description="Теги разделов спецификации"
+    )
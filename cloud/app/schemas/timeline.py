@@ -0,0 +1,40 @@
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel, Field
+
+
+class TimelineEventResponse(BaseModel):
+    """Событие внутри спана."""
+
+    name: str = Field(..., description="Имя события", example="first_chunk")
+    offset_ms: float = Field(..., description="Смещение от начала прогона, мс", example=1520.4)
+    attributes: Dict[str, Any] = Field(default_factory=dict, description="Атрибуты события")
+
+
+class TimelineSpanResponse(BaseModel):
+    """Спан трассы (поля OpenTelemetry и смещения для отрисовки шкалы)."""
+
+    span_id: str = Field(..., description="Идентификатор спана", example="a1b2c3d4e5f60718")
+    parent_span_id: Optional[str] = Field(None, description="Родительский спан")
+    name: str = Field(..., description="Этап", example="pytest")
+    kind: str = Field(..., description="Вид спана (INTERNAL, CLIENT)", example="INTERNAL")
+    depth: int = Field(..., description="Глубина вложенности", example=2)
+    start_time_unix_nano: int = Field(..., description="Начало, нс (unix)", example=1700000000000000000)
+    end_time_unix_nano: Optional[int] = Field(None, description="Конец, нс (unix); нет — спан ещё идёт")
+    offset_ms: float = Field(..., description="Смещение от начала прогона, мс", example=5230.1)
+    duration_ms: Optional[float] = Field(None, description="Длительность, мс", example=18250.7)
+    status_code: str = Field(..., description="Статус: UNSET, OK, ERROR", example="OK")
+    status_message: Optional[str] = Field(None, description="Описание ошибки")
+    attributes: Dict[str, Any] = Field(default_factory=dict, description="Атрибуты спана")
+    events: List[TimelineEventResponse] = Field(default_factory=list, description="События спана")
+
+
+class TimelineResponse(BaseModel):
+    """Шкала времени прогона."""
+
+    run_id: str = Field(..., description="Идентификатор прогона", example="3f2b9c1e0d8a4f6b9e7c5a1d2b3c4d5e")
+    trace_id: str = Field(..., description="Идентификатор трассы", example="4bf92f3577b34da6a3ce929d0e0e4736")
+    finished: bool = Field(..., description="Прогон завершён")
+    duration_ms: Optional[float] = Field(None, description="Длительность прогона, мс", example=254000.0)
+    dropped_spans: int = Field(0, description="Спанов отброшено сверх лимита")
+    spans: List[TimelineSpanResponse] = Field(default_factory=list, description="Спаны в порядке обхода дерева")
@@ -1,12 +1,13 @@
-import os
 import json
 from typing import List, Dict, Any
-from langchain_core.messages import HumanMessage, SystemMessage
-from langchain_openai import ChatOpenAI
-from langchain.output_parsers import PydanticOutputParser
+from langchain_core.output_parsers import PydanticOutputParser
 from pydantic import BaseModel, Field
 from dataclasses import dataclass
 
+from app.core.config import settings
+from app.services.llm_client import get_llm_client
+from app.services.metrics import observe_run, track_stage
+
 
 # Определяем структуру для тест-кейса
 class TestCase(BaseModel):
@@ -33,7 +34,8 @@ class TestCaseResult:
     error_message: str = None
 
 
-def create_test_cases_agent(user_input: str) -> TestCaseResult:
+@observe_run("test_cases")
+async def create_test_cases_agent(user_input: str) -> TestCaseResult:
     """
     Агент для создания тест-кейсов на основе текстового описания задачи.
 
@@ -86,42 +88,39 @@ def create_test_cases_agent(user_input: str) -> TestCaseResult:
     """
 
     try:
-        # Инициализация клиента с использованием LangChain
-        api_key = os.environ.get("API_KEY")
-        base_url = "https://foundation-models.api.cloud.ru/v1"
-
-        if not api_key:
+        if not settings.LLM_API_KEY:
             return TestCaseResult(
                 success=False,
                 test_cases=[],
-                error_message="API_KEY не найден в переменных окружения"
+                error_message="LLM_API_KEY не задан в настройках"
             )
 
-        # Создаем LLM клиент
-        llm = ChatOpenAI(
-            model="Qwen/Qwen3-235B-A22B-Instruct-2507",
-            openai_api_key=api_key,
-            base_url=base_url,
-            temperature=0.5,
-            max_tokens=2500,
-            top_p=0.95,
-            presence_penalty=0
-        )
+        # Общий асинхронный клиент LLM
+        client = get_llm_client()
 
         # Создаем парсер для структурированного вывода
         parser = PydanticOutputParser(pydantic_object=TestCaseList)
 
         # Формируем сообщения
         messages = [
-            SystemMessage(content=system_prompt),
-            HumanMessage(content=f"{user_input}\n\n{parser.get_format_instructions()}")
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": f"{user_input}\n\n{parser.get_format_instructions()}"}
         ]
 
         # Отправляем запрос к модели
-        response = llm.invoke(messages)
+        with track_stage("generate"):
+            response = await client.chat_completion(
+                model="Qwen/Qwen3-235B-A22B-Instruct-2507",
+                max_tokens=2500,
+                temperature=0.5,
+                top_p=0.95,
+                presence_penalty=0,
+                messages=messages
+            )
 
         # Парсим ответ
-        result = parser.parse(response.content)
+        with track_stage("parse"):
+            result = parser.parse(response.choices[0].message.content)
 
         # Конвертируем Pydantic модели в словари
         test_cases_dict = []
@@ -1,6 +1,6 @@
-from typing import Dict, Any, List, Set
+from typing import Dict, Any, List, Optional, Set
+from dataclasses import asdict
 from datetime import datetime
-import requests
 import os
 import sys
 import json
@@ -10,183 +10,55 @@ import zipfile
 import shutil
 from pathlib import Path
 import asyncio
+import contextlib
 import websockets
 from typing import List, Dict
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.database import AsyncSessionLocal
-from app.models.models import Case
 from app.api.v1.endpoints.ws_manager import manager
 
-from openai import OpenAI
-
-from app.core.logger import logger
+from app.core.config import settings
+from app.core.logger import bind_run_id, logger
+from app.services.artifact_store import (
+    ARTIFACT_FINAL,
+    ARTIFACT_GENERATED,
+    ARTIFACT_PLAN,
+    artifact_store,
+    iteration_name,
+)
+from app.services.browser_pool import PLUGIN as BROWSER_POOL_PLUGIN, browser_pool
+from app.services.case_store import bulk_insert_cases, case_to_dict, case_values
+from app.services.file_tree import FileTree
+from app.services.html_reducer import reduce_html
+from app.services.json_stream import IncrementalJSONParser, directory_file_path
+from app.services.llm_client import LLMClient, PendingCacheEntry, get_llm_client
+from app.services.llm_provider import PROVIDER_REPLAY
+from app.services.metrics import REPAIR_ITERATIONS, observe_run, track_db, track_stage
+from app.services.page_fetcher import page_fetcher
+from app.services.openapi_filter import filter_openapi_full
+from app.services.openapi_spec import spec_registry
+from app.services.repair import (
+    apply_patch,
+    build_repair_messages,
+    failures_from_diagnostics,
+    read_junit_report,
+)
+from app.services.static_validator import errors, validate_tree
+from app.services.tracing import TRACE_FILE, tracer
+from app.services.verification import verification_pool
+from app.services.workspace import (
+    STATUS_COMPLETED,
+    STATUS_FAILED,
+    STATUS_RUNNING,
+    Workspace,
+    workspace_manager,
+)
 from app.schemas.request import ProcessRequest
 from app.schemas.agent_ui import AgentUIRequest, AgentUIResponse
 from app.schemas.agent_api import AgentAPIRequest, AgentAPIResponse
 
 
-def create_files_from_json(structure, base_path="."):
-    """
-    Рекурсивно создаёт директории и файлы на основе JSON-структуры.
-
-    :param structure: dict — JSON-структура (вложенные словари = каталоги, строки = файлы)
-    :param base_path: str — базовый путь, откуда начинать создание
-    """
-    for name, content in structure.items():
-        path = os.path.join(base_path, name)
-        if isinstance(content, dict):
-            # Это директория — создаём её и рекурсивно обрабатываем содержимое
-            os.makedirs(path, exist_ok=True)
-            create_files_from_json(content, path)
-        elif isinstance(content, str):
-            # Это файл — создаём его и записываем содержимое
-            # Убеждаемся, что родительская директория существует
-            parent_dir = os.path.dirname(path)
-            os.makedirs(parent_dir, exist_ok=True)
-            with open(path, "w", encoding="utf-8") as f:
-                f.write(content)
-        else:
-            raise ValueError(f"Неподдерживаемый тип содержимого для '{name}': {type(content)}")
-
-
-def delete_directory_structure(structure: Dict[str, Any], root_path: str = ".") -> None:
-    """
-    Удаляет папки и файлы, описанные в структуре directory_structure,
-    начиная с указанного корневого пути.
-
-    :param structure: Словарь с ключом "directory_structure", содержащий вложенную структуру.
-    :param root_path: Путь, относительно которого удаляются файлы и папки (по умолчанию — текущая директория).
-    """
-    directory_structure = structure.get("directory_structure", {})
-
-    def _delete_recursive(current_path: str, items: Dict[str, Any]) -> None:
-        for name, content in items.items():
-            full_path = os.path.join(current_path, name)
-            if isinstance(content, dict):
-                # Это папка — рекурсивно обрабатываем её содержимое
-                _delete_recursive(full_path, content)
-                # После рекурсивного удаления содержимого — удаляем саму папку
-                if os.path.exists(full_path):
-                    shutil.rmtree(full_path)
-            else:
-                # Это файл — удаляем его
-                if os.path.exists(full_path):
-                    os.remove(full_path)
-
-    _delete_recursive(root_path, directory_structure)
-
-
-import yaml
-from typing import Any, Dict, List, Set
-import re
-
-# Глобальное хранилище для рекурсивных ссылок
-all_refs: Set[str] = set()
-
-def extract_refs(obj: Any) -> None:
-    """Рекурсивно собирает все $ref из объекта."""
-    if isinstance(obj, dict):
-        for key, value in obj.items():
-            if key == '$ref' and isinstance(value, str):
-                all_refs.add(value)
-            else:
-                extract_refs(value)
-    elif isinstance(obj, list):
-        for item in obj:
-            extract_refs(item)
-
-def resolve_schema_name(ref: str) -> str:
-    """Извлекает имя схемы из $ref вида '#/components/schemas/Name'."""
-    match = re.match(r'^#/(components/[^/]+/)(.+)$', ref)
-    if match:
-        return match.group(2)  # Например, "User", "ErrorResponse"
-    return ref
-
-def filter_components(original_components: Dict[str, Any], used_refs: Set[str]) -> Dict[str, Any]:
-    """Оставляет в components только те элементы, на которые есть ссылки."""
-    if not original_components:
-        return {}
-
-    filtered = {}
-    # Поддерживаемые секции: schemas, responses, parameters, examples, requestBodies и т.д.
-    for comp_type, items in original_components.items():
-        if not isinstance(items, dict):
-            continue
-        filtered[comp_type] = {}
-        for name, item in items.items():
-            full_ref = f"#/components/{comp_type}/{name}"
-            if full_ref in used_refs:
-                filtered[comp_type][name] = item
-                # Также ищем ссылки внутри самого компонента (например, схема ссылается на другую)
-                extract_refs(item)
-    return filtered
-
-def filter_openapi_full(openapi_data: Dict[str, Any], selected_tags: List[str]) -> Dict[str, Any]:
-    global all_refs
-    all_refs = set()
-
-    # 1. Фильтруем paths по тегам
-    filtered_paths = {}
-    for path, path_item in openapi_data.get('paths', {}).items():
-        filtered_path_item = {}
-        for method, operation in path_item.items():
-            operation_tags = operation.get('tags', [])
-            if any(tag in selected_tags for tag in operation_tags):
-                filtered_path_item[method] = operation
-                extract_refs(operation)
-        if filtered_path_item:
-            filtered_paths[path] = filtered_path_item
-
-    # 2. Извлекаем компоненты, на которые есть ссылки (рекурсивно)
-    original_components = openapi_data.get('components', {})
-    used_refs = set(all_refs)
-    # Повторяем проходы, пока не перестанут находиться новые ссылки (до фиксированной точки)
-    prev_len = -1
-    while len(used_refs) != prev_len:
-        prev_len = len(used_refs)
-        temp_filtered = {}
-        for comp_type, items in original_components.items():
-            if not isinstance(items, dict):
-                continue
-            for name, item in items.items():
-                full_ref = f"#/components/{comp_type}/{name}"
-                if full_ref in used_refs:
-                    extract_refs(item)  # Может добавить новые $ref
-        used_refs.update(all_refs)
-
-    # 3. Формируем результат
-    result = {
-        'openapi': openapi_data.get('openapi'),
-        'info': openapi_data.get('info'),
-    }
-
-    # Опционально копируем глобальные секции
-    for key in ['servers', 'security', 'tags', 'externalDocs']:
-        if key in openapi_data:
-            result[key] = openapi_data[key]
-
-    result['paths'] = filtered_paths
-
-    # Фильтруем components
-    filtered_comp = {}
-    for comp_type, items in original_components.items():
-        if not isinstance(items, dict):
-            continue
-        filtered_items = {}
-        for name, item in items.items():
-            full_ref = f"#/components/{comp_type}/{name}"
-            if full_ref in used_refs:
-                filtered_items[name] = item
-        if filtered_items:
-            filtered_comp[comp_type] = filtered_items
-
-    if filtered_comp:
-        result['components'] = filtered_comp
-
-    return result
-
-
 async def insert_case(item: Dict[str, str], request: ProcessRequest) -> Dict[str, Any]:
     """
     Асинхронная вставка кейсов в базу данных
@@ -197,41 +69,14 @@ async def insert_case(item: Dict[str, str], request: ProcessRequest) -> Dict[str
 
     async with AsyncSessionLocal() as session:
         try:
-            if request.caseType == "ui":
-                ct = False
-            else:
-                ct = True
-
-            case = Case(
-                name=item["name"],
-                description=item["description"],
-                allure=item["allure"],
-                type=ct,
-            )
+            # Один INSERT ... RETURNING вместо add + flush + refresh
+            with track_db("insert_case", rows=1):
+                [row] = await bulk_insert_cases(session, [case_values(item, request.caseType != "ui")])
+                await session.commit()
 
-            session.add(case)
-            await session.flush()  # Получаем ID
-
-            # Обновляем объект из БД, чтобы получить все поля
-            await session.refresh(case)
-
-            await session.commit()
-
-            # Преобразуем объект Case в словарь
-            case_dict = {
-                "id": case.id,
-                "name": case.name,
-                "description": case.description,
-                "caseType": case.type,
-                "status": "alure_done",
-                "allureCode": case.allure,
-                "code": ""
-                # Добавьте другие поля вашей модели, если они есть
-                # "created_at": case.created_at,
-                # "updated_at": case.updated_at,
-            }
-
-            logger.info(f"✅ Успешно добавлена запись с ID: {case.id}")
+            case_dict = case_to_dict(row)
+
+            logger.info(f"✅ Успешно добавлена запись с ID: {row['id']}")
             return case_dict
 
         except Exception as e:
@@ -240,28 +85,21 @@ async def insert_case(item: Dict[str, str], request: ProcessRequest) -> Dict[str
             raise  # Пробрасываем исключение дальше, чтобы обработать на уровне выше
 
 
-async def insert_cases_batch(data: List[Dict[str, str]]) -> list:
+async def insert_cases_batch(data: List[Dict[str, str]], case_type: bool = False) -> list:
     """
     Асинхронная вставка кейсов в базу данных
+    Все кейсы вставляются пачками многострочных INSERT ... RETURNING
     """
     if not data:
         return 0
 
-    inserted_count = 0
     async with AsyncSessionLocal() as session:
         try:
-            inserted_cases = []
-
-            for item in data:
-                case = Case(name=item["name"], description=item["description"])
-                session.add(case)
-                await session.flush()  # Получаем ID без коммита
-                inserted_cases.append(case)
+            with track_db("insert_cases_batch", rows=len(data)):
+                rows = await bulk_insert_cases(session, [case_values(item, case_type) for item in data])
+                await session.commit()
 
-            await session.commit()
-
-            # Теперь у всех объектов есть ID
-            inserted_ids = [case.id for case in inserted_cases]
+            inserted_ids = [row["id"] for row in rows]
             logger.info(f"✅ Успешно добавлено {len(inserted_ids)} записей с ID: {inserted_ids}")
             return inserted_ids
 
@@ -270,36 +108,360 @@ async def insert_cases_batch(data: List[Dict[str, str]]) -> list:
             logger.error(f"❌ Ошибка при вставке данных: {e}")
 
 
-async def ui_agent_init(request: AgentUIRequest) -> AgentUIResponse | None:
+class _StreamForwarder:
+    """Копит фрагменты ответа модели и пересылает их в сокет пачками."""
+
+    def __init__(self, key: str, run_id: str) -> None:
+        self.key = key
+        self.run_id = run_id
+        self._parts: List[str] = []
+        self._size = 0
+
+    async def push(self, delta: str) -> None:
+        self._parts.append(delta)
+        self._size += len(delta)
+        if self._size >= settings.LLM_STREAM_FLUSH_CHARS:
+            await self.flush()
+
+    async def flush(self) -> None:
+        if self._parts:
+            await manager.publish(self.run_id, {self.key: "".join(self._parts)})
+            self._parts = []
+            self._size = 0
+
+
+async def generate_plan(client: LLMClient, run_id: str, **params: Any) -> str:
+    """
+    Запрашивает тест-план у модели-планировщика.
+
+    В потоковом режиме фрагменты плана уходят в сокет ("test_plan_chunk")
+    подписчикам прогона run_id по мере генерации.
+
+    Returns:
+        Текст тест-плана
+    """
+    with track_stage("plan"):
+        if not settings.LLM_STREAMING:
+            response = await client.chat_completion(**params)
+            return response.choices[0].message.content
+
+        forwarder = _StreamForwarder("test_plan_chunk", run_id)
+        parts = []
+        async for delta in client.stream_chat_completion(**params):
+            parts.append(delta)
+            await forwarder.push(delta)
+        await forwarder.flush()
+        return "".join(parts)
+
+
+async def generate_code(client: LLMClient, run_id: str, stage: str = "code", **params: Any) -> Dict[str, Any]:
+    """
+    Запрашивает у кодовой модели JSON с directory_structure.
+
+    В потоковом режиме сырые фрагменты ответа уходят в сокет ("code_chunk"),
+    а каждый файл из directory_structure отправляется ("code_file") сразу,
+    как только его содержимое получено полностью; сообщения адресуются
+    подписчикам прогона run_id. Ответ разбирается
+    инкрементально, без накопления исходной строки.
+
+    В кэш ответов LLM ответ попадает только после успешного разбора JSON.
+
+    Args:
+        stage: Этап для метрик ("code" — генерация, "repair" — исправление)
+
+    Returns:
+        Разобранный JSON-ответ модели
+    """
+    pending = PendingCacheEntry()
+    with track_stage(stage):
+        if not settings.LLM_STREAMING:
+            response = await client.chat_completion(pending=pending, **params)
+            result = json.loads(response.choices[0].message.content)
+            await client.confirm_cache(pending)
+            return result
+
+        parser = IncrementalJSONParser()
+        forwarder = _StreamForwarder("code_chunk", run_id)
+        async for delta in client.stream_chat_completion(pending=pending, **params):
+            await forwarder.push(delta)
+            for path, value in parser.feed(delta):
+                file_path = directory_file_path(path)
+                if file_path is not None:
+                    await forwarder.flush()
+                    await manager.publish(run_id, {"code_file": {"path": file_path, "content": value}})
+        await forwarder.flush()
+        result = parser.close()
+        await client.confirm_cache(pending)
+        return result
+
+
+async def save_artifact(
+        run_id: str,
+        name: str,
+        files: Dict[str, Any],
+        directory: Optional[str] = None,
+        meta: Optional[Dict[str, Any]] = None
+) -> None:
+    """
+    Сохраняет артефакт прогона в хранилище (см. ArtifactStore).
+
+    Ошибка записи не прерывает прогон, а только логируется.
+    """
+    try:
+        if directory is not None:
+            await asyncio.to_thread(
+                artifact_store.save_directory,
+                run_id, name, directory,
+                prefix=f"{os.path.basename(directory)}/", extra=files, meta=meta
+            )
+        else:
+            await asyncio.to_thread(artifact_store.save, run_id, name, files, meta)
+    except Exception as e:
+        logger.error(f"Не удалось сохранить артефакт {name} прогона {run_id}: {e}")
+
+
+def _tree_files(tree: FileTree) -> Dict[str, str]:
+    return {f"tree/{path}": node.content for path, node in tree.files()}
+
+
+async def verify_and_fix(
+        client: LLMClient,
+        tree: FileTree,
+        workspace: Workspace
+) -> FileTree:
+    """
+    Цикл «проверка — исправление» сгенерированных тестов.
+
+    Каждая попытка записывает проект в рабочий каталог прогона, проверяет
+    его статически (синтаксис, импорты, фикстуры) и, если ошибок нет,
+    запускает pytest через пул проверки; вывод pytest пересылается в сокет
+    построчно. Ошибки статической проверки сразу уходят на исправление.
+    При ошибках отчёт pytest (junit XML) разбирается на падения, и кодовой
+    модели отправляются только связанные с ними файлы и трейсбэки; её патч
+    применяется к дереву. Без отчёта исправляется всё дерево целиком.
+    Запросы на исправление не кэшируются.
+
+    В памяти держится только текущая версия дерева: новая версия разделяет
+    с ней неизменённые узлы, на диск пишутся только изменённые файлы, а
+    история попыток сохраняется в хранилище артефактов.
+
+    Returns:
+        Итоговая версия дерева
+    """
+    run_id = workspace.run_id
+    tries = 0
+    await save_artifact(run_id, ARTIFACT_GENERATED, _tree_files(tree))
+
+    async def _forward_output(line: str) -> None:
+        await manager.publish(run_id, {"pytest_output": line})
+
+    test_done = False
+    while not test_done and tries < settings.VERIFICATION_MAX_ATTEMPTS:
+
+        with tracer.span("attempt", attempt=tries + 1, files=len(tree)) as attempt_span:
+            try:
+
+                with track_stage("materialize"):
+                    workdir = await workspace_manager.amaterialize(workspace, tree)
+                logger.info(f"Каталог с тестами создан в {workdir}")
+
+                # Статическая проверка: дерево с ошибками сборки не доходит до pytest
+                with track_stage("static_check"):
+                    diagnostics = await asyncio.to_thread(validate_tree, workdir, ui=workspace.kind == "ui")
+                static_errors = errors(diagnostics)
+                if diagnostics:
+                    await manager.publish(run_id, {"static_check": [asdict(d) for d in diagnostics]})
+
+                result = None
+                if not static_errors:
+                    # Выполняем команду pytest с опцией --alluredir и отчётом junit для исправлений
+                    junit_path = os.path.abspath(workspace.file_path(f"junit-{tries + 1}.xml"))
+                    # Каталог проекта не пересоздаётся между попытками, поэтому allure-results очищается
+                    args = ["pytest", "--alluredir=./allure-results", "--clean-alluredir", f"--junitxml={junit_path}"]
+                    # UI тесты подключаются к общему браузеру из пула вместо запуска своего
+                    async with browser_pool.lease() if workspace.kind == "ui" else contextlib.nullcontext() as browser_env:
+                        if browser_env is not None:
+                            args += ["-p", BROWSER_POOL_PLUGIN]
+                        with track_stage("pytest"):
+                            result = await verification_pool.run(
+                                workdir,
+                                args=args,
+                                on_output=_forward_output,
+                                env=browser_env
+                            )
+
+                if attempt_span is not None:
+                    attempt_span.set_attribute("static_errors", len(static_errors))
+                    if result is not None:
+                        attempt_span.set_attribute("returncode", result.returncode)
+                        attempt_span.set_attribute("timed_out", result.timed_out)
+
+                # Дерево попытки, лог pytest и отчёты — в хранилище артефактов
+                attempt_files = _tree_files(tree)
+                if static_errors:
+                    attempt_files["static_check.txt"] = "\n".join(d.format() for d in diagnostics)
+                if result is not None:
+                    attempt_files["pytest.log"] = result.output
+                    if os.path.isfile(junit_path):
+                        attempt_files["junit.xml"] = await asyncio.to_thread(Path(junit_path).read_bytes)
+                await save_artifact(
+                    run_id,
+                    iteration_name(tries + 1),
+                    attempt_files,
+                    directory=os.path.join(workdir, "allure-results") if result is not None else None,
+                    meta={
+                        "static_errors": len(static_errors),
+                        "returncode": result.returncode if result is not None else None,
+                        "timed_out": result.timed_out if result is not None else False,
+                        "duration": result.duration if result is not None else 0.0,
+                    }
+                )
+
+                # Проверяем код возврата
+                if result is not None and result.ok:
+                    logger.info("Тесты прошли успешно")
+                    test_done = True
+                    await manager.publish(run_id, {"status": f"Код исправолен, можно скачать архив с тестами"})
+                else:
+                    logger.info("Тесты завершились с ошибками")
+
+                    await manager.publish(run_id, {"status": f"В коде обнаружены ошибки. Попытка исправить №{tries + 1}"})
+
+                    files = tree.to_files()
+                    if static_errors:
+                        logger.info(f"Статическая проверка нашла ошибок: {len(static_errors)}, pytest не запускался")
+                        failures = failures_from_diagnostics(static_errors)
+                        output_tail = "\n".join(d.format() for d in static_errors)[-settings.REPAIR_OUTPUT_TAIL:]
+                    else:
+                        failures = await asyncio.to_thread(read_junit_report, junit_path, files)
+                        output_tail = result.output[-settings.REPAIR_OUTPUT_TAIL:]
+
+                    if failures:
+                        # Точечное исправление: только проблемные файлы и трейсбэки,
+                        # в ответ — патч с изменёнными файлами. Исправления не
+                        # кэшируются: повтор того же запроса вернул бы тот же
+                        # (неудачный) патч
+                        logger.info(f"Ошибок в отчёте pytest: {len(failures)}, запрошен патч")
+                        patch = await generate_code(
+                            client,
+                            run_id,
+                            stage="repair",
+                            cache=False,
+                            model="Qwen/Qwen3-Coder-480B-A35B-Instruct",
+                            max_tokens=settings.REPAIR_MAX_TOKENS,
+                            temperature=0.3,
+                            presence_penalty=0,
+                            top_p=0.95,
+                            response_format={"type": "json_object"},
+                            messages=build_repair_messages(failures, files, output_tail)
+                        )
+                        new_tree = apply_patch(tree, patch)
+                    else:
+                        # Отчёта нет (pytest не дошёл до сбора тестов) — исправляем всё дерево
+                        new_result_code = await generate_code(
+                            client,
+                            run_id,
+                            stage="repair",
+                            cache=False,
+                            model="Qwen/Qwen3-Coder-480B-A35B-Instruct",
+                            max_tokens=50000,
+                            temperature=0.3,
+                            presence_penalty=0,
+                            top_p=0.95,
+                            response_format={"type": "json_object"},
+                            messages=[
+                                {
+                                    "role": "system",
+                                    "content": f"""Тесты в этих директориях запускаются с ошибками. Найди и исправь ошибки. В ответ верни строго JSON с исправленным содержанием каталогов и файлов. Внимательно следи за импортами, пустыми папками и правильными названиями функций и классов. В корне json обязательно должен быть ключ 'directory_structure'""",
+                                },
+                                {
+                                    "role": "system",
+                                    "content": json.dumps({"directory_structure": tree.to_structure()}, ensure_ascii=False),
+                                },
+                                {
+                                    "role": "user",
+                                    "content": f"""Вывод pytest: {output_tail}""",
+                                },
+                            ]
+                        )
+                        # Неизменённые файлы берутся из текущей версии дерева
+                        new_tree = FileTree.from_structure(new_result_code["directory_structure"], base=tree)
+                        del new_result_code
+                    logger.info("Исправленный код получен")
+                    diff = new_tree.diff(tree)
+                    logger.info(
+                        f"Изменено файлов: {len(diff.modified)}, добавлено: {len(diff.added)}, удалено: {len(diff.removed)}"
+                    )
+                    tree = new_tree
+                    await manager.publish(run_id, {"directory_structure": tree.to_structure()})
+                    logger.info(f"Каталог с исправленными тестами передан в сокет")
+                    await manager.publish(run_id, {"status": "Проверка исправленного кода"})
+
+            except FileNotFoundError:
+                logger.error("pytest не найден. Убедитесь, что он установлен и доступен в PATH")
+            except Exception as e:
+                logger.error(f"Ошибка в попытке исправления №{tries + 1}: {e}", exc_info=True)
+
+        tries = (tries + 1)
+
+    REPAIR_ITERATIONS.labels(workspace.kind, "passed" if test_done else "failed").observe(tries)
+    await save_artifact(
+        run_id,
+        ARTIFACT_FINAL,
+        _tree_files(tree),
+        meta={"passed": test_done, "attempts": tries}
+    )
+
+    if test_done == True:
+        await manager.publish(run_id, {"status": f"Код исправолен, можно скачать архив с тестами"})
+    else:
+        await manager.publish(run_id, {"status": f"Лимит попыток исчерпан, код лучше проверить вручную"})
+
+    return tree
+
+
+def _require_llm_api_key() -> None:
+    """Прогон без ключа LLM_API_KEY сразу завершается ошибкой, а не 401 от модели."""
+    # Ключ не нужен только при воспроизведении записанных ответов
+    if settings.LLM_PROVIDER != PROVIDER_REPLAY and not settings.LLM_API_KEY:
+        raise ValueError("LLM_API_KEY не задан в настройках")
+
+
+@observe_run("ui")
+async def ui_agent_init(request: AgentUIRequest, run_id: Optional[str] = None) -> AgentUIResponse | None:
 
     logger.info(f"Начало работы агента планировщика")
+    _require_llm_api_key()
 
     ui_url = request.ui_url
     text = request.text
 
-    try:
+    workspace = workspace_manager.create("ui", run_id)
+    workspace_manager.set_status(workspace, STATUS_RUNNING)
+    run_id = workspace.run_id
+    bind_run_id(run_id)
+    tracer.bind_run(run_id, workspace.file_path(TRACE_FILE))
 
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36"
-        }
+    try:
 
-        response = requests.get(ui_url, headers=headers, timeout=10)
-        site_page_html = response.text
-        site_page_html = re.sub(r'<path\b[^>]*>', '', site_page_html, flags=re.IGNORECASE)
-        site_page_html = re.sub(r'<svg\b[^>]*>', '', site_page_html, flags=re.IGNORECASE)
+        with track_stage("page_fetch"):
+            fetched = await page_fetcher.fetch(ui_url)
         logger.info(f"{ui_url}")
-        logger.info(f"{site_page_html}")
 
+        # Страница сжимается один раз и используется в обоих промптах
+        with track_stage("html_reduce"):
+            page = await asyncio.to_thread(reduce_html, fetched.text)
+        site_page_html = page.text
 
-        api_key = "ZDRmY2QzMGUtODNlYi00YWY4LWI2NjEtYmNiZjcwZTYxNjRj.a131dc7c5942fbe66d1ecb8cae5f9ac4"
-        url = "https://foundation-models.api.cloud.ru/v1"
 
-        client = OpenAI(
-            api_key=api_key,
-            base_url=url
-        )
+        client = get_llm_client()
+        # None — кэш по настройкам, False — запрос отказался от кэша
+        llm_cache = None if request.use_llm_cache else False
 
-        response_plan = client.chat.completions.create(
+        result_plan = await generate_plan(
+            client,
+            run_id,
+            cache=llm_cache,
             model="Qwen/Qwen3-Next-80B-A3B-Instruct",
             max_tokens=10000,
             temperature=0.1,
@@ -319,17 +481,24 @@ HTML тестируемой страницы: {site_page_html}.
         logger.info(f"Ответ от модели-планировщика получен")
 
 
-        result_plan = response_plan.choices[0].message.content
-        with open("test_plan.yaml", "w", encoding="utf-8") as f:
-            yaml.dump(result_plan, f, allow_unicode=True, default_flow_style=False)
-        await manager.broadcast({"test_plan": result_plan})
+        await asyncio.to_thread(
+            workspace_manager.write_file,
+            workspace,
+            "test_plan.yaml",
+            yaml.dump(result_plan, allow_unicode=True, default_flow_style=False)
+        )
+        await save_artifact(run_id, ARTIFACT_PLAN, {"test_plan.md": result_plan})
+        await manager.publish(run_id, {"test_plan": result_plan})
         logger.info(f"Тест-план записан в файл и передан в сокет")
 
 
         logger.info(f"Начало работы кодового агента")
-        await manager.broadcast({"status": "Идет генерация кода"})
+        await manager.publish(run_id, {"status": "Идет генерация кода"})
 
-        response_code = client.chat.completions.create(
+        result_code = await generate_code(
+            client,
+            run_id,
+            cache=llm_cache,
             model="Qwen/Qwen3-Coder-480B-A35B-Instruct",
             max_tokens=50000,
             temperature=0.3,
@@ -355,7 +524,8 @@ HTML-код тестируемой веб-страницы.
 Используй page object model (POM): каждый уникальный элемент страницы — в отдельном классе.
 Все тесты должны быть покрыты Allure-декораторами (@allure.feature, @allure.story, @allure.step и т.д.).
 В корне проекта должен быть pytest.ini или conftest.py, если это необходимо для запуска.
-Убедись, что Playwright инициализируется и закрывается корректно через фикстуры.
+Используй только встроенные фикстуры pytest-playwright: page, context, browser (и browser_context_args для настроек контекста). Браузер запускает и закрывает плагин.
+Запрещено запускать браузер вручную: никаких sync_playwright()/async_playwright(), .launch(), .launch_persistent_context() и собственных фикстур, создающих браузер.
 Не включай внешние зависимости, кроме playwright, pytest, allure-pytest.
 
 ФОРМАТ ВЫВОДЫ СТРОГО JSON:
@@ -384,120 +554,63 @@ HTML-код тестируемой веб-страницы.
 
         logger.info(f"Ответ от кодовой модели получен")
 
-        result_code = json.loads(response_code.choices[0].message.content)
-        await manager.broadcast(result_code)
+        await manager.publish(run_id, result_code)
         logger.info(f"Каталог с тестами передан в сокет")
-        await manager.broadcast({"status": "Идет проверка кода"})
-
-
-        import subprocess
-
-        code_arr = [result_code]
-        tries = 0
-
-        test_done = False
-        while test_done == False & tries < 3:
-
-            try:
-
-                create_files_from_json(code_arr[-1]["directory_structure"])
-                logger.info(f"Каталог с тестами создан на диске")
-
-                # Выполняем команду pytest с опцией --alluredir
-                result = subprocess.run(
-                    ["pytest", "--alluredir=./allure-results"],
-                    capture_output=True,  # Захватываем stdout и stderr
-                    text=True  # Возвращаем строки, а не байты
-                )
-
-                # Проверяем код возврата
-                if result.returncode <= 1:
-                    print("Тесты прошли успешно.")
-                    test_done = True
-                    await manager.broadcast({"status": f"Код исправолен, можно скачать архив с тестами"})
-                else:
-                    print("Тесты завершились с ошибками.")
-                    delete_directory_structure(code_arr[-1])
-                    print("Директории удалены.")
-
-                    await manager.broadcast({"status": f"В коде обнаружены ошибки. Попытка исправить №{tries + 1}"})
-
-                    new_response_code = client.chat.completions.create(
-                        model="Qwen/Qwen3-Coder-480B-A35B-Instruct",
-                        max_tokens=50000,
-                        temperature=0.3,
-                        presence_penalty=0,
-                        top_p=0.95,
-                        response_format={"type": "json_object"},
-                        messages=[
-                            {
-                                "role": "system",
-                                "content": f"""Тесты в этих директориях запускаются с ошибками. Найди и исправь ошибки. В ответ верни строго JSON с исправленным содержанием каталогов и файлов. Внимательно следи за импортами, пустыми папками и правильными названиями функций и классов. В корне json обязательно должен быть ключ 'directory_structure'""",
-                            },
-                            {
-                                "role": "system",
-                                "content": f"""{code_arr[-1]}""",
-                            },
-                        ]
-                    )
-                    print("Исправленный код получен")
-                    new_result_code = json.loads(new_response_code.choices[0].message.content)
-                    code_arr.append(new_result_code)
-                    print("json распарсился")
-                    await manager.broadcast(code_arr[-1])
-                    logger.info(f"Каталог с исправленными тестами передан в сокет")
-                    await manager.broadcast({"status": "Проверка исправленного кода"})
-
-            except FileNotFoundError:
-                print("Ошибка: pytest не найден. Убедитесь, что он установлен и доступен в PATH.")
-            except Exception as e:
-                print(f"Произошла непредвиденная ошибка: {e}")
+        await manager.publish(run_id, {"status": "Идет проверка кода"})
 
-            tries = (tries + 1)
 
-        if test_done == True:
-            await manager.broadcast({"status": f"Код исправолен, можно скачать архив с тестами"})
-        else:
-            await manager.broadcast({"status": f"Лимит попыток исчерпан, код лучше проверить вручную"})
+        # Дальше проект живёт в неизменяемом дереве; исходный JSON ответа
+        # и HTML страницы в цикле исправления не нужны
+        tree = FileTree.from_structure(result_code["directory_structure"])
+        del result_code, fetched, page, site_page_html
+        with track_stage("verify"):
+            tree = await verify_and_fix(client, tree, workspace)
 
-        create_files_from_json(code_arr[-1]["directory_structure"])
+        await workspace_manager.amaterialize(workspace, tree)
+        workspace_manager.set_status(workspace, STATUS_COMPLETED)
         logger.info(f"Каталог с тестами создан на диске")
 
-        return AgentUIResponse(success=True)
+        return AgentUIResponse(success=True, run_id=workspace.run_id)
 
 
     except Exception as e:
+        workspace_manager.set_status(workspace, STATUS_FAILED)
         logger.error(f"Ошибка при обработке: {str(e)}")
         raise
 
 
 
-async def api_agent_init(request: AgentAPIRequest) -> AgentAPIResponse | None:
+@observe_run("api")
+async def api_agent_init(request: AgentAPIRequest, run_id: Optional[str] = None) -> AgentAPIResponse | None:
     logger.info(f"Начало работы агента планировщика")
+    _require_llm_api_key()
 
     base_endpoint = request.base_endpoint
     token = request.token
     text = request.text
 
-    input_file = 'openapi.yaml'
     selected_tags = request.tags
 
-    with open(input_file, 'r', encoding='utf-8') as f:
-        openapi_data = yaml.safe_load(f)
+    with track_stage("spec_slice"):
+        spec = await spec_registry.aget(request.spec)
+        open_api = filter_openapi_full(spec, selected_tags)
 
-    open_api = filter_openapi_full(openapi_data, selected_tags)
+    workspace = workspace_manager.create("api", run_id)
+    workspace_manager.set_status(workspace, STATUS_RUNNING)
+    run_id = workspace.run_id
+    bind_run_id(run_id)
+    tracer.bind_run(run_id, workspace.file_path(TRACE_FILE))
 
     try:
 
-        api_key = "ZDRmY2QzMGUtODNlYi00YWY4LWI2NjEtYmNiZjcwZTYxNjRj.a131dc7c5942fbe66d1ecb8cae5f9ac4"
-        url = "https://foundation-models.api.cloud.ru/v1"
-
-        client = OpenAI(
-            api_key=api_key,
-            base_url=url
-        )
+        client = get_llm_client()
+        # None — кэш по настройкам, False — запрос отказался от кэша
+        llm_cache = None if request.use_llm_cache else False
 
-        response_plan = client.chat.completions.create(
+        result_plan = await generate_plan(
+            client,
+            run_id,
+            cache=llm_cache,
             model="Qwen/Qwen3-Next-80B-A3B-Instruct",
             max_tokens=10000,
             temperature=0.1,
@@ -566,17 +679,24 @@ async def api_agent_init(request: AgentAPIRequest) -> AgentAPIResponse | None:
         logger.info(f"Ответ от модели-планировщика получен")
 
 
-        result_plan = response_plan.choices[0].message.content
-        with open("test_plan.yaml", "w", encoding="utf-8") as f:
-            yaml.dump(result_plan, f, allow_unicode=True, default_flow_style=False)
-        await manager.broadcast({"test_plan": result_plan})
+        await asyncio.to_thread(
+            workspace_manager.write_file,
+            workspace,
+            "test_plan.yaml",
+            yaml.dump(result_plan, allow_unicode=True, default_flow_style=False)
+        )
+        await save_artifact(run_id, ARTIFACT_PLAN, {"test_plan.md": result_plan})
+        await manager.publish(run_id, {"test_plan": result_plan})
         logger.info(f"Тест-план записан в файл и передан в сокет")
 
 
         logger.info(f"Начало работы кодового агента")
-        await manager.broadcast({"status": "Идет генерация кода"})
+        await manager.publish(run_id, {"status": "Идет генерация кода"})
 
-        response_code = client.chat.completions.create(
+        result_code = await generate_code(
+            client,
+            run_id,
+            cache=llm_cache,
             model="Qwen/Qwen3-Coder-480B-A35B-Instruct",
             max_tokens=50000,
             temperature=0.1,
@@ -749,88 +869,26 @@ async def api_agent_init(request: AgentAPIRequest) -> AgentAPIResponse | None:
 
         logger.info(f"Ответ от кодовой модели получен")
 
-        result_code = json.loads(response_code.choices[0].message.content)
-        await manager.broadcast(result_code)
+        await manager.publish(run_id, result_code)
         logger.info(f"Каталог с тестами передан в сокет")
-        await manager.broadcast({"status": "Идет проверка кода"})
+        await manager.publish(run_id, {"status": "Идет проверка кода"})
 
 
-        import subprocess
-
-        code_arr = [result_code]
-        tries = 0
-
-        test_done = False
-        while test_done == False & tries < 3:
-
-            try:
-
-                create_files_from_json(code_arr[-1]["directory_structure"])
-                logger.info(f"Каталог с тестами создан на диске")
-
-                # Выполняем команду pytest с опцией --alluredir
-                result = subprocess.run(
-                    ["pytest", "--alluredir=./allure-results"],
-                    capture_output=True,  # Захватываем stdout и stderr
-                    text=True  # Возвращаем строки, а не байты
-                )
-
-                # Проверяем код возврата
-                if result.returncode <= 1:
-                    print("Тесты прошли успешно.")
-                    test_done = True
-                    await manager.broadcast({"status": f"Код исправолен, можно скачать архив с тестами"})
-                else:
-                    print("Тесты завершились с ошибками.")
-                    delete_directory_structure(code_arr[-1])
-                    print("Директории удалены.")
-
-                    await manager.broadcast({"status": f"В коде обнаружены ошибки. Попытка исправить №{tries + 1}"})
-
-                    new_response_code = client.chat.completions.create(
-                        model="Qwen/Qwen3-Coder-480B-A35B-Instruct",
-                        max_tokens=50000,
-                        temperature=0.3,
-                        presence_penalty=0,
-                        top_p=0.95,
-                        response_format={"type": "json_object"},
-                        messages=[
-                            {
-                                "role": "system",
-                                "content": f"""Тесты в этих директориях запускаются с ошибками. Найди и исправь ошибки. В ответ верни строго JSON с исправленным содержанием каталогов и файлов. Внимательно следи за импортами, пустыми папками и правильными названиями функций и классов. В корне json обязательно должен быть ключ 'directory_structure'""",
-                            },
-                            {
-                                "role": "system",
-                                "content": f"""{code_arr[-1]}""",
-                            },
-                        ]
-                    )
-                    print("Исправленный код получен")
-                    new_result_code = json.loads(new_response_code.choices[0].message.content)
-                    code_arr.append(new_result_code)
-                    print("json распарсился")
-                    await manager.broadcast(code_arr[-1])
-                    logger.info(f"Каталог с исправленными тестами передан в сокет")
-                    await manager.broadcast({"status": "Проверка исправленного кода"})
-
-            except FileNotFoundError:
-                print("Ошибка: pytest не найден. Убедитесь, что он установлен и доступен в PATH.")
-            except Exception as e:
-                print(f"Произошла непредвиденная ошибка: {e}")
-
-            tries = (tries + 1)
-
-        if test_done == True:
-            await manager.broadcast({"status": f"Код исправолен, можно скачать архив с тестами"})
-        else:
-            await manager.broadcast({"status": f"Лимит попыток исчерпан, код лучше проверить вручную"})
+        # Дальше проект живёт в неизменяемом дереве; исходный JSON ответа
+        # и срез спецификации в цикле исправления не нужны
+        tree = FileTree.from_structure(result_code["directory_structure"])
+        del result_code, open_api
+        with track_stage("verify"):
+            tree = await verify_and_fix(client, tree, workspace)
 
-        create_files_from_json(code_arr[-1]["directory_structure"])
+        await workspace_manager.amaterialize(workspace, tree)
+        workspace_manager.set_status(workspace, STATUS_COMPLETED)
         logger.info(f"Каталог с тестами создан на диске")
 
-        return AgentAPIResponse(success=True)
+        return AgentAPIResponse(success=True, run_id=workspace.run_id)
 
 
     except Exception as e:
+        workspace_manager.set_status(workspace, STATUS_FAILED)
         logger.error(f"Ошибка при обработке: {str(e)}")
         raise
\ No newline at end of file
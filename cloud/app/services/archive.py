@@ -0,0 +1,199 @@
+import os
+import tarfile
+import threading
+import zipfile
+from dataclasses import dataclass
+from typing import Iterator, List, Optional, Tuple
+
+import xxhash
+import zstandard
+
+from app.core.config import settings
+from app.core.logger import logger
+
+# Что попадает в архив из сгенерированного проекта
+ARCHIVE_PATHS = ("tests", "pages", "requirements.txt", "pytest.ini")
+
+FORMAT_ZIP = "zip"
+FORMAT_TAR_ZST = "tar.zst"
+
+MEDIA_TYPES = {
+    FORMAT_ZIP: "application/zip",
+    FORMAT_TAR_ZST: "application/zstd",
+}
+
+# Размер блока, которым архив отдаётся клиенту
+_CHUNK_SIZE = 64 * 1024
+
+
+@dataclass(frozen=True)
+class ArchiveSource:
+    """Файлы проекта для архива и хэш их содержимого."""
+
+    files: List[Tuple[str, str]]
+    digest: str
+
+    def etag(self, fmt: str) -> str:
+        return f'"{self.digest}-{fmt}"'
+
+
+class _ChunkBuffer:
+    """Поток без seek: накапливает записанные байты до выдачи клиенту."""
+
+    def __init__(self) -> None:
+        self._chunks: List[bytes] = []
+        self.size = 0
+
+    def write(self, data: bytes) -> int:
+        if data:
+            self._chunks.append(bytes(data))
+            self.size += len(data)
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def take(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        self.size = 0
+        return data
+
+
+def collect_files(tree_path: str) -> List[Tuple[str, str]]:
+    """
+    Файлы проекта для архива.
+
+    Returns:
+        Пары (путь внутри архива, путь на диске) в стабильном порядке
+    """
+    files = []
+    for path in ARCHIVE_PATHS:
+        full_path = os.path.join(tree_path, path)
+        if os.path.isdir(full_path):
+            for root, dirs, names in os.walk(full_path):
+                dirs.sort()
+                for name in sorted(names):
+                    file_path = os.path.join(root, name)
+                    files.append((os.path.relpath(file_path, start=tree_path).replace(os.sep, "/"), file_path))
+        elif os.path.isfile(full_path):
+            files.append((path, full_path))
+        else:
+            logger.debug(f"{path} не найден и будет пропущен")
+    return files
+
+
+def scan_tree(tree_path: str) -> ArchiveSource:
+    """Собирает файлы проекта и считает хэш содержимого (ключ кэша и ETag)."""
+    files = collect_files(tree_path)
+    digest = xxhash.xxh3_128()
+    for arcname, file_path in files:
+        with open(file_path, "rb") as f:
+            content = f.read()
+        digest.update(arcname.encode("utf-8"))
+        digest.update(len(content).to_bytes(8, "little"))
+        digest.update(content)
+    return ArchiveSource(files=files, digest=digest.hexdigest())
+
+
+class ArchiveCache:
+    """
+    Архивы сгенерированных тестов, собираемые потоком.
+
+    Архив формируется по мере отправки клиенту (без промежуточного файла)
+    и параллельно записывается в кэш под хэшем содержимого проекта.
+    Повторная загрузка того же дерева отдаётся из кэша. При превышении
+    max_bytes удаляются давно не использованные архивы.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int, zstd_level: int = 3) -> None:
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.zstd_level = zstd_level
+        self._lock = threading.Lock()
+
+    def path(self, source: ArchiveSource, fmt: str) -> str:
+        return os.path.join(self.cache_dir, f"{source.digest}.{fmt}")
+
+    def get(self, source: ArchiveSource, fmt: str) -> Optional[str]:
+        """Путь к готовому архиву в кэше или None."""
+        path = self.path(source, fmt)
+        try:
+            os.utime(path)
+        except OSError:
+            return None
+        return path
+
+    def stream(self, source: ArchiveSource, fmt: str) -> Iterator[bytes]:
+        """
+        Синхронный генератор байтов архива (выполняется в пуле потоков).
+
+        Архив попадает в кэш, только если был сформирован полностью.
+        """
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self.path(source, fmt)
+        part_path = f"{path}.{os.getpid()}.{threading.get_ident()}.part"
+        completed = False
+        with open(part_path, "wb") as part:
+            try:
+                for chunk in self._build(source, fmt):
+                    part.write(chunk)
+                    yield chunk
+                completed = True
+            finally:
+                if not completed:
+                    part.close()
+                    os.remove(part_path)
+        os.replace(part_path, path)
+        self._evict()
+
+    def _build(self, source: ArchiveSource, fmt: str) -> Iterator[bytes]:
+        buffer = _ChunkBuffer()
+        if fmt == FORMAT_ZIP:
+            with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+                for arcname, file_path in source.files:
+                    with open(file_path, "rb") as src, archive.open(arcname, "w") as dst:
+                        while data := src.read(_CHUNK_SIZE):
+                            dst.write(data)
+                            if buffer.size >= _CHUNK_SIZE:
+                                yield buffer.take()
+        elif fmt == FORMAT_TAR_ZST:
+            compressor = zstandard.ZstdCompressor(level=self.zstd_level)
+            with compressor.stream_writer(buffer, closefd=False) as writer, \
+                    tarfile.open(fileobj=writer, mode="w|") as archive:
+                for arcname, file_path in source.files:
+                    archive.add(file_path, arcname=arcname, recursive=False)
+                    if buffer.size >= _CHUNK_SIZE:
+                        yield buffer.take()
+        else:
+            raise ValueError(f"Неподдерживаемый формат архива: {fmt}")
+        yield buffer.take()
+
+    def _evict(self) -> None:
+        with self._lock:
+            entries = []
+            for name in os.listdir(self.cache_dir):
+                if name.endswith(".part"):
+                    continue
+                try:
+                    stat = os.stat(os.path.join(self.cache_dir, name))
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, name))
+            total = sum(size for _, size, _ in entries)
+            for _, size, name in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(os.path.join(self.cache_dir, name))
+                except OSError:
+                    continue
+                total -= size
+
+
+# Экземпляр кэша — глобальный для всего приложения
+archive_cache = ArchiveCache(
+    cache_dir=settings.ARCHIVE_CACHE_DIR,
+    max_bytes=settings.ARCHIVE_CACHE_MAX_MB * 1024 * 1024,
+    zstd_level=settings.ARCHIVE_ZSTD_LEVEL
+)
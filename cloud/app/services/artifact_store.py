@@ -0,0 +1,309 @@
+import asyncio
+import json
+import os
+import re
+import shutil
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional, Union
+
+import xxhash
+import zstandard
+
+from app.core.config import settings
+from app.core.logger import logger
+
+_BLOBS_DIR = "blobs"
+_MANIFESTS_DIR = "manifests"
+
+# Имена артефактов прогона
+ARTIFACT_PLAN = "plan"
+ARTIFACT_GENERATED = "generated"
+ARTIFACT_FINAL = "final"
+
+_NAME_RE = re.compile(r"^[A-Za-z0-9_.-]+$")
+
+
+def iteration_name(attempt: int) -> str:
+    """Имя артефакта попытки проверки (дерево, лог pytest, отчёты)."""
+    return f"iteration-{attempt}"
+
+
+@dataclass
+class FileRef:
+    """Ссылка манифеста на blob."""
+
+    blob: str
+    size: int
+
+
+@dataclass
+class Manifest:
+    """Снимок набора файлов прогона: пути и ссылки на blob-ы."""
+
+    run_id: str
+    name: str
+    seq: int
+    created_at: float = field(default_factory=time.time)
+    files: Dict[str, FileRef] = field(default_factory=dict)
+    meta: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def size(self) -> int:
+        return sum(ref.size for ref in self.files.values())
+
+
+@dataclass
+class ArtifactStoreStats:
+    """Итоги сборки мусора хранилища."""
+
+    manifests_removed: int = 0
+    blobs_removed: int = 0
+    bytes_removed: int = 0
+
+
+def _to_bytes(content: Union[str, bytes]) -> bytes:
+    return content.encode("utf-8") if isinstance(content, str) else content
+
+
+class ArtifactStore:
+    """
+    Хранилище артефактов прогонов с адресацией по содержимому.
+
+    Каждый файл (тест-план, сгенерированное дерево, версия после
+    исправления, лог pytest, отчёты allure и junit) сохраняется один раз
+    как blob (xxh3_128 от содержимого, сжатие zstd). Артефакт прогона —
+    манифест: JSON со списком путей и ссылок на blob-ы. Файлы, не
+    изменившиеся между попытками исправления и между похожими прогонами,
+    хранятся в одном экземпляре.
+
+    Политика хранения: у прогонов старше compact_after остаются только
+    тест-план, исходное и итоговое дерево, прогоны старше max_age
+    удаляются целиком; blob-ы без ссылок удаляются при сборке мусора.
+    """
+
+    # blob-ы моложе этого возраста не удаляются: их манифест может ещё записываться
+    _SWEEP_GRACE = 10 * 60
+
+    def __init__(
+            self,
+            root: str,
+            compact_after: float,
+            max_age: float,
+            zstd_level: int = 3
+    ) -> None:
+        self.root = root
+        self.compact_after = compact_after
+        self.max_age = max_age
+        self.zstd_level = zstd_level
+        self._lock = threading.Lock()
+
+    # --- blob-ы ---
+
+    def _blob_path(self, digest: str) -> str:
+        return os.path.join(self.root, _BLOBS_DIR, digest[:2], f"{digest}.zst")
+
+    def put_blob(self, content: Union[str, bytes]) -> FileRef:
+        """Сохраняет содержимое, если такого blob-а ещё нет."""
+        data = _to_bytes(content)
+        digest = xxhash.xxh3_128_hexdigest(data)
+        path = self._blob_path(digest)
+        try:
+            # Уже сохранён: обновляем время, чтобы сборка мусора его не удалила
+            os.utime(path)
+        except FileNotFoundError:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(zstandard.ZstdCompressor(level=self.zstd_level).compress(data))
+            os.replace(tmp_path, path)
+        return FileRef(blob=digest, size=len(data))
+
+    def get_blob(self, digest: str) -> bytes:
+        """
+        Raises:
+            FileNotFoundError: Если blob-а нет
+        """
+        with open(self._blob_path(digest), "rb") as f:
+            return zstandard.ZstdDecompressor().decompress(f.read())
+
+    # --- манифесты ---
+
+    def _run_dir(self, run_id: str) -> str:
+        if not _NAME_RE.match(run_id):
+            raise ValueError(f"Недопустимый run ID: {run_id}")
+        return os.path.join(self.root, _MANIFESTS_DIR, run_id)
+
+    def _manifest_path(self, run_id: str, name: str) -> str:
+        if not _NAME_RE.match(name):
+            raise ValueError(f"Недопустимое имя артефакта: {name}")
+        return os.path.join(self._run_dir(run_id), f"{name}.json")
+
+    def save(
+            self,
+            run_id: str,
+            name: str,
+            files: Dict[str, Union[str, bytes]],
+            meta: Optional[Dict[str, Any]] = None
+    ) -> Manifest:
+        """
+        Сохраняет набор файлов как артефакт прогона.
+
+        Args:
+            run_id: Идентификатор прогона
+            name: Имя артефакта (например, "plan", "iteration-2")
+            files: {относительный путь: содержимое}
+            meta: Дополнительные сведения (код возврата pytest и т.п.)
+
+        Returns:
+            Записанный манифест (артефакт с тем же именем перезаписывается)
+        """
+        run_dir = self._run_dir(run_id)
+        os.makedirs(run_dir, exist_ok=True)
+        with self._lock:
+            seq = len([n for n in os.listdir(run_dir) if n.endswith(".json")])
+        manifest = Manifest(
+            run_id=run_id,
+            name=name,
+            seq=seq,
+            files={path: self.put_blob(content) for path, content in files.items()},
+            meta=meta or {}
+        )
+        path = self._manifest_path(run_id, name)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(asdict(manifest), f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        return manifest
+
+    def save_directory(
+            self,
+            run_id: str,
+            name: str,
+            path: str,
+            prefix: str = "",
+            extra: Optional[Dict[str, Union[str, bytes]]] = None,
+            meta: Optional[Dict[str, Any]] = None
+    ) -> Manifest:
+        """Сохраняет содержимое каталога на диске (например, allure-results)."""
+        files: Dict[str, Union[str, bytes]] = {}
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                for file_name in names:
+                    file_path = os.path.join(root, file_name)
+                    relative = os.path.relpath(file_path, path).replace(os.sep, "/")
+                    with open(file_path, "rb") as f:
+                        files[f"{prefix}{relative}"] = f.read()
+        files.update(extra or {})
+        return self.save(run_id, name, files, meta)
+
+    def load(self, run_id: str, name: str) -> Optional[Manifest]:
+        try:
+            with open(self._manifest_path(run_id, name), "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        data["files"] = {path: FileRef(**ref) for path, ref in data["files"].items()}
+        return Manifest(**data)
+
+    def list_manifests(self, run_id: str) -> List[Manifest]:
+        try:
+            names = os.listdir(self._run_dir(run_id))
+        except OSError:
+            return []
+        manifests = [self.load(run_id, n[:-len(".json")]) for n in names if n.endswith(".json")]
+        return sorted((m for m in manifests if m is not None), key=lambda m: (m.seq, m.created_at))
+
+    def list_runs(self) -> List[str]:
+        try:
+            return sorted(os.listdir(os.path.join(self.root, _MANIFESTS_DIR)))
+        except OSError:
+            return []
+
+    def read_file(self, manifest: Manifest, path: str) -> Optional[bytes]:
+        ref = manifest.files.get(path)
+        return self.get_blob(ref.blob) if ref is not None else None
+
+    def read_files(self, manifest: Manifest) -> Dict[str, bytes]:
+        return {path: self.get_blob(ref.blob) for path, ref in manifest.files.items()}
+
+    # --- хранение ---
+
+    def compact(self, now: Optional[float] = None) -> ArtifactStoreStats:
+        """
+        Применяет политику хранения и удаляет blob-ы без ссылок.
+
+        Returns:
+            Сколько манифестов и blob-ов удалено
+        """
+        now = now or time.time()
+        stats = ArtifactStoreStats()
+        referenced = set()
+
+        for run_id in self.list_runs():
+            manifests = self.list_manifests(run_id)
+            if not manifests:
+                shutil.rmtree(self._run_dir(run_id), ignore_errors=True)
+                continue
+            age = now - max(m.created_at for m in manifests)
+            if age > self.max_age:
+                shutil.rmtree(self._run_dir(run_id), ignore_errors=True)
+                stats.manifests_removed += len(manifests)
+                continue
+
+            keep = manifests
+            if age > self.compact_after:
+                keep = [m for m in manifests if m.name in (ARTIFACT_PLAN, ARTIFACT_GENERATED, ARTIFACT_FINAL)]
+                for manifest in manifests:
+                    if manifest not in keep:
+                        try:
+                            os.remove(self._manifest_path(run_id, manifest.name))
+                            stats.manifests_removed += 1
+                        except OSError:
+                            pass
+            for manifest in keep:
+                referenced.update(ref.blob for ref in manifest.files.values())
+
+        blobs_dir = os.path.join(self.root, _BLOBS_DIR)
+        for root, _, names in os.walk(blobs_dir):
+            for name in names:
+                path = os.path.join(root, name)
+                digest = name.split(".", 1)[0]
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                if digest in referenced or now - stat.st_mtime < self._SWEEP_GRACE:
+                    continue
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                stats.blobs_removed += 1
+                stats.bytes_removed += stat.st_size
+
+        if stats.manifests_removed or stats.blobs_removed:
+            logger.info(
+                f"Хранилище артефактов: удалено манифестов {stats.manifests_removed}, "
+                f"blob-ов {stats.blobs_removed} ({stats.bytes_removed} байт)"
+            )
+        return stats
+
+    async def run_gc_forever(self, interval: float) -> None:
+        """Периодическое применение политики хранения (запускается из lifespan)."""
+        while True:
+            try:
+                await asyncio.to_thread(self.compact)
+            except Exception as e:
+                logger.error(f"Ошибка очистки хранилища артефактов: {e}")
+            await asyncio.sleep(interval)
+
+
+# Экземпляр хранилища — глобальный для всего приложения
+artifact_store = ArtifactStore(
+    root=settings.ARTIFACTS_DIR,
+    compact_after=settings.ARTIFACTS_COMPACT_AFTER,
+    max_age=settings.ARTIFACTS_MAX_AGE,
+    zstd_level=settings.ARTIFACTS_ZSTD_LEVEL
+)
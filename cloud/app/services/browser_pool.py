@@ -0,0 +1,200 @@
+import asyncio
+import contextlib
+import json
+import os
+import secrets
+import signal
+import socket
+import sys
+import tempfile
+from typing import AsyncIterator, Dict, List, Optional
+
+from app.core.config import settings
+from app.core.logger import logger
+from app.services.browser_pool_plugin import ENDPOINT_ENV
+
+# Модуль плагина для pytest -p
+PLUGIN = "app.services.browser_pool_plugin"
+
+# Корень приложения: нужен в PYTHONPATH процесса pytest, чтобы найти плагин
+_APP_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class _BrowserServer:
+    """Процесс playwright launch-server с одним браузером."""
+
+    def __init__(self, process: asyncio.subprocess.Process, endpoint: str, max_sessions: int) -> None:
+        self.process = process
+        self.endpoint = endpoint
+        self.sessions = 0
+        self.semaphore = asyncio.Semaphore(max_sessions)
+
+    @property
+    def alive(self) -> bool:
+        return self.process.returncode is None
+
+    def kill(self) -> None:
+        try:
+            os.killpg(self.process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
+
+class BrowserPool:
+    """
+    Общие браузеры для проверки сгенерированных UI тестов.
+
+    При старте приложения запускается size процессов браузера
+    (playwright launch-server, headless), доступных по локальному
+    ws-адресу. Запуск pytest получает адрес через lease() и подключается
+    к браузеру плагином browser_pool_plugin, создавая в нём новые
+    изолированные контексты, вместо запуска собственного браузера.
+    Одновременных сессий на браузер — не больше max_sessions. Упавший
+    браузер перезапускается при следующей выдаче.
+
+    Если браузеры не установлены или не запустились, пул выключается, и
+    тесты запускают браузер сами, как без пула.
+    """
+
+    def __init__(
+            self,
+            size: int,
+            browser: str = "chromium",
+            headless: bool = True,
+            max_sessions: int = 4,
+            start_timeout: float = 30.0,
+            enabled: bool = True
+    ) -> None:
+        self.size = size
+        self.browser = browser
+        self.headless = headless
+        self.max_sessions = max_sessions
+        self.start_timeout = start_timeout
+        self.enabled = enabled
+        self._servers: List[_BrowserServer] = []
+        self._lock = asyncio.Lock()
+
+    @property
+    def available(self) -> bool:
+        return self.enabled and bool(self._servers)
+
+    async def start(self) -> None:
+        """Запускает браузеры (вызывается из lifespan)."""
+        if not self.enabled:
+            return
+        results = await asyncio.gather(*(self._spawn() for _ in range(self.size)), return_exceptions=True)
+        self._servers.extend(r for r in results if isinstance(r, _BrowserServer))
+        failures = [r for r in results if isinstance(r, BaseException)]
+        if failures:
+            logger.error(f"Пул браузеров не запущен, тесты будут запускать браузер сами: {failures[0]}")
+            self.enabled = False
+            await self.stop()
+            return
+        logger.info(f"Пул браузеров: {len(self._servers)} x {self.browser}")
+
+    async def stop(self) -> None:
+        for server in self._servers:
+            server.kill()
+        await asyncio.gather(*(s.process.wait() for s in self._servers), return_exceptions=True)
+        self._servers = []
+
+    async def _spawn(self) -> _BrowserServer:
+        config = {
+            "headless": self.headless,
+            "host": "127.0.0.1",
+            "port": _free_port(),
+            "wsPath": f"/{secrets.token_hex(16)}"
+        }
+        fd, config_path = tempfile.mkstemp(prefix="browser-pool-", suffix=".json")
+        with os.fdopen(fd, "w") as f:
+            json.dump(config, f)
+
+        process = await asyncio.create_subprocess_exec(
+            sys.executable, "-m", "playwright", "launch-server",
+            "--browser", self.browser, "--config", config_path,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT,
+            start_new_session=True
+        )
+        server = _BrowserServer(process, "", self.max_sessions)
+        try:
+            server.endpoint = await asyncio.wait_for(self._read_endpoint(process), self.start_timeout)
+        except BaseException:
+            server.kill()
+            await process.wait()
+            raise
+        finally:
+            os.remove(config_path)
+
+        # Дальнейший вывод сервера не нужен, но канал должен вычитываться
+        asyncio.create_task(self._drain(process))
+        return server
+
+    @staticmethod
+    async def _read_endpoint(process: asyncio.subprocess.Process) -> str:
+        output = []
+        async for raw_line in process.stdout:
+            line = raw_line.decode("utf-8", errors="replace").strip()
+            if line.startswith("ws://"):
+                return line
+            output.append(line)
+        raise RuntimeError("\n".join(output[-20:]) or f"launch-server завершился с кодом {process.returncode}")
+
+    @staticmethod
+    async def _drain(process: asyncio.subprocess.Process) -> None:
+        async for _ in process.stdout:
+            pass
+
+    async def _pick(self) -> Optional[_BrowserServer]:
+        async with self._lock:
+            for index, server in enumerate(self._servers):
+                if server.alive:
+                    continue
+                logger.warning(f"Браузер {server.endpoint} завершился, запускается новый")
+                try:
+                    self._servers[index] = await self._spawn()
+                except Exception as e:
+                    logger.error(f"Не удалось перезапустить браузер: {e}")
+            servers = [s for s in self._servers if s.alive]
+            if not servers:
+                return None
+            return min(servers, key=lambda s: s.sessions)
+
+    @contextlib.asynccontextmanager
+    async def lease(self) -> AsyncIterator[Optional[Dict[str, str]]]:
+        """
+        Выдаёт браузер на время одного запуска pytest.
+
+        Yields:
+            Переменные окружения для процесса pytest или None, если пул
+            недоступен (тесты запустят браузер сами)
+        """
+        server = await self._pick() if self.available else None
+        if server is None:
+            yield None
+            return
+
+        server.sessions += 1
+        try:
+            async with server.semaphore:
+                pythonpath = os.pathsep.join(p for p in (_APP_ROOT, os.environ.get("PYTHONPATH")) if p)
+                yield {ENDPOINT_ENV: server.endpoint, "PYTHONPATH": pythonpath}
+        finally:
+            server.sessions -= 1
+
+
+# Экземпляр пула — глобальный для всего приложения
+browser_pool = BrowserPool(
+    size=settings.BROWSER_POOL_SIZE,
+    browser=settings.BROWSER_POOL_BROWSER,
+    headless=settings.BROWSER_POOL_HEADLESS,
+    max_sessions=settings.BROWSER_POOL_MAX_SESSIONS,
+    start_timeout=settings.BROWSER_POOL_START_TIMEOUT,
+    enabled=settings.BROWSER_POOL_ENABLED
+)
@@ -0,0 +1,37 @@
+"""
+Плагин pytest для запуска сгенерированных UI тестов на общем браузере.
+
+Подключается при проверке (pytest -p app.services.browser_pool_plugin).
+Если в окружении задан адрес браузера из BrowserPool, фикстура
+connect_options pytest-playwright возвращает его, и тесты подключаются
+к уже запущенному браузеру (browser_type.connect) вместо запуска нового
+процесса. Контексты и страницы по-прежнему создаются заново на каждый
+тест, поэтому тесты изолированы друг от друга.
+
+Модуль не импортирует приложение: он загружается внутри процесса pytest.
+"""
+import os
+from typing import Any, Dict, Optional
+
+import pytest
+
+# Переменная окружения с ws-адресом браузера из пула
+ENDPOINT_ENV = "CLOUD_AI_BROWSER_WS_ENDPOINT"
+
+
+class _BrowserPoolFixtures:
+    @staticmethod
+    @pytest.fixture(scope="session")
+    def connect_options() -> Optional[Dict[str, Any]]:
+        endpoint = os.environ.get(ENDPOINT_ENV)
+        if not endpoint:
+            return None
+        return {"ws_endpoint": endpoint}
+
+
+def pytest_configure(config: pytest.Config) -> None:
+    # Плагины из entry points регистрируются позже плагинов из -p, поэтому
+    # фикстура регистрируется здесь — после pytest-playwright, чтобы
+    # переопределить его connect_options
+    if not config.pluginmanager.has_plugin("cloud_ai_browser_pool"):
+        config.pluginmanager.register(_BrowserPoolFixtures(), "cloud_ai_browser_pool")
@@ -0,0 +1,82 @@
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.logger import logger
+from app.models.models import Case
+
+# Колонки, возвращаемые из INSERT ... RETURNING (вместе с серверными значениями)
+_RETURNING = tuple(Case.__table__.c)
+
+
+def case_values(item: Dict[str, Any], case_type: bool = False) -> Dict[str, Any]:
+    """
+    Значения колонок Case для одного кейса из ответа планировщика.
+
+    Args:
+        item: Кейс с ключами name, description и (необязательно) allure
+        case_type: False — UI кейс, True — API кейс
+    """
+    return {
+        "name": item["name"],
+        "description": item["description"],
+        "allure": item.get("allure"),
+        "type": case_type,
+    }
+
+
+def case_to_dict(row: Any) -> Dict[str, Any]:
+    """Преобразует строку cases в формат ответа клиенту."""
+    return {
+        "id": row["id"],
+        "name": row["name"],
+        "description": row["description"],
+        "caseType": row["type"],
+        "status": "alure_done",
+        "allureCode": row["allure"],
+        "code": ""
+    }
+
+
+async def bulk_insert_cases(
+        session: AsyncSession,
+        rows: Iterable[Dict[str, Any]],
+        chunk_size: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """
+    Вставляет кейсы многострочными INSERT ... RETURNING.
+
+    Каждая пачка из chunk_size строк — один запрос к Postgres, который сразу
+    возвращает id и значения по умолчанию (status, created_at и т.д.).
+    Размер пачки ограничивает число параметров запроса (у Postgres не больше
+    32767). Транзакцией управляет вызывающий код.
+
+    Args:
+        session: Сессия БД
+        rows: Значения колонок (см. case_values)
+        chunk_size: Строк в одном запросе (по умолчанию CASES_INSERT_CHUNK_SIZE)
+
+    Returns:
+        Вставленные строки в исходном порядке
+    """
+    rows = list(rows)
+    chunk_size = chunk_size or settings.CASES_INSERT_CHUNK_SIZE
+    inserted: List[Dict[str, Any]] = []
+
+    for start in range(0, len(rows), chunk_size):
+        chunk = rows[start:start + chunk_size]
+        # executemany с RETURNING SQLAlchemy собирает в один многострочный
+        # INSERT (insertmanyvalues); sort_by_parameter_order гарантирует,
+        # что строки вернутся в порядке параметров
+        result = await session.execute(
+            insert(Case)
+            .returning(*_RETURNING, sort_by_parameter_order=True)
+            .execution_options(insertmanyvalues_page_size=chunk_size),
+            chunk
+        )
+        inserted.extend(dict(row) for row in result.mappings())
+
+    logger.info(f"Добавлено кейсов: {len(inserted)} (запросов: {-(-len(rows) // chunk_size)})")
+    return inserted
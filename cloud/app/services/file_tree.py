@@ -0,0 +1,305 @@
+import glob
+import os
+import shutil
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Tuple, Union
+
+import xxhash
+
+
+@dataclass(frozen=True)
+class FileNode:
+    """Файл дерева: содержимое и его хэш."""
+
+    content: str
+    digest: str
+
+    @classmethod
+    def of(cls, content: str) -> "FileNode":
+        return cls(content=content, digest=xxhash.xxh3_128_hexdigest(content.encode("utf-8")))
+
+
+@dataclass(frozen=True)
+class DirNode:
+    """Каталог дерева: неизменяемый словарь дочерних узлов и хэш поддерева."""
+
+    children: Mapping[str, Union["DirNode", FileNode]]
+    digest: str
+
+    @classmethod
+    def of(cls, children: Dict[str, Union["DirNode", FileNode]]) -> "DirNode":
+        hasher = xxhash.xxh3_128()
+        for name in sorted(children):
+            node = children[name]
+            hasher.update(f"{'d' if isinstance(node, DirNode) else 'f'}:{name}:{node.digest}\n".encode("utf-8"))
+        return cls(children=MappingProxyType(dict(children)), digest=hasher.hexdigest())
+
+
+Node = Union[DirNode, FileNode]
+
+_EMPTY_DIR = DirNode.of({})
+
+
+@dataclass(frozen=True)
+class TreeDiff:
+    """Разница между двумя версиями дерева (пути файлов)."""
+
+    added: List[str] = field(default_factory=list)
+    modified: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+
+    @property
+    def changed(self) -> List[str]:
+        return self.added + self.modified
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.modified or self.removed)
+
+
+def _split(path: str) -> List[str]:
+    parts = [p for p in path.strip("/").split("/") if p]
+    if not parts or any(p in (".", "..") for p in parts):
+        raise ValueError(f"Недопустимый путь в дереве: {path}")
+    return parts
+
+
+def _key_parts(raw_name: str) -> List[str]:
+    """
+    Путь узла из ключа directory_structure: "pages/" — каталог pages,
+    "tests/ui/test_login.py" — файл во вложенных каталогах.
+    """
+    parts = raw_name.rstrip("/").split("/")
+    if any(not p or p in (".", "..") or "\\" in p or "\0" in p for p in parts):
+        raise ValueError(f"Недопустимое имя в дереве: {raw_name!r}")
+    return parts
+
+
+def _place(target: Dict[str, Any], name: str, content: Any) -> None:
+    existing = target.get(name)
+    if isinstance(existing, dict) and isinstance(content, dict):
+        merged = dict(existing)
+        for key, value in content.items():
+            _place(merged, key, value)
+        target[name] = merged
+    else:
+        target[name] = content
+
+
+def _nest(structure: Dict[str, Any]) -> Dict[str, Any]:
+    """Раскладывает ключи с путями ("tests/test_a.py") по вложенным каталогам."""
+    nested: Dict[str, Any] = {}
+    for raw_name, content in structure.items():
+        parts = _key_parts(raw_name)
+        for part in reversed(parts[1:]):
+            content = {part: content}
+        _place(nested, parts[0], content)
+    return nested
+
+
+def _build(structure: Dict[str, Any], base: Optional[DirNode]) -> DirNode:
+    children: Dict[str, Node] = {}
+    for name, content in _nest(structure).items():
+        previous = base.children.get(name) if base is not None else None
+        if isinstance(content, dict):
+            node = _build(content, previous if isinstance(previous, DirNode) else None)
+        elif isinstance(content, str):
+            node = FileNode.of(content)
+        else:
+            raise ValueError(f"Неподдерживаемый тип содержимого для '{name}': {type(content)}")
+        # Совпадающий с прошлой версией узел берётся из неё, новый объект освобождается
+        children[name] = previous if previous is not None and previous.digest == node.digest else node
+    return DirNode.of(children)
+
+
+def _with_change(node: DirNode, parts: List[str], content: Optional[str]) -> DirNode:
+    name, rest = parts[0], parts[1:]
+    children = dict(node.children)
+    child = children.get(name)
+    if rest:
+        subtree = _with_change(child if isinstance(child, DirNode) else _EMPTY_DIR, rest, content)
+        children[name] = subtree
+    elif content is None:
+        children.pop(name, None)
+    else:
+        children[name] = FileNode.of(content)
+    return DirNode.of(children)
+
+
+def _diff(old: Optional[Node], new: Optional[Node], path: str, diff: TreeDiff) -> None:
+    if old is not None and new is not None and old.digest == new.digest:
+        return
+    if isinstance(old, DirNode) or isinstance(new, DirNode):
+        old_children = old.children if isinstance(old, DirNode) else {}
+        new_children = new.children if isinstance(new, DirNode) else {}
+        if isinstance(old, FileNode):
+            diff.removed.append(path)
+        if isinstance(new, FileNode):
+            diff.added.append(path)
+        for name in sorted(set(old_children) | set(new_children)):
+            _diff(old_children.get(name), new_children.get(name), f"{path}/{name}" if path else name, diff)
+        return
+    if old is None:
+        diff.added.append(path)
+    elif new is None:
+        diff.removed.append(path)
+    else:
+        diff.modified.append(path)
+
+
+class FileTree:
+    """
+    Неизменяемое дерево файлов сгенерированного проекта.
+
+    Узлы хранят хэш содержимого (у каталогов — хэш поддерева), поэтому
+    новая версия дерева после патча пересоздаёт только каталоги на пути
+    к изменённым файлам, а остальные узлы общие с прошлой версией.
+    Сравнение версий пропускает поддеревья с совпадающим хэшем, а запись
+    на диск затрагивает только изменившиеся файлы.
+    """
+
+    __slots__ = ("root",)
+
+    def __init__(self, root: DirNode = _EMPTY_DIR) -> None:
+        self.root = root
+
+    @classmethod
+    def from_structure(cls, structure: Dict[str, Any], base: Optional["FileTree"] = None) -> "FileTree":
+        """
+        Строит дерево из directory_structure.
+
+        Ключи могут содержать вложенные пути ("tests/ui/test_login.py"):
+        промежуточные каталоги создаются автоматически.
+
+        Args:
+            structure: Вложенный словарь (каталоги — словари, файлы — строки)
+            base: Прошлая версия: совпадающие узлы берутся из неё
+
+        Raises:
+            ValueError: Если в структуре есть значения другого типа или
+                недопустимые пути ("..", ".", абсолютные пути, пустые сегменты)
+        """
+        return cls(_build(structure, base.root if base is not None else None))
+
+    @property
+    def digest(self) -> str:
+        return self.root.digest
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, FileTree) and other.digest == self.digest
+
+    def __hash__(self) -> int:
+        return hash(self.digest)
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self.files())
+
+    def files(self) -> Iterator[Tuple[str, FileNode]]:
+        """Файлы дерева: (относительный путь, узел) в порядке обхода."""
+        stack: List[Tuple[str, DirNode]] = [("", self.root)]
+        while stack:
+            prefix, node = stack.pop()
+            for name in sorted(node.children, reverse=True):
+                child = node.children[name]
+                if isinstance(child, DirNode):
+                    stack.append((f"{prefix}{name}/", child))
+                else:
+                    yield f"{prefix}{name}", child
+
+    def to_files(self) -> Dict[str, str]:
+        """Словарь {путь: содержимое} (строки общие с деревом)."""
+        return {path: node.content for path, node in self.files()}
+
+    def to_structure(self) -> Dict[str, Any]:
+        """Вложенный словарь в формате directory_structure."""
+        def _convert(node: DirNode) -> Dict[str, Any]:
+            return {
+                name: _convert(child) if isinstance(child, DirNode) else child.content
+                for name, child in node.children.items()
+            }
+        return _convert(self.root)
+
+    def get(self, path: str) -> Optional[str]:
+        node: Optional[Node] = self.root
+        for part in _split(path):
+            node = node.children.get(part) if isinstance(node, DirNode) else None
+        return node.content if isinstance(node, FileNode) else None
+
+    def with_changes(self, changes: Dict[str, Optional[str]]) -> "FileTree":
+        """
+        Новая версия дерева с изменёнными файлами.
+
+        Args:
+            changes: {путь: новое содержимое | None — удалить файл}
+
+        Raises:
+            ValueError: Если путь выходит за пределы дерева
+        """
+        root = self.root
+        for path, content in changes.items():
+            root = _with_change(root, _split(path), content)
+        return FileTree(root)
+
+    def diff(self, other: Optional["FileTree"]) -> TreeDiff:
+        """Изменения от other (прошлая версия; None — пустое дерево) к этому дереву."""
+        diff = TreeDiff()
+        _diff(other.root if other is not None else _EMPTY_DIR, self.root, "", diff)
+        return diff
+
+    def materialize(self, root: str, previous: Optional["FileTree"] = None) -> TreeDiff:
+        """
+        Записывает дерево в каталог.
+
+        Args:
+            root: Каталог проекта
+            previous: Версия, уже записанная в root; без неё пишутся все файлы
+
+        Returns:
+            Записанные и удалённые файлы
+        """
+        diff = self.diff(previous)
+        for path in diff.removed:
+            full_path = os.path.join(root, *path.split("/"))
+            try:
+                os.remove(full_path)
+            except FileNotFoundError:
+                pass
+            _drop_bytecode(full_path)
+        for path in diff.changed:
+            full_path = os.path.join(root, *path.split("/"))
+            if os.path.isdir(full_path):
+                # Каталог прошлой версии заменён файлом
+                shutil.rmtree(full_path)
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            with open(full_path, "w", encoding="utf-8") as f:
+                f.write(self.get(path))
+            _drop_bytecode(full_path)
+        # Пустые каталоги дерева тоже должны существовать
+        for prefix, node in self._dirs():
+            if not node.children:
+                os.makedirs(os.path.join(root, *prefix.split("/")), exist_ok=True)
+        return diff
+
+    def _dirs(self) -> Iterator[Tuple[str, DirNode]]:
+        stack: List[Tuple[str, DirNode]] = [("", self.root)]
+        while stack:
+            prefix, node = stack.pop()
+            if prefix:
+                yield prefix, node
+            for name, child in node.children.items():
+                if isinstance(child, DirNode):
+                    stack.append((f"{prefix}/{name}" if prefix else name, child))
+
+
+def _drop_bytecode(path: str) -> None:
+    # Время изменения в .pyc хранится с точностью до секунды: быстрая
+    # перезапись файла того же размера могла бы оставить старый байткод
+    if not path.endswith(".py"):
+        return
+    directory, name = os.path.split(path)
+    pattern = os.path.join(glob.escape(directory), "__pycache__", f"{glob.escape(name[:-3])}.*.pyc")
+    for cached in glob.glob(pattern):
+        try:
+            os.remove(cached)
+        except OSError:
+            pass
@@ -0,0 +1,297 @@
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+from html.parser import HTMLParser
+from typing import Dict, List, Optional, Tuple
+
+import xxhash
+
+from app.core.config import settings
+from app.core.logger import logger
+
+# Поддеревья, которые не несут информации для тестов
+_SKIP_TAGS = {"script", "style", "noscript", "svg", "math", "template", "canvas", "object"}
+
+_VOID_TAGS = {
+    "area", "base", "br", "col", "embed", "hr", "img", "input", "link",
+    "meta", "param", "source", "track", "wbr",
+}
+
+# Приоритет строки: чем меньше, тем дольше строка остаётся при сжатии под бюджет
+PRIORITY_INTERACTIVE = 0
+PRIORITY_STRUCTURE = 1
+PRIORITY_TEXT = 2
+
+_INTERACTIVE_TAGS = {
+    "a", "button", "input", "select", "option", "textarea", "form", "label",
+    "details", "summary", "dialog", "iframe",
+}
+_STRUCTURE_TAGS = {
+    "title", "header", "nav", "main", "footer", "aside", "section", "article",
+    "h1", "h2", "h3", "h4", "h5", "h6", "table", "th", "ul", "ol", "li", "img",
+    "fieldset", "legend",
+}
+
+# Атрибуты, по которым строятся стабильные локаторы
+_LOCATOR_ATTRS = ("id", "name", "data-testid", "data-test", "data-test-id", "data-qa", "data-cy", "role")
+_KEEP_ATTRS = _LOCATOR_ATTRS + (
+    "type", "placeholder", "value", "href", "for", "action", "method", "title", "alt",
+    "required", "disabled", "checked", "selected", "multiple", "readonly",
+)
+
+# Элементы, которые закрываются неявно следующим таким же элементом
+_IMPLICIT_END_TAGS = {"li", "option", "p", "tr", "td", "th", "dt", "dd"}
+
+_TEXT_LIMIT = 120
+_ATTR_LIMIT = 100
+_WS_RE = re.compile(r"\s+")
+
+
+def _clip(value: str, limit: int) -> str:
+    return value if len(value) <= limit else value[:limit - 1] + "…"
+
+
+@dataclass
+class _Line:
+    depth: int
+    tag: str
+    attrs: str
+    priority: int
+    text: str = ""
+
+    def render(self) -> str:
+        indent = "  " * self.depth
+        if not self.tag:
+            return f"{indent}{self.text}"
+        return f"{indent}<{self.tag}{self.attrs}>{self.text}"
+
+
+class _CompactingParser(HTMLParser):
+    """
+    Однопроходный разбор страницы в компактное дерево.
+
+    Остаются интерактивные элементы, ориентиры (landmarks), заголовки и
+    элементы с локаторами (id, name, data-testid, role, aria-*); у них
+    сохраняются только атрибуты, полезные для построения селекторов.
+    Вложенность передаётся отступами, закрывающие теги не выводятся.
+    """
+
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        self.lines: List[_Line] = []
+        # Открытые элементы: (тег, строка, если элемент сохранён)
+        self._stack: List[Tuple[str, Optional[_Line]]] = []
+        self._depth = 0
+        self._skip_tag: Optional[str] = None
+        self._skip_nesting = 0
+
+    def handle_starttag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:
+        if self._skip_tag is not None:
+            if tag == self._skip_tag:
+                self._skip_nesting += 1
+            return
+        if tag in _SKIP_TAGS:
+            self._skip_tag = tag
+            self._skip_nesting = 1
+            return
+
+        if tag in _IMPLICIT_END_TAGS and self._stack and self._stack[-1][0] == tag:
+            self.handle_endtag(tag)
+
+        line = self._make_line(tag, dict(attrs))
+        if line is not None:
+            self.lines.append(line)
+        if tag in _VOID_TAGS:
+            return
+        self._stack.append((tag, line))
+        if line is not None:
+            self._depth += 1
+
+    def handle_startendtag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:
+        if self._skip_tag is not None or tag in _SKIP_TAGS:
+            return
+        line = self._make_line(tag, dict(attrs))
+        if line is not None:
+            self.lines.append(line)
+
+    def handle_endtag(self, tag: str) -> None:
+        if self._skip_tag is not None:
+            if tag == self._skip_tag:
+                self._skip_nesting -= 1
+                if not self._skip_nesting:
+                    self._skip_tag = None
+            return
+        # Незакрытые элементы (<p>, <li> ...) закрываются вместе с родителем
+        if not any(open_tag == tag for open_tag, _ in self._stack):
+            return
+        while self._stack:
+            open_tag, line = self._stack.pop()
+            if line is not None:
+                self._depth -= 1
+            if open_tag == tag:
+                break
+
+    def handle_data(self, data: str) -> None:
+        if self._skip_tag is not None:
+            return
+        text = _WS_RE.sub(" ", data).strip()
+        if not text:
+            return
+        if self._stack and self._stack[-1][1] is not None:
+            line = self._stack[-1][1]
+            if len(line.text) < _TEXT_LIMIT:
+                line.text = _clip(f"{line.text} {text}".strip(), _TEXT_LIMIT)
+            return
+        last = self.lines[-1] if self.lines else None
+        if last is not None and not last.tag and last.depth == self._depth:
+            # Соседние фрагменты текста (<p>текст <b>жирный</b></p>) — одна строка
+            if len(last.text) < _TEXT_LIMIT:
+                last.text = _clip(f"{last.text} {text}", _TEXT_LIMIT)
+            return
+        self.lines.append(_Line(self._depth, "", "", PRIORITY_TEXT, _clip(text, _TEXT_LIMIT)))
+
+    def _make_line(self, tag: str, attrs: Dict[str, Optional[str]]) -> Optional[_Line]:
+        has_locator = any(name in attrs for name in _LOCATOR_ATTRS) or any(
+            name.startswith("aria-") for name in attrs
+        )
+        if tag in _INTERACTIVE_TAGS:
+            priority = PRIORITY_INTERACTIVE
+        elif tag in _STRUCTURE_TAGS or has_locator:
+            priority = PRIORITY_STRUCTURE
+        else:
+            return None
+
+        parts = []
+        for name, value in attrs.items():
+            if name not in _KEEP_ATTRS and not name.startswith("aria-"):
+                continue
+            if value is None:
+                parts.append(f" {name}")
+            else:
+                value = _clip(_WS_RE.sub(" ", value).strip(), _ATTR_LIMIT).replace('"', "&quot;")
+                parts.append(f' {name}="{value}"')
+        return _Line(self._depth, tag, "".join(parts), priority)
+
+
+@lru_cache(maxsize=4)
+def _encoding(name: str):
+    try:
+        import tiktoken
+
+        return tiktoken.get_encoding(name)
+    except Exception as e:
+        # Файл словаря скачивается при первом использовании; без сети
+        # считаем токены по приближённой оценке
+        logger.warning(f"Токенизатор {name} недоступен, используется оценка по символам: {e}")
+        return None
+
+
+def count_tokens(text: str, encoding: Optional[str] = None) -> int:
+    """Количество токенов текста (tiktoken, HTML_TOKENIZER)."""
+    enc = _encoding(encoding or settings.HTML_TOKENIZER)
+    if enc is None:
+        return len(text) // 4 + 1
+    return len(enc.encode_ordinary(text))
+
+
+@dataclass(frozen=True)
+class ReducedPage:
+    """Компактное представление страницы для промптов."""
+
+    text: str
+    tokens: int
+    original_chars: int
+    elements: int
+    truncated: bool
+
+
+def _fit(lines: List[_Line], max_tokens: int) -> Tuple[List[str], int, bool]:
+    rendered = [line.render() for line in lines]
+    enc = _encoding(settings.HTML_TOKENIZER)
+    if enc is None:
+        costs = [len(r) // 4 + 1 for r in rendered]
+    else:
+        costs = [len(tokens) + 1 for tokens in enc.encode_ordinary_batch(rendered)]
+
+    total = sum(costs)
+    keep = [True] * len(lines)
+    # Сначала отбрасываем самые малоценные строки (текст, затем структуру),
+    # с конца страницы и только пока не уложимся в бюджет
+    for priority in (PRIORITY_TEXT, PRIORITY_STRUCTURE):
+        for i in range(len(lines) - 1, -1, -1):
+            if total <= max_tokens:
+                break
+            if keep[i] and lines[i].priority == priority:
+                keep[i] = False
+                total -= costs[i]
+
+    truncated = total > max_tokens or not all(keep)
+    result: List[str] = []
+    used = 0
+    for i, text in enumerate(rendered):
+        if not keep[i]:
+            continue
+        if used + costs[i] > max_tokens:
+            truncated = True
+            break
+        result.append(text)
+        used += costs[i]
+    return result, used, truncated
+
+
+# Последние сжатые страницы: ключ — хэш содержимого и бюджет, а не сам HTML
+_CACHE_SIZE = 32
+_cache: "OrderedDict[Tuple[str, int], ReducedPage]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _reduce(html: str, max_tokens: int) -> ReducedPage:
+    parser = _CompactingParser()
+    parser.feed(html)
+    parser.close()
+
+    lines, tokens, truncated = _fit(parser.lines, max_tokens)
+    return ReducedPage(
+        text="\n".join(lines),
+        tokens=tokens,
+        original_chars=len(html),
+        elements=len(lines),
+        truncated=truncated
+    )
+
+
+def reduce_html(html: str, max_tokens: Optional[int] = None) -> ReducedPage:
+    """
+    Сжимает HTML страницы под бюджет токенов.
+
+    Страница разбирается один раз; при превышении бюджета сначала
+    отбрасывается текст, затем структурные элементы, интерактивные
+    элементы удаляются последними. Результат кэшируется по содержимому
+    страницы, поэтому повторные вызовы для той же страницы бесплатны.
+
+    Args:
+        html: Исходный HTML
+        max_tokens: Бюджет токенов (по умолчанию HTML_MAX_TOKENS)
+
+    Returns:
+        Компактная страница
+    """
+    max_tokens = max_tokens or settings.HTML_MAX_TOKENS
+    key = (xxhash.xxh3_128_hexdigest(html.encode("utf-8", errors="surrogatepass")), max_tokens)
+    with _cache_lock:
+        page = _cache.get(key)
+        if page is not None:
+            _cache.move_to_end(key)
+    if page is None:
+        page = _reduce(html, max_tokens)
+        with _cache_lock:
+            _cache[key] = page
+            while len(_cache) > _CACHE_SIZE:
+                _cache.popitem(last=False)
+    logger.info(
+        f"HTML страницы сжат: {page.original_chars} символов -> {page.tokens} токенов"
+        f"{' (обрезан под бюджет)' if page.truncated else ''}"
+    )
+    return page
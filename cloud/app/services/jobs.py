@@ -0,0 +1,260 @@
+import asyncio
+import json
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from app.api.v1.endpoints.ws_manager import manager
+from app.core.config import settings
+from app.core.logger import logger
+from app.services.metrics import JOB_QUEUE_DEPTH
+
+# Статусы задачи
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+
+JOB_KINDS = ("ui", "api")
+
+
+@dataclass
+class JobInfo:
+    """Состояние задачи агента."""
+
+    job_id: str
+    kind: str
+    status: str = JOB_QUEUED
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    created_at: Optional[float] = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (JOB_COMPLETED, JOB_FAILED)
+
+
+async def run_agent_job(kind: str, payload: Dict[str, Any], job_id: str) -> Dict[str, Any]:
+    """
+    Выполняет прогон агента для задачи.
+
+    ID задачи используется как run ID прогона, поэтому по нему же доступны
+    рабочий каталог и архив с тестами.
+
+    Args:
+        kind: Тип агента ("ui" или "api")
+        payload: Тело исходного запроса
+        job_id: Идентификатор задачи
+
+    Returns:
+        Ответ агента в виде словаря
+    """
+    # Импорт здесь: сервис агентов тянет за собой клиентов LLM и БД
+    from app.schemas.agent_api import AgentAPIRequest
+    from app.schemas.agent_ui import AgentUIRequest
+    from app.services.agent_service import api_agent_init, ui_agent_init
+
+    if kind == "ui":
+        response = await ui_agent_init(AgentUIRequest(**payload), run_id=job_id)
+    elif kind == "api":
+        response = await api_agent_init(AgentAPIRequest(**payload), run_id=job_id)
+    else:
+        raise ValueError(f"Неизвестный тип агента: {kind}")
+    return response.model_dump()
+
+
+async def _notify(job: JobInfo) -> None:
+    await manager.publish(job.job_id, {"job": {"job_id": job.job_id, "kind": job.kind, "status": job.status}})
+
+
+class LocalJobBackend:
+    """
+    Очередь задач внутри процесса.
+
+    Задачи выполняются фиксированным числом asyncio-воркеров, поэтому
+    работает без брокера (локальная разработка, тесты). Завершённые задачи
+    хранятся JOB_RESULT_TTL секунд.
+    """
+
+    def __init__(self, workers: int, result_ttl: float) -> None:
+        self.workers = workers
+        self.result_ttl = result_ttl
+        self._jobs: Dict[str, JobInfo] = {}
+        self._payloads: Dict[str, Dict[str, Any]] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def start(self) -> None:
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        logger.info(f"Локальная очередь задач запущена (воркеров: {self.workers})")
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def submit(self, kind: str, payload: Dict[str, Any]) -> JobInfo:
+        await self.start()
+        self._prune()
+        job = JobInfo(job_id=uuid.uuid4().hex, kind=kind)
+        self._jobs[job.job_id] = job
+        self._payloads[job.job_id] = payload
+        await self._queue.put(job.job_id)
+        JOB_QUEUE_DEPTH.inc()
+        await _notify(job)
+        return job
+
+    async def get(self, job_id: str) -> Optional[JobInfo]:
+        return self._jobs.get(job_id)
+
+    def _prune(self) -> None:
+        now = time.time()
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.finished and now - job.finished_at > self.result_ttl
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    async def _worker(self) -> None:
+        while True:
+            job_id = await self._queue.get()
+            JOB_QUEUE_DEPTH.dec()
+            job = self._jobs.get(job_id)
+            payload = self._payloads.pop(job_id, None)
+            if job is None or payload is None:
+                continue
+
+            job.status = JOB_RUNNING
+            job.started_at = time.time()
+            await _notify(job)
+            try:
+                job.result = await run_agent_job(job.kind, payload, job.job_id)
+                job.status = JOB_COMPLETED
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Задача {job_id} завершилась с ошибкой: {str(e)}", exc_info=True)
+                job.error = str(e)
+                job.status = JOB_FAILED
+            finally:
+                job.finished_at = time.time()
+            await _notify(job)
+
+
+class CeleryJobBackend:
+    """
+    Очередь задач на Celery (брокер и хранилище результатов — redis).
+
+    Задачи выполняются отдельными процессами `celery -A app.worker worker`.
+    Рабочие каталоги (WORKSPACES_DIR) должны быть общими для API и воркеров.
+
+    Celery не отличает неизвестную задачу от ожидающей в очереди (обе в
+    состоянии PENDING), поэтому ID отправленных задач регистрируются в redis
+    хранилища результатов; неизвестный ID даёт None.
+    """
+
+    _KEY_PREFIX = "cloud_ai:job:"
+
+    _STATES = {
+        "PENDING": JOB_QUEUED,
+        "RECEIVED": JOB_QUEUED,
+        "RETRY": JOB_QUEUED,
+        "STARTED": JOB_RUNNING,
+        "SUCCESS": JOB_COMPLETED,
+        "FAILURE": JOB_FAILED,
+        "REVOKED": JOB_FAILED,
+    }
+
+    def __init__(self) -> None:
+        from app.worker import celery_app, run_agent_task
+
+        self._celery_app = celery_app
+        self._task = run_agent_task
+        self._redis = None
+
+    def _client(self):
+        if self._redis is None:
+            import redis.asyncio as redis
+
+            self._redis = redis.from_url(settings.CELERY_RESULT_BACKEND)
+        return self._redis
+
+    @property
+    def queue_depth(self) -> int:
+        # Глубина очереди брокера здесь недоступна без отдельного запроса к redis
+        return 0
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+
+    async def submit(self, kind: str, payload: Dict[str, Any]) -> JobInfo:
+        job = JobInfo(job_id=uuid.uuid4().hex, kind=kind)
+        # Запись живёт дольше результата: TTL продлевается, пока задача не завершена
+        await self._client().set(
+            self._KEY_PREFIX + job.job_id,
+            json.dumps({"kind": kind, "created_at": job.created_at}),
+            ex=int(settings.JOB_RESULT_TTL)
+        )
+        await asyncio.to_thread(
+            self._task.apply_async,
+            args=(kind, payload, job.job_id),
+            task_id=job.job_id
+        )
+        await _notify(job)
+        return job
+
+    async def get(self, job_id: str) -> Optional[JobInfo]:
+        from celery.result import AsyncResult
+
+        key = self._KEY_PREFIX + job_id
+        record = await self._client().get(key)
+        if record is None:
+            return None
+        submitted = json.loads(record)
+
+        def _read() -> JobInfo:
+            result = AsyncResult(job_id, app=self._celery_app)
+            status = self._STATES.get(result.state, JOB_QUEUED)
+            job = JobInfo(job_id=job_id, kind=submitted["kind"], status=status, created_at=submitted["created_at"])
+            if status == JOB_COMPLETED:
+                job.result = result.result
+            elif status == JOB_FAILED:
+                job.error = str(result.result)
+            if result.date_done is not None:
+                job.finished_at = result.date_done.timestamp()
+            return job
+
+        job = await asyncio.to_thread(_read)
+        if not job.finished:
+            await self._client().expire(key, int(settings.JOB_RESULT_TTL))
+        return job
+
+
+def create_job_backend():
+    """Создаёт очередь задач согласно настройке JOB_BACKEND."""
+    if settings.JOB_BACKEND == "celery":
+        return CeleryJobBackend()
+    if settings.JOB_BACKEND != "local":
+        raise ValueError(f"Неизвестная очередь задач: {settings.JOB_BACKEND}")
+    return LocalJobBackend(workers=settings.JOB_WORKERS, result_ttl=settings.JOB_RESULT_TTL)
+
+
+# Экземпляр очереди — глобальный для всего приложения
+job_backend = create_job_backend()
@@ -0,0 +1,239 @@
+import json
+from typing import Any, List, Optional, Tuple
+
+# Состояния парсера
+_VALUE = "value"            # ожидается значение
+_KEY_OR_END = "key_or_end"  # сразу после '{'
+_VALUE_OR_END = "value_or_end"  # сразу после '['
+_KEY = "key"                # после ',' в объекте
+_COLON = "colon"            # после ключа
+_COMMA_OR_END = "comma_or_end"  # после значения внутри контейнера
+_STRING = "string"
+_LITERAL = "literal"
+_DONE = "done"
+
+_WHITESPACE = " \t\r\n"
+_LITERAL_END = _WHITESPACE + ",}]"
+
+Path = Tuple[Any, ...]
+
+
+class IncrementalJSONParser:
+    """
+    Потоковый парсер JSON.
+
+    Принимает текст ответа модели кусками по мере поступления и собирает
+    итоговый объект без хранения исходной строки целиком. Каждое завершённое
+    скалярное значение возвращается из feed() вместе с путём до него, поэтому
+    файлы из directory_structure можно отдавать клиенту сразу, как только
+    их содержимое дописано.
+    """
+
+    def __init__(self) -> None:
+        self._state = _VALUE
+        self._stack: List[Any] = []
+        self._path: List[Any] = []
+        self._root: Any = None
+        self._buf: List[str] = []
+        self._is_key = False
+        self._escape = False
+
+    @property
+    def done(self) -> bool:
+        """Получен ли корневой объект полностью."""
+        return self._state == _DONE
+
+    def feed(self, chunk: str) -> List[Tuple[Path, Any]]:
+        """
+        Обрабатывает очередной кусок текста.
+
+        Args:
+            chunk: Фрагмент JSON
+
+        Returns:
+            Список завершённых скалярных значений в виде (путь, значение)
+        """
+        completed: List[Tuple[Path, Any]] = []
+        i = 0
+        n = len(chunk)
+
+        while i < n:
+            state = self._state
+
+            if state == _STRING:
+                i = self._consume_string(chunk, i, completed)
+                continue
+
+            if state == _LITERAL:
+                j = i
+                while j < n and chunk[j] not in _LITERAL_END:
+                    j += 1
+                self._buf.append(chunk[i:j])
+                if j == n:
+                    return completed
+                self._finish_value(json.loads("".join(self._buf)), completed)
+                self._buf = []
+                i = j
+                continue
+
+            char = chunk[i]
+            i += 1
+            if char in _WHITESPACE:
+                continue
+
+            if state == _DONE:
+                # Хвост после корневого объекта (например, закрывающий ```) игнорируем
+                continue
+
+            if not self._stack and self._root is None and char not in "{[":
+                # Мусор перед корневым объектом (например, ```json) пропускаем
+                continue
+
+            if state == _VALUE or state == _VALUE_OR_END:
+                if state == _VALUE_OR_END and char == "]":
+                    self._close_container()
+                elif char == "{":
+                    self._open_container({})
+                    self._state = _KEY_OR_END
+                elif char == "[":
+                    self._open_container([])
+                    self._state = _VALUE_OR_END
+                elif char == '"':
+                    self._start_string(is_key=False)
+                elif char in "-0123456789tfn":
+                    self._buf = [char]
+                    self._state = _LITERAL
+                else:
+                    raise ValueError(f"Неожиданный символ в JSON: {char!r}")
+
+            elif state == _KEY_OR_END or state == _KEY:
+                if state == _KEY_OR_END and char == "}":
+                    self._close_container()
+                elif char == '"':
+                    self._start_string(is_key=True)
+                else:
+                    raise ValueError(f"Ожидался ключ объекта, получено: {char!r}")
+
+            elif state == _COLON:
+                if char != ":":
+                    raise ValueError(f"Ожидалось ':', получено: {char!r}")
+                self._state = _VALUE
+
+            elif state == _COMMA_OR_END:
+                container = self._stack[-1]
+                if char == ",":
+                    self._state = _KEY if isinstance(container, dict) else _VALUE
+                elif char == "}" and isinstance(container, dict):
+                    self._close_container()
+                elif char == "]" and isinstance(container, list):
+                    self._close_container()
+                else:
+                    raise ValueError(f"Ожидалось ',' или конец контейнера, получено: {char!r}")
+
+        return completed
+
+    def close(self) -> Any:
+        """
+        Завершает разбор.
+
+        Returns:
+            Полностью собранный объект
+
+        Raises:
+            ValueError: Если JSON оборван
+        """
+        if self._state != _DONE:
+            raise ValueError("JSON оборван: ответ модели получен не полностью")
+        return self._root
+
+    def _consume_string(self, chunk: str, i: int, completed: List[Tuple[Path, Any]]) -> int:
+        n = len(chunk)
+        if self._escape:
+            self._buf.append(chunk[i])
+            self._escape = False
+            i += 1
+        while i < n:
+            quote = chunk.find('"', i)
+            backslash = chunk.find("\\", i)
+            if backslash != -1 and (quote == -1 or backslash < quote):
+                self._buf.append(chunk[i:backslash + 2])
+                if backslash + 1 >= n:
+                    self._escape = True
+                i = backslash + 2
+                continue
+            if quote == -1:
+                self._buf.append(chunk[i:])
+                return n
+            self._buf.append(chunk[i:quote])
+            # Декодирование escape-последовательностей отдаём json.loads
+            value = json.loads('"' + "".join(self._buf) + '"')
+            self._buf = []
+            if self._is_key:
+                self._path.append(value)
+                self._state = _COLON
+            else:
+                self._finish_value(value, completed)
+            return quote + 1
+        return i
+
+    def _start_string(self, is_key: bool) -> None:
+        self._buf = []
+        self._is_key = is_key
+        self._escape = False
+        self._state = _STRING
+
+    def _open_container(self, container: Any) -> None:
+        self._attach(container)
+        self._stack.append(container)
+        if isinstance(container, list):
+            self._path.append(0)
+
+    def _close_container(self) -> None:
+        container = self._stack.pop()
+        if isinstance(container, list):
+            self._path.pop()
+        self._after_value()
+
+    def _attach(self, value: Any) -> None:
+        if not self._stack:
+            self._root = value
+            return
+        parent = self._stack[-1]
+        if isinstance(parent, dict):
+            parent[self._path[-1]] = value
+        else:
+            parent.append(value)
+
+    def _finish_value(self, value: Any, completed: List[Tuple[Path, Any]]) -> None:
+        self._attach(value)
+        completed.append((tuple(self._path), value))
+        self._after_value()
+
+    def _after_value(self) -> None:
+        if not self._stack:
+            self._state = _DONE
+            return
+        parent = self._stack[-1]
+        if isinstance(parent, dict):
+            self._path.pop()
+        else:
+            self._path[-1] += 1
+        self._state = _COMMA_OR_END
+
+
+def directory_file_path(path: Path, prefix: str = "directory_structure") -> Optional[str]:
+    """
+    Преобразует путь значения внутри directory_structure в путь файла.
+
+    Args:
+        path: Путь значения, возвращённый IncrementalJSONParser.feed()
+        prefix: Корневой ключ структуры каталогов
+
+    Returns:
+        Относительный путь файла или None, если значение не является файлом
+    """
+    if len(path) < 2 or path[0] != prefix:
+        return None
+    if not all(isinstance(part, str) for part in path[1:]):
+        return None
+    return "/".join(part.strip("/") for part in path[1:])
@@ -0,0 +1,172 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Optional
+
+import xxhash
+import zstandard
+
+from app.core.config import settings
+from app.core.logger import logger
+
+# Параметры вызова, не влияющие на ответ модели
+_IGNORED_PARAMS = {"timeout", "stream", "stream_options", "extra_headers"}
+
+# Температура по умолчанию у OpenAI-совместимых API
+_DEFAULT_TEMPERATURE = 1.0
+
+
+@dataclass
+class LLMCacheStats:
+    """Счётчики кэша ответов LLM."""
+
+    hits: int = 0
+    misses: int = 0
+    bypassed: int = 0
+    stores: int = 0
+    evictions: int = 0
+    entries: int = 0
+    size_bytes: int = 0
+
+
+class LLMResponseCache:
+    """
+    Кэш ответов LLM на диске с адресацией по содержимому.
+
+    Ключ — xxh3_128 от канонического JSON запроса (модель, сообщения,
+    параметры сэмплирования). Ответы хранятся сжатыми zstd, при превышении
+    max_bytes удаляются давно не использованные записи (LRU). По умолчанию
+    кэшируются только детерминированные запросы (temperature не выше
+    max_temperature).
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int, max_temperature: float) -> None:
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.max_temperature = max_temperature
+        self._index: "OrderedDict[str, int]" = OrderedDict()
+        self._size = 0
+        self._stats = LLMCacheStats()
+        self._lock = threading.Lock()
+        self._loaded = False
+
+    @staticmethod
+    def key(params: Dict[str, Any]) -> str:
+        """Стабильный ключ запроса."""
+        significant = {k: v for k, v in params.items() if k not in _IGNORED_PARAMS}
+        canonical = json.dumps(significant, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+        return xxhash.xxh3_128_hexdigest(canonical.encode("utf-8"))
+
+    def should_cache(self, params: Dict[str, Any], cache: Optional[bool] = None) -> bool:
+        """
+        Решает, использовать ли кэш для запроса.
+
+        Args:
+            params: Параметры chat.completions.create
+            cache: True/False — явное включение/отключение, None — по температуре
+        """
+        if cache is not None:
+            return cache
+        return params.get("temperature", _DEFAULT_TEMPERATURE) <= self.max_temperature
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.zst")
+
+    def _ensure_loaded(self) -> None:
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            entries = []
+            if os.path.isdir(self.cache_dir):
+                for root, _, files in os.walk(self.cache_dir):
+                    for name in files:
+                        if not name.endswith(".zst"):
+                            continue
+                        try:
+                            stat = os.stat(os.path.join(root, name))
+                        except OSError:
+                            continue
+                        entries.append((stat.st_mtime, name[:-len(".zst")], stat.st_size))
+            for _, key, size in sorted(entries):
+                self._index[key] = size
+                self._size += size
+            self._loaded = True
+
+    def get(self, key: str) -> Optional[str]:
+        """Текст ответа из кэша или None."""
+        self._ensure_loaded()
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = json.loads(zstandard.ZstdDecompressor().decompress(f.read()))
+            os.utime(path)
+        except (OSError, ValueError, zstandard.ZstdError):
+            with self._lock:
+                self._stats.misses += 1
+            return None
+
+        with self._lock:
+            self._stats.hits += 1
+            if key in self._index:
+                self._index.move_to_end(key)
+        return data["content"]
+
+    def put(self, key: str, content: str, model: Optional[str] = None) -> None:
+        """Сохраняет текст ответа и вытесняет старые записи сверх квоты."""
+        self._ensure_loaded()
+        blob = zstandard.ZstdCompressor().compress(
+            json.dumps({"model": model, "content": content, "created": time.time()}, ensure_ascii=False).encode("utf-8")
+        )
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(blob)
+        os.replace(tmp_path, path)
+
+        evicted = []
+        with self._lock:
+            self._size += len(blob) - self._index.pop(key, 0)
+            self._index[key] = len(blob)
+            self._stats.stores += 1
+            while self._size > self.max_bytes and len(self._index) > 1:
+                old_key, old_size = self._index.popitem(last=False)
+                self._size -= old_size
+                self._stats.evictions += 1
+                evicted.append(old_key)
+
+        for old_key in evicted:
+            try:
+                os.remove(self._path(old_key))
+            except OSError:
+                pass
+
+    def record_bypass(self) -> None:
+        with self._lock:
+            self._stats.bypassed += 1
+
+    def stats(self) -> LLMCacheStats:
+        self._ensure_loaded()
+        with self._lock:
+            return LLMCacheStats(**{
+                **asdict(self._stats),
+                "entries": len(self._index),
+                "size_bytes": self._size
+            })
+
+
+def create_llm_cache() -> Optional[LLMResponseCache]:
+    """Создаёт кэш ответов LLM согласно настройкам (None, если выключен)."""
+    if not settings.LLM_CACHE_ENABLED:
+        return None
+    logger.info(f"Кэш ответов LLM: {settings.LLM_CACHE_DIR}")
+    return LLMResponseCache(
+        cache_dir=settings.LLM_CACHE_DIR,
+        max_bytes=settings.LLM_CACHE_MAX_MB * 1024 * 1024,
+        max_temperature=settings.LLM_CACHE_MAX_TEMPERATURE
+    )
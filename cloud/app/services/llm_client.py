@@ -0,0 +1,271 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, Optional
+
+from openai.types.chat import ChatCompletion
+
+from app.core.config import settings
+from app.core.logger import logger
+from app.services.llm_cache import LLMResponseCache, create_llm_cache
+from app.services.llm_provider import PROVIDER_OPENAI, LLMProvider, create_llm_provider
+from app.services.metrics import LLM_REQUEST_DURATION, LLM_REQUESTS, record_llm_usage
+from app.services.tracing import KIND_CLIENT, Span, tracer
+
+
+def _cached_completion(params: Dict[str, Any], key: str, content: str) -> ChatCompletion:
+    """Ответ в формате chat.completions.create, восстановленный из кэша."""
+    return ChatCompletion.model_validate({
+        "id": f"cache-{key}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": params.get("model", ""),
+        "choices": [{
+            "index": 0,
+            "finish_reason": "stop",
+            "message": {"role": "assistant", "content": content}
+        }]
+    })
+
+
+@dataclass
+class PendingCacheEntry:
+    """
+    Ответ, ожидающий подтверждения перед записью в кэш.
+
+    Вызывающий код передаёт его в chat_completion()/stream_chat_completion()
+    и, убедившись, что ответ разобрался, вызывает LLMClient.confirm_cache().
+    """
+
+    key: Optional[str] = None
+    content: Optional[str] = None
+    model: Optional[str] = None
+
+
+def _usage_attributes(span: Optional[Span], usage: Any) -> None:
+    if span is None or usage is None:
+        return
+    span.set_attribute("tokens_in", getattr(usage, "prompt_tokens", None))
+    span.set_attribute("tokens_out", getattr(usage, "completion_tokens", None))
+
+
+class LLMClient:
+    """
+    Асинхронный клиент LLM для агентов.
+
+    Один экземпляр живёт всё время работы приложения. Запросы выполняет
+    провайдер (OpenAI-совместимый API, запись или воспроизведение ответов,
+    см. app.services.llm_provider), а число одновременных запросов к модели
+    ограничено семафором, чтобы один долгий прогон не занимал весь пул.
+    Если передан cache, ответы на повторяющиеся запросы берутся из него.
+    Длительность запросов и токены из usage учитываются в метриках; при
+    stream_usage потоковые запросы просят usage в последнем фрагменте.
+    """
+
+    def __init__(
+            self,
+            provider: LLMProvider,
+            max_concurrency: int = 32,
+            timeout: float = 600.0,
+            cache: Optional[LLMResponseCache] = None,
+            stream_usage: bool = True
+    ) -> None:
+        self.provider = provider
+        self.timeout = timeout
+        self.cache = cache
+        self.stream_usage = stream_usage
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    @asynccontextmanager
+    async def _acquire(self, span: Optional[Span]) -> AsyncIterator[None]:
+        # Время ожидания слота семафора — отдельно от времени самого запроса
+        waited = time.perf_counter()
+        async with self._semaphore:
+            if span is not None:
+                span.set_attribute("queue_wait_ms", round((time.perf_counter() - waited) * 1000, 1))
+            yield
+
+    def _cache_key(self, params: Dict[str, Any], cache: Optional[bool]) -> Optional[str]:
+        if self.cache is None:
+            return None
+        if not self.cache.should_cache(params, cache):
+            self.cache.record_bypass()
+            return None
+        return self.cache.key(params)
+
+    async def chat_completion(
+            self,
+            timeout: Optional[float] = None,
+            cache: Optional[bool] = None,
+            pending: Optional[PendingCacheEntry] = None,
+            **params: Any
+    ) -> Any:
+        """
+        Выполняет запрос chat.completions.create, не блокируя event loop.
+
+        В кэш попадают только ответы, завершённые моделью (finish_reason
+        "stop"), а не обрезанные по max_tokens.
+
+        Args:
+            timeout: Таймаут конкретного вызова в секундах (по умолчанию — общий)
+            cache: False — не использовать кэш ответов, True — использовать
+                независимо от температуры, None — по настройкам кэша
+            pending: Не писать ответ в кэш сразу, а заполнить pending;
+                запись — после confirm_cache()
+            **params: Параметры chat.completions.create (model, messages, ...)
+
+        Returns:
+            Ответ модели
+        """
+        model = params.get("model", "unknown")
+        with tracer.span("llm.chat_completion", kind=KIND_CLIENT, model=model, streaming=False) as span:
+            key = self._cache_key(params, cache)
+            if key is not None:
+                content = await asyncio.to_thread(self.cache.get, key)
+                if content is not None:
+                    LLM_REQUESTS.labels(model, "cache_hit").inc()
+                    if span is not None:
+                        span.set_attribute("cache_hit", True)
+                    return _cached_completion(params, key, content)
+
+            started = time.perf_counter()
+            try:
+                async with self._acquire(span):
+                    response = await self.provider.complete(timeout or self.timeout, **params)
+            except Exception:
+                LLM_REQUESTS.labels(model, "error").inc()
+                raise
+            LLM_REQUEST_DURATION.labels(model, "false").observe(time.perf_counter() - started)
+            LLM_REQUESTS.labels(model, "ok").inc()
+            usage = getattr(response, "usage", None)
+            record_llm_usage(model, usage)
+            _usage_attributes(span, usage)
+
+        if key is not None and response.choices and response.choices[0].finish_reason == "stop":
+            await self._store(key, response.choices[0].message.content, params.get("model"), pending)
+        return response
+
+    async def stream_chat_completion(
+            self,
+            timeout: Optional[float] = None,
+            cache: Optional[bool] = None,
+            pending: Optional[PendingCacheEntry] = None,
+            **params: Any
+    ) -> AsyncIterator[str]:
+        """
+        Выполняет потоковый запрос chat.completions.create.
+
+        Ответ из кэша отдаётся одним фрагментом; потоковый ответ, завершённый
+        моделью (finish_reason "stop"), сохраняется в кэш.
+
+        Args:
+            timeout: Таймаут конкретного вызова в секундах (по умолчанию — общий)
+            cache: См. chat_completion()
+            pending: См. chat_completion(): ответ разбирает вызывающий код,
+                поэтому в кэш он пишется только после confirm_cache()
+            **params: Параметры chat.completions.create (model, messages, ...)
+
+        Yields:
+            Фрагменты текста ответа по мере генерации
+        """
+        model = params.get("model", "unknown")
+        key = self._cache_key(params, cache)
+        if key is not None:
+            content = await asyncio.to_thread(self.cache.get, key)
+            if content is not None:
+                LLM_REQUESTS.labels(model, "cache_hit").inc()
+                yield content
+                return
+
+        if self.stream_usage and "stream_options" not in params:
+            params = {**params, "stream_options": {"include_usage": True}}
+
+        parts = []
+        finish_reason = None
+        started = time.perf_counter()
+        with tracer.span(
+                "llm.stream_chat_completion",
+                kind=KIND_CLIENT,
+                activate=False,
+                model=model,
+                streaming=True
+        ) as span:
+            try:
+                async with self._acquire(span):
+                    first_chunk = True
+                    async for chunk in self.provider.stream(timeout or self.timeout, **params):
+                        if first_chunk and span is not None:
+                            span.add_event("first_chunk")
+                        first_chunk = False
+                        # usage приходит в последнем фрагменте без choices
+                        usage = getattr(chunk, "usage", None)
+                        record_llm_usage(model, usage)
+                        _usage_attributes(span, usage)
+                        if not chunk.choices:
+                            continue
+                        finish_reason = chunk.choices[0].finish_reason or finish_reason
+                        delta = chunk.choices[0].delta.content
+                        if delta:
+                            if key is not None:
+                                parts.append(delta)
+                            yield delta
+            except Exception:
+                LLM_REQUESTS.labels(model, "error").inc()
+                raise
+        LLM_REQUEST_DURATION.labels(model, "true").observe(time.perf_counter() - started)
+        LLM_REQUESTS.labels(model, "ok").inc()
+
+        if key is not None and finish_reason == "stop":
+            await self._store(key, "".join(parts), params.get("model"), pending)
+
+    async def _store(self, key: str, content: Optional[str], model: Optional[str], pending: Optional[PendingCacheEntry]) -> None:
+        if content is None:
+            return
+        if pending is not None:
+            pending.key, pending.content, pending.model = key, content, model
+            return
+        await asyncio.to_thread(self.cache.put, key, content, model)
+
+    async def confirm_cache(self, pending: PendingCacheEntry) -> None:
+        """Записывает в кэш ответ, который вызывающий код успешно разобрал."""
+        if self.cache is not None and pending.key is not None and pending.content is not None:
+            await asyncio.to_thread(self.cache.put, pending.key, pending.content, pending.model)
+
+    async def aclose(self) -> None:
+        """Закрывает провайдера (пул HTTP-соединений)."""
+        await self.provider.aclose()
+
+
+_llm_client: Optional[LLMClient] = None
+
+
+def init_llm_client() -> LLMClient:
+    """Создаёт общий клиент LLM (вызывается из lifespan приложения)."""
+    global _llm_client
+    if _llm_client is None:
+        _llm_client = LLMClient(
+            provider=create_llm_provider(),
+            max_concurrency=settings.LLM_MAX_CONCURRENCY,
+            timeout=settings.LLM_TIMEOUT,
+            # При записи и воспроизведении кэш не нужен: каждый запрос
+            # должен дойти до провайдера
+            cache=create_llm_cache() if settings.LLM_PROVIDER == PROVIDER_OPENAI else None,
+            stream_usage=settings.LLM_STREAM_USAGE
+        )
+        logger.info(f"Клиент LLM инициализирован (одновременных запросов: {settings.LLM_MAX_CONCURRENCY})")
+    return _llm_client
+
+
+def get_llm_client() -> LLMClient:
+    """Возвращает общий клиент LLM, создавая его при первом обращении."""
+    return _llm_client or init_llm_client()
+
+
+async def close_llm_client() -> None:
+    """Закрывает общий клиент LLM (вызывается при остановке приложения)."""
+    global _llm_client
+    if _llm_client is not None:
+        await _llm_client.aclose()
+        _llm_client = None
+        logger.info("Клиент LLM закрыт")
@@ -0,0 +1,334 @@
+"""
+Провайдеры LLM: источник ответов для LLMClient.
+
+LLMClient отвечает за кэш, семафор, метрики и трассировку, а сам запрос
+chat.completions.create выполняет провайдер:
+
+  - OpenAIProvider — OpenAI-совместимый API foundation models;
+  - RecordingProvider — запросы идут в OpenAIProvider, пары
+    запрос/ответ (в т.ч. фрагменты потока с временем их прихода)
+    сохраняются в RecordingStore;
+  - ReplayProvider — ответы берутся только из записей, без сети; время
+    ответа может воспроизводиться (speed).
+
+Запись и воспроизведение позволяют прогонять реальные сессии агентов
+повторно и профилировать остальной конвейер (разбор ответа, запись
+файлов, pytest, рассылку в сокет) без обращений к модели.
+"""
+import asyncio
+import json
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from dataclasses import asdict, dataclass, field
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import httpx
+import zstandard
+from openai import AsyncOpenAI
+from openai.types.chat import ChatCompletion, ChatCompletionChunk
+
+from app.core.config import settings
+from app.core.logger import logger
+from app.services.llm_cache import LLMResponseCache
+
+PROVIDER_OPENAI = "openai"
+PROVIDER_RECORD = "record"
+PROVIDER_REPLAY = "replay"
+
+
+class LLMReplayMissError(LookupError):
+    """В записях нет ответа на запрос (режим воспроизведения)."""
+
+
+class LLMProvider(ABC):
+    """Выполняет запросы chat.completions.create."""
+
+    @abstractmethod
+    async def complete(self, timeout: float, **params: Any) -> ChatCompletion:
+        """Обычный запрос: ответ целиком."""
+
+    @abstractmethod
+    def stream(self, timeout: float, **params: Any) -> AsyncIterator[ChatCompletionChunk]:
+        """Потоковый запрос: фрагменты ответа по мере генерации."""
+
+    async def aclose(self) -> None:
+        """Освобождает ресурсы провайдера."""
+
+
+class OpenAIProvider(LLMProvider):
+    """
+    OpenAI-совместимый API.
+
+    HTTP-соединения переиспользуются из общего пула на всё время работы
+    приложения.
+    """
+
+    def __init__(
+            self,
+            api_key: str,
+            base_url: str,
+            max_connections: int = 100,
+            max_keepalive_connections: int = 20,
+            timeout: float = 600.0,
+            connect_timeout: float = 10.0,
+            max_retries: int = 2
+    ) -> None:
+        self._http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections
+            ),
+            timeout=httpx.Timeout(timeout, connect=connect_timeout)
+        )
+        self._client = AsyncOpenAI(
+            api_key=api_key,
+            base_url=base_url,
+            http_client=self._http_client,
+            max_retries=max_retries
+        )
+
+    async def complete(self, timeout: float, **params: Any) -> ChatCompletion:
+        return await self._client.chat.completions.create(timeout=timeout, **params)
+
+    async def stream(self, timeout: float, **params: Any) -> AsyncIterator[ChatCompletionChunk]:
+        stream = await self._client.chat.completions.create(timeout=timeout, stream=True, **params)
+        async for chunk in stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        """Закрывает пул HTTP-соединений."""
+        await self._client.close()
+        await self._http_client.aclose()
+
+
+@dataclass
+class Recording:
+    """Записанный ответ модели на запрос."""
+
+    key: str
+    model: Optional[str]
+    streaming: bool
+    created_at: float = field(default_factory=time.time)
+    # Время до полного ответа, с
+    duration: float = 0.0
+    # Обычный ответ: ChatCompletion в виде словаря
+    response: Optional[Dict[str, Any]] = None
+    # Поток: [[смещение от начала запроса в секундах, ChatCompletionChunk], ...]
+    chunks: List[List[Any]] = field(default_factory=list)
+
+
+class RecordingStore:
+    """
+    Записи ответов модели на диске.
+
+    Ключ — хэш запроса (как у кэша ответов LLM: модель, сообщения,
+    параметры сэмплирования). На один ключ может быть несколько записей:
+    повторный одинаковый запрос в сессии воспроизводится следующей по
+    порядку записью. Записи хранятся как JSON, сжатый zstd.
+    """
+
+    def __init__(self, root: str, zstd_level: int = 3) -> None:
+        self.root = root
+        self.zstd_level = zstd_level
+        self._lock = threading.Lock()
+
+    def _path(self, key: str, n: int) -> str:
+        return os.path.join(self.root, key[:2], f"{key}.{n}.json.zst")
+
+    def count(self, key: str) -> int:
+        n = 0
+        while os.path.exists(self._path(key, n)):
+            n += 1
+        return n
+
+    def save(self, recording: Recording) -> str:
+        data = json.dumps(asdict(recording), ensure_ascii=False).encode("utf-8")
+        compressed = zstandard.ZstdCompressor(level=self.zstd_level).compress(data)
+        with self._lock:
+            path = self._path(recording.key, self.count(recording.key))
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(compressed)
+            os.replace(tmp_path, path)
+        return path
+
+    def load(self, key: str, n: int) -> Optional[Recording]:
+        try:
+            with open(self._path(key, n), "rb") as f:
+                data = json.loads(zstandard.ZstdDecompressor().decompress(f.read()))
+        except FileNotFoundError:
+            return None
+        return Recording(**data)
+
+
+class RecordingProvider(LLMProvider):
+    """Передаёт запросы другому провайдеру и записывает ответы."""
+
+    def __init__(self, inner: LLMProvider, store: RecordingStore) -> None:
+        self.inner = inner
+        self.store = store
+
+    async def complete(self, timeout: float, **params: Any) -> ChatCompletion:
+        started = time.perf_counter()
+        response = await self.inner.complete(timeout, **params)
+        recording = Recording(
+            key=LLMResponseCache.key(params),
+            model=params.get("model"),
+            streaming=False,
+            duration=time.perf_counter() - started,
+            response=response.model_dump(mode="json")
+        )
+        await asyncio.to_thread(self._save, recording)
+        return response
+
+    async def stream(self, timeout: float, **params: Any) -> AsyncIterator[ChatCompletionChunk]:
+        started = time.perf_counter()
+        chunks: List[List[Any]] = []
+        async for chunk in self.inner.stream(timeout, **params):
+            chunks.append([round(time.perf_counter() - started, 6), chunk.model_dump(mode="json")])
+            yield chunk
+        # Оборванный поток не записывается: при воспроизведении он был бы неполным
+        recording = Recording(
+            key=LLMResponseCache.key(params),
+            model=params.get("model"),
+            streaming=True,
+            duration=time.perf_counter() - started,
+            chunks=chunks
+        )
+        await asyncio.to_thread(self._save, recording)
+
+    def _save(self, recording: Recording) -> None:
+        try:
+            path = self.store.save(recording)
+            logger.debug(f"Ответ LLM записан: {path}")
+        except OSError as e:
+            logger.error(f"Не удалось записать ответ LLM {recording.key}: {e}")
+
+    async def aclose(self) -> None:
+        await self.inner.aclose()
+
+
+def _completion_from_chunks(recording: Recording) -> ChatCompletion:
+    """Ответ целиком, собранный из записанного потока."""
+    content = []
+    usage = None
+    finish_reason = "stop"
+    for _, chunk in recording.chunks:
+        if chunk.get("usage"):
+            usage = chunk["usage"]
+        for choice in chunk.get("choices") or []:
+            content.append((choice.get("delta") or {}).get("content") or "")
+            finish_reason = choice.get("finish_reason") or finish_reason
+    first = recording.chunks[0][1] if recording.chunks else {}
+    return ChatCompletion.model_validate({
+        "id": first.get("id", f"replay-{recording.key}"),
+        "object": "chat.completion",
+        "created": first.get("created", int(recording.created_at)),
+        "model": recording.model or "",
+        "choices": [{
+            "index": 0,
+            "finish_reason": finish_reason,
+            "message": {"role": "assistant", "content": "".join(content)}
+        }],
+        "usage": usage
+    })
+
+
+def _chunks_from_completion(recording: Recording) -> List[List[Any]]:
+    """Поток из одного фрагмента, собранный из записанного обычного ответа."""
+    response = recording.response or {}
+    choice = (response.get("choices") or [{}])[0]
+    chunk = {
+        "id": response.get("id", f"replay-{recording.key}"),
+        "object": "chat.completion.chunk",
+        "created": response.get("created", int(recording.created_at)),
+        "model": response.get("model", recording.model or ""),
+        "choices": [{
+            "index": 0,
+            "delta": {"role": "assistant", "content": (choice.get("message") or {}).get("content")},
+            "finish_reason": choice.get("finish_reason", "stop")
+        }],
+        "usage": response.get("usage")
+    }
+    return [[recording.duration, chunk]]
+
+
+class ReplayProvider(LLMProvider):
+    """
+    Отвечает записанными ответами, без обращений к сети.
+
+    Args:
+        store: Записи ответов
+        speed: 0 — без задержек; 1 — с исходным временем ответа и
+            интервалами между фрагментами потока; 2 — вдвое быстрее и т.д.
+    """
+
+    def __init__(self, store: RecordingStore, speed: float = 0.0) -> None:
+        self.store = store
+        self.speed = speed
+        self._served: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def _next(self, params: Dict[str, Any]) -> Recording:
+        key = LLMResponseCache.key(params)
+        with self._lock:
+            n = self._served.get(key, 0)
+            self._served[key] = n + 1
+        recording = self.store.load(key, n)
+        if recording is None and n > 0:
+            # Запрос повторяется чаще, чем при записи: отдаём последнюю запись
+            recording = self.store.load(key, self.store.count(key) - 1)
+        if recording is None:
+            raise LLMReplayMissError(
+                f"Нет записанного ответа на запрос к {params.get('model')} (ключ {key}) в {self.store.root}"
+            )
+        return recording
+
+    async def _wait_until(self, started: float, offset: float) -> None:
+        if self.speed <= 0:
+            return
+        delay = started + offset / self.speed - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def complete(self, timeout: float, **params: Any) -> ChatCompletion:
+        started = time.perf_counter()
+        recording = await asyncio.to_thread(self._next, params)
+        await self._wait_until(started, recording.duration)
+        if recording.streaming:
+            return _completion_from_chunks(recording)
+        return ChatCompletion.model_validate(recording.response)
+
+    async def stream(self, timeout: float, **params: Any) -> AsyncIterator[ChatCompletionChunk]:
+        started = time.perf_counter()
+        recording = await asyncio.to_thread(self._next, params)
+        chunks = recording.chunks if recording.streaming else _chunks_from_completion(recording)
+        for offset, chunk in chunks:
+            await self._wait_until(started, offset)
+            yield ChatCompletionChunk.model_validate(chunk)
+
+
+def create_llm_provider() -> LLMProvider:
+    """Создаёт провайдера LLM согласно настройкам (LLM_PROVIDER)."""
+    if settings.LLM_PROVIDER == PROVIDER_REPLAY:
+        logger.info(f"LLM: воспроизведение записей из {settings.LLM_RECORDINGS_DIR} (скорость {settings.LLM_REPLAY_SPEED})")
+        return ReplayProvider(RecordingStore(settings.LLM_RECORDINGS_DIR), speed=settings.LLM_REPLAY_SPEED)
+
+    provider = OpenAIProvider(
+        api_key=settings.LLM_API_KEY,
+        base_url=settings.LLM_BASE_URL,
+        max_connections=settings.LLM_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.LLM_MAX_KEEPALIVE_CONNECTIONS,
+        timeout=settings.LLM_TIMEOUT,
+        connect_timeout=settings.LLM_CONNECT_TIMEOUT,
+        max_retries=settings.LLM_MAX_RETRIES
+    )
+    if settings.LLM_PROVIDER == PROVIDER_RECORD:
+        logger.info(f"LLM: запись ответов в {settings.LLM_RECORDINGS_DIR}")
+        return RecordingProvider(provider, RecordingStore(settings.LLM_RECORDINGS_DIR))
+    if settings.LLM_PROVIDER != PROVIDER_OPENAI:
+        raise ValueError(f"Неизвестный провайдер LLM: {settings.LLM_PROVIDER}")
+    return provider
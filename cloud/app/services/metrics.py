@@ -0,0 +1,261 @@
+"""
+Метрики Prometheus конвейера агентов.
+
+В режиме нескольких процессов (uvicorn --workers, воркеры Celery) задайте
+переменную окружения PROMETHEUS_MULTIPROC_DIR — общий пустой каталог,
+очищаемый перед запуском. Тогда каждый процесс пишет значения в свои
+файлы, а /metrics собирает их со всех процессов.
+
+Этапы и прогоны, замеряемые здесь, одновременно пишутся спанами в трассу
+прогона (см. app.services.tracing).
+"""
+import asyncio
+import functools
+import os
+import time
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterator, Optional, Tuple, TypeVar
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    REGISTRY,
+    generate_latest,
+)
+
+from app.core.logger import bind_run_id, reset_run_id
+from app.services.tracing import tracer
+
+_NAMESPACE = "cloud_ai"
+
+# Тип агента текущего прогона: метка этапов, вызванных внутри прогона
+_current_agent: ContextVar[str] = ContextVar("cloud_ai_agent", default="unknown")
+
+_F = TypeVar("_F", bound=Callable[..., Awaitable[Any]])
+
+# Этапы занимают от долей секунды (страница) до десятков минут (генерация кода)
+_STAGE_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1200, 1800, float("inf"))
+_DB_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, float("inf"))
+
+STAGE_DURATION = Histogram(
+    "stage_duration_seconds",
+    "Длительность этапов конвейера агентов",
+    ["agent", "stage"],
+    namespace=_NAMESPACE,
+    buckets=_STAGE_BUCKETS
+)
+STAGE_ERRORS = Counter(
+    "stage_errors_total",
+    "Этапы конвейера, завершившиеся исключением",
+    ["agent", "stage"],
+    namespace=_NAMESPACE
+)
+RUNS = Counter(
+    "runs_total",
+    "Завершённые прогоны агентов",
+    ["agent", "outcome"],
+    namespace=_NAMESPACE
+)
+ACTIVE_RUNS = Gauge(
+    "active_runs",
+    "Выполняющиеся прогоны агентов",
+    ["agent"],
+    namespace=_NAMESPACE,
+    multiprocess_mode="livesum"
+)
+REPAIR_ITERATIONS = Histogram(
+    "repair_iterations",
+    "Попыток проверки и исправления на прогон",
+    ["agent", "outcome"],
+    namespace=_NAMESPACE,
+    buckets=(1, 2, 3, 4, 5, 6, 8, 10, float("inf"))
+)
+
+LLM_REQUESTS = Counter(
+    "llm_requests_total",
+    "Запросы к LLM",
+    ["model", "outcome"],
+    namespace=_NAMESPACE
+)
+LLM_REQUEST_DURATION = Histogram(
+    "llm_request_duration_seconds",
+    "Длительность запроса к LLM (с ожиданием слота)",
+    ["model", "streaming"],
+    namespace=_NAMESPACE,
+    buckets=_STAGE_BUCKETS
+)
+LLM_TOKENS = Counter(
+    "llm_tokens_total",
+    "Токены LLM по данным usage (direction: in — промпт, out — ответ)",
+    ["model", "direction"],
+    namespace=_NAMESPACE
+)
+
+DB_QUERY_DURATION = Histogram(
+    "db_query_duration_seconds",
+    "Длительность операций с базой данных",
+    ["operation"],
+    namespace=_NAMESPACE,
+    buckets=_DB_BUCKETS
+)
+DB_ROWS = Counter(
+    "db_rows_written_total",
+    "Записано строк в базу данных",
+    ["operation"],
+    namespace=_NAMESPACE
+)
+
+WS_CONNECTIONS = Gauge(
+    "ws_connections",
+    "Открытые WebSocket подключения",
+    namespace=_NAMESPACE,
+    multiprocess_mode="livesum"
+)
+WS_QUEUE_DEPTH = Gauge(
+    "ws_send_queue_depth",
+    "Сообщения в очередях отправки WebSocket",
+    namespace=_NAMESPACE,
+    multiprocess_mode="livesum"
+)
+WS_MESSAGES = Counter(
+    "ws_messages_total",
+    "Сообщения WebSocket по исходу (sent, dropped)",
+    ["outcome"],
+    namespace=_NAMESPACE
+)
+EVENT_LOOP_LAG = Histogram(
+    "event_loop_lag_seconds",
+    "Опоздание пробуждения периодической задачи: время, на которое event loop был занят",
+    namespace=_NAMESPACE,
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, float("inf"))
+)
+JOB_QUEUE_DEPTH = Gauge(
+    "job_queue_depth",
+    "Задачи в локальной очереди агентов",
+    namespace=_NAMESPACE,
+    multiprocess_mode="livesum"
+)
+
+
+@contextmanager
+def track_stage(stage: str, agent: Optional[str] = None) -> Iterator[None]:
+    """
+    Замеряет длительность этапа; исключение учитывается в STAGE_ERRORS.
+
+    Args:
+        stage: Имя этапа
+        agent: Тип агента (по умолчанию — агент текущего прогона)
+    """
+    agent = agent or _current_agent.get()
+    started = time.perf_counter()
+    try:
+        with tracer.span(stage):
+            yield
+    except BaseException:
+        STAGE_ERRORS.labels(agent, stage).inc()
+        raise
+    finally:
+        STAGE_DURATION.labels(agent, stage).observe(time.perf_counter() - started)
+
+
+@asynccontextmanager
+async def track_run(agent: str) -> AsyncIterator[None]:
+    """
+    Учитывает прогон агента в ACTIVE_RUNS, RUNS и этапе "total" и ведёт
+    его трассу (корневой спан {agent}_agent).
+    """
+    token = _current_agent.set(agent)
+    # Прогон привязывает свой run_id к логам через bind_run_id, здесь он сбрасывается
+    log_token = bind_run_id(None)
+    trace = tracer.start_trace(f"{agent}_agent", agent=agent)
+    ACTIVE_RUNS.labels(agent).inc()
+    outcome = "failed"
+    error: Optional[BaseException] = None
+    started = time.perf_counter()
+    try:
+        yield
+        outcome = "completed"
+    except BaseException as e:
+        error = e
+        STAGE_ERRORS.labels(agent, "total").inc()
+        raise
+    finally:
+        STAGE_DURATION.labels(agent, "total").observe(time.perf_counter() - started)
+        ACTIVE_RUNS.labels(agent).dec()
+        RUNS.labels(agent, outcome).inc()
+        _current_agent.reset(token)
+        reset_run_id(log_token)
+        finished = tracer.end_trace(trace, error)
+        if finished is not None:
+            await asyncio.to_thread(tracer.export, finished)
+
+
+def observe_run(agent: str) -> Callable[[_F], _F]:
+    """Декоратор корутины прогона агента (см. track_run)."""
+    def decorator(func: _F) -> _F:
+        @functools.wraps(func)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            async with track_run(agent):
+                return await func(*args, **kwargs)
+        return wrapper  # type: ignore[return-value]
+    return decorator
+
+
+@contextmanager
+def track_db(operation: str, rows: int = 0) -> Iterator[None]:
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        DB_QUERY_DURATION.labels(operation).observe(time.perf_counter() - started)
+    if rows:
+        DB_ROWS.labels(operation).inc(rows)
+
+
+def record_llm_usage(model: Optional[str], usage: object) -> None:
+    """Учитывает токены из поля usage ответа (может отсутствовать)."""
+    if usage is None:
+        return
+    model = model or "unknown"
+    prompt_tokens = getattr(usage, "prompt_tokens", None)
+    completion_tokens = getattr(usage, "completion_tokens", None)
+    if prompt_tokens:
+        LLM_TOKENS.labels(model, "in").inc(prompt_tokens)
+    if completion_tokens:
+        LLM_TOKENS.labels(model, "out").inc(completion_tokens)
+
+
+async def monitor_event_loop(interval: float) -> None:
+    """Периодически замеряет задержку event loop (запускается из lifespan)."""
+    loop = asyncio.get_running_loop()
+    while True:
+        started = loop.time()
+        await asyncio.sleep(interval)
+        EVENT_LOOP_LAG.observe(max(0.0, loop.time() - started - interval))
+
+
+def multiprocess_enabled() -> bool:
+    return bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    """Текст метрик в формате Prometheus и его Content-Type."""
+    if multiprocess_enabled():
+        from prometheus_client import multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+
+def mark_process_dead(pid: Optional[int] = None) -> None:
+    """Удаляет live-значения завершающегося процесса (режим нескольких процессов)."""
+    if multiprocess_enabled():
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(pid or os.getpid())
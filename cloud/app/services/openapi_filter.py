@@ -0,0 +1,136 @@
+import re
+import threading
+from collections import OrderedDict, deque
+from typing import Any, Dict, FrozenSet, Iterable, List, Set, Tuple
+
+from app.core.config import settings
+from app.services.openapi_spec import ParsedSpec
+
+
+def resolve_schema_name(ref: str) -> str:
+    """Извлекает имя схемы из $ref вида '#/components/schemas/Name'."""
+    match = re.match(r'^#/(components/[^/]+/)(.+)$', ref)
+    if match:
+        return match.group(2)  # Например, "User", "ErrorResponse"
+    return ref
+
+
+def resolve_refs_closure(spec: ParsedSpec, seed_refs: Iterable[str]) -> Set[str]:
+    """
+    Транзитивное замыкание $ref по предпостроенному графу компонентов.
+
+    Обход в ширину: каждый компонент посещается один раз, поэтому время
+    линейно по числу достижимых компонентов и их ссылок.
+
+    Args:
+        spec: Разобранная спецификация
+        seed_refs: Ссылки, с которых начинается обход
+
+    Returns:
+        Множество всех достижимых ссылок
+    """
+    graph = spec.component_refs
+    used_refs: Set[str] = set(seed_refs)
+    queue = deque(used_refs)
+    while queue:
+        for ref in graph.get(queue.popleft(), ()):
+            if ref not in used_refs:
+                used_refs.add(ref)
+                queue.append(ref)
+    return used_refs
+
+
+def filter_components(original_components: Dict[str, Any], used_refs: Set[str]) -> Dict[str, Any]:
+    """Оставляет в components только те элементы, на которые есть ссылки."""
+    if not original_components:
+        return {}
+
+    filtered = {}
+    # Поддерживаемые секции: schemas, responses, parameters, examples, requestBodies и т.д.
+    for comp_type, items in original_components.items():
+        if not isinstance(items, dict):
+            continue
+        prefix = f"#/components/{comp_type}/"
+        filtered_items = {
+            name: item
+            for name, item in items.items()
+            if prefix + name in used_refs
+        }
+        if filtered_items:
+            filtered[comp_type] = filtered_items
+    return filtered
+
+
+def _slice_openapi(spec: ParsedSpec, selected_tags: FrozenSet[str]) -> Dict[str, Any]:
+    openapi_data = spec.data
+
+    # 1. Отбираем операции по индексу тегов (в порядке следования в документе)
+    selected_operations = sorted({
+        number
+        for tag in selected_tags
+        for number in spec.tag_index.get(tag, ())
+    })
+    filtered_paths = {}
+    seed_refs: Set[str] = set()
+    for number in selected_operations:
+        path, method = spec.operations[number]
+        filtered_paths.setdefault(path, {})[method] = openapi_data['paths'][path][method]
+        seed_refs.update(spec.operation_refs[number])
+
+    # 2. Извлекаем компоненты, на которые есть ссылки (рекурсивно)
+    used_refs = resolve_refs_closure(spec, seed_refs)
+
+    # 3. Формируем результат
+    result = {
+        'openapi': openapi_data.get('openapi'),
+        'info': openapi_data.get('info'),
+    }
+
+    # Опционально копируем глобальные секции
+    for key in ['servers', 'security', 'tags', 'externalDocs']:
+        if key in openapi_data:
+            result[key] = openapi_data[key]
+
+    result['paths'] = filtered_paths
+
+    filtered_comp = filter_components(openapi_data.get('components', {}), used_refs)
+    if filtered_comp:
+        result['components'] = filtered_comp
+
+    return result
+
+
+_slices: "OrderedDict[Tuple[str, FrozenSet[str]], Dict[str, Any]]" = OrderedDict()
+_slices_lock = threading.Lock()
+
+
+def filter_openapi_full(spec: ParsedSpec, selected_tags: List[str]) -> Dict[str, Any]:
+    """
+    Вырезает из спецификации операции с выбранными тегами и нужные им компоненты.
+
+    Результат запоминается по (хеш содержимого спецификации, набор тегов),
+    поэтому повторный выбор тех же тегов не пересчитывается. Возвращаемый
+    словарь разделяется между вызовами и не должен изменяться.
+
+    Args:
+        spec: Разобранная спецификация
+        selected_tags: Теги разделов спецификации
+
+    Returns:
+        Срез OpenAPI-документа
+    """
+    key = (spec.digest, frozenset(selected_tags))
+    with _slices_lock:
+        cached = _slices.get(key)
+        if cached is not None:
+            _slices.move_to_end(key)
+            return cached
+
+    result = _slice_openapi(spec, key[1])
+
+    with _slices_lock:
+        _slices[key] = result
+        while len(_slices) > settings.OPENAPI_SLICE_CACHE_SIZE:
+            _slices.popitem(last=False)
+    return result
+
@@ -0,0 +1,264 @@
+import asyncio
+import dataclasses
+import hashlib
+import os
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, List, Optional, Set, Tuple
+
+import yaml
+
+from app.core.config import settings
+from app.core.logger import logger
+
+# C-загрузчик libyaml в разы быстрее чистого Python, но доступен не везде
+try:
+    from yaml import CSafeLoader as SpecLoader
+except ImportError:  # pragma: no cover - зависит от сборки PyYAML
+    from yaml import SafeLoader as SpecLoader
+
+HTTP_METHODS = ("get", "put", "post", "delete", "options", "head", "patch", "trace")
+
+Operation = Tuple[str, str]
+
+
+def extract_refs(obj: Any) -> Set[str]:
+    """
+    Собирает все $ref из объекта без рекурсии и без глобального состояния.
+
+    Args:
+        obj: Фрагмент OpenAPI-документа
+
+    Returns:
+        Множество найденных ссылок
+    """
+    refs: Set[str] = set()
+    stack = [obj]
+    while stack:
+        current = stack.pop()
+        if isinstance(current, dict):
+            for key, value in current.items():
+                if key == "$ref" and isinstance(value, str):
+                    refs.add(value)
+                elif isinstance(value, (dict, list)):
+                    stack.append(value)
+        elif isinstance(current, list):
+            stack.extend(item for item in current if isinstance(item, (dict, list)))
+    return refs
+
+
+@dataclass(frozen=True)
+class ParsedSpec:
+    """Разобранная OpenAPI-спецификация с предпостроенными индексами."""
+
+    name: str
+    path: str
+    digest: str
+    mtime: float
+    size: int
+    data: Dict[str, Any]
+    # Операции в порядке следования в документе: (path, method)
+    operations: Tuple[Operation, ...]
+    # Тег -> номера операций из operations
+    tag_index: Dict[str, Tuple[int, ...]]
+    # Номер операции -> прямые $ref операции
+    operation_refs: Tuple[FrozenSet[str], ...]
+    # '#/components/<type>/<name>' -> прямые $ref компонента
+    component_refs: Dict[str, FrozenSet[str]]
+
+    @property
+    def tags(self) -> List[str]:
+        return list(self.tag_index)
+
+
+def build_spec(name: str, path: str, digest: str, mtime: float, size: int, data: Dict[str, Any]) -> ParsedSpec:
+    """Строит индекс тегов и граф зависимостей компонентов для спецификации."""
+    operations: List[Operation] = []
+    operation_refs: List[FrozenSet[str]] = []
+    tag_index: Dict[str, List[int]] = {}
+
+    for api_path, path_item in (data.get("paths") or {}).items():
+        if not isinstance(path_item, dict):
+            continue
+        for method in path_item:
+            operation = path_item[method]
+            if method not in HTTP_METHODS or not isinstance(operation, dict):
+                continue
+            number = len(operations)
+            operations.append((api_path, method))
+            operation_refs.append(frozenset(extract_refs(operation)))
+            for tag in operation.get("tags") or []:
+                tag_index.setdefault(tag, []).append(number)
+
+    component_refs: Dict[str, FrozenSet[str]] = {}
+    for comp_type, items in (data.get("components") or {}).items():
+        if not isinstance(items, dict):
+            continue
+        for comp_name, item in items.items():
+            component_refs[f"#/components/{comp_type}/{comp_name}"] = frozenset(extract_refs(item))
+
+    return ParsedSpec(
+        name=name,
+        path=path,
+        digest=digest,
+        mtime=mtime,
+        size=size,
+        data=data,
+        operations=tuple(operations),
+        tag_index={tag: tuple(numbers) for tag, numbers in tag_index.items()},
+        operation_refs=tuple(operation_refs),
+        component_refs=component_refs
+    )
+
+
+class SpecRegistry:
+    """
+    Реестр OpenAPI-спецификаций.
+
+    Каждая спецификация разбирается один раз: повторные обращения проверяют
+    только mtime/размер файла, а при изменении файла результат разбора
+    переиспользуется, если хеш содержимого не поменялся.
+    """
+
+    def __init__(self, specs: Optional[Dict[str, str]] = None) -> None:
+        self._paths: Dict[str, str] = dict(specs or {})
+        self._loaded: Dict[str, ParsedSpec] = {}
+        self._by_digest: Dict[str, ParsedSpec] = {}
+        self._lock = threading.Lock()
+
+    def names(self) -> List[str]:
+        names = list(self._paths)
+        if os.path.isdir(settings.OPENAPI_SPECS_DIR):
+            for file_name in sorted(os.listdir(settings.OPENAPI_SPECS_DIR)):
+                name, ext = os.path.splitext(file_name)
+                if ext == ".yaml" and name not in self._paths:
+                    names.append(name)
+        return names
+
+    def _path_for(self, name: str) -> Optional[str]:
+        path = self._paths.get(name)
+        if path is None:
+            # Спецификации, загруженные через API в другом процессе (например,
+            # в Celery-воркере), находятся по общему каталогу OPENAPI_SPECS_DIR
+            candidate = os.path.join(settings.OPENAPI_SPECS_DIR, f"{name}.yaml")
+            if os.path.isfile(candidate):
+                path = self._paths.setdefault(name, candidate)
+        return path
+
+    def register(self, name: str, path: str) -> ParsedSpec:
+        """
+        Регистрирует спецификацию и сразу разбирает её.
+
+        Args:
+            name: Имя спецификации
+            path: Путь к YAML/JSON-файлу
+
+        Returns:
+            Разобранная спецификация
+        """
+        with self._lock:
+            self._paths[name] = path
+            self._loaded.pop(name, None)
+        return self.get(name)
+
+    def get(self, name: str = "default") -> ParsedSpec:
+        """
+        Возвращает разобранную спецификацию, перечитывая файл только при его изменении.
+
+        Raises:
+            ValueError: Если спецификация не зарегистрирована
+        """
+        path = self._path_for(name)
+        if path is None:
+            raise ValueError(f"OpenAPI спецификация '{name}' не зарегистрирована")
+
+        stat = os.stat(path)
+        cached = self._loaded.get(name)
+        if cached and cached.mtime == stat.st_mtime and cached.size == stat.st_size:
+            return cached
+
+        with self._lock:
+            cached = self._loaded.get(name)
+            if cached and cached.mtime == stat.st_mtime and cached.size == stat.st_size:
+                return cached
+
+            spec = self._parse(name, path, stat)
+            self._store(spec)
+            return spec
+
+    def _parse(self, name: str, path: str, stat: os.stat_result) -> ParsedSpec:
+        with open(path, "rb") as f:
+            raw = f.read()
+        digest = hashlib.sha256(raw).hexdigest()
+
+        same_content = self._by_digest.get(digest)
+        if same_content is not None:
+            return dataclasses.replace(same_content, name=name, path=path, mtime=stat.st_mtime, size=stat.st_size)
+        data = yaml.load(raw, Loader=SpecLoader) or {}
+        spec = build_spec(name, path, digest, stat.st_mtime, stat.st_size, data)
+        logger.info(
+            f"OpenAPI спецификация '{name}' разобрана: "
+            f"{len(spec.operations)} операций, {len(spec.component_refs)} компонентов"
+        )
+        return spec
+
+    def _store(self, spec: ParsedSpec) -> None:
+        self._loaded[spec.name] = spec
+        # Держим в кэше по хешу только содержимое, на которое ссылаются имена
+        self._by_digest = {loaded.digest: loaded for loaded in self._loaded.values()}
+
+    def save(self, name: str, path: str, content: str) -> ParsedSpec:
+        """
+        Записывает спецификацию в файл и регистрирует её.
+
+        Текст сначала пишется во временный файл и разбирается; файл path
+        заменяется только после успешного разбора, поэтому невалидная
+        спецификация не затирает рабочую.
+
+        Args:
+            name: Имя спецификации
+            path: Путь к YAML/JSON-файлу
+            content: Текст спецификации
+
+        Returns:
+            Разобранная спецификация
+        """
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(content)
+            spec = self._parse(name, tmp_path, os.stat(tmp_path))
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        stat = os.stat(path)
+        spec = dataclasses.replace(spec, path=path, mtime=stat.st_mtime, size=stat.st_size)
+        with self._lock:
+            self._paths[name] = path
+            self._store(spec)
+        return spec
+
+    async def aget(self, name: str = "default") -> ParsedSpec:
+        """Асинхронная обёртка над get(): разбор файла выполняется вне event loop."""
+        cached = self._loaded.get(name)
+        path = self._path_for(name)
+        if cached is not None and path is not None:
+            stat = os.stat(path)
+            if cached.mtime == stat.st_mtime and cached.size == stat.st_size:
+                return cached
+        return await asyncio.to_thread(self.get, name)
+
+    async def warm_up(self) -> None:
+        """Разбирает все зарегистрированные спецификации (вызывается из lifespan)."""
+        for name in self.names():
+            try:
+                await self.aget(name)
+            except Exception as e:
+                logger.warning(f"Не удалось загрузить OpenAPI спецификацию '{name}': {e}")
+
+
+# Экземпляр реестра — глобальный для всего приложения
+spec_registry = SpecRegistry(settings.OPENAPI_SPECS)
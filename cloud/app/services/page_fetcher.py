@@ -0,0 +1,238 @@
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass, replace
+from typing import Dict, Optional, Tuple
+
+import httpx
+import zstandard
+
+from app.core.config import settings
+from app.core.logger import logger
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class PageTooLargeError(ValueError):
+    """Тело ответа превышает PAGE_MAX_BYTES."""
+
+
+@dataclass(frozen=True)
+class FetchedPage:
+    """Загруженная страница (из сети или из кэша)."""
+
+    url: str
+    status: int
+    text: str
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    fetched_at: float = 0.0
+    from_cache: bool = False
+
+
+class PageFetcher:
+    """
+    Загрузка тестируемых страниц.
+
+    Общий пул соединений httpx (HTTP/2, если установлен h2), условные
+    запросы по ETag / Last-Modified и кэш страниц на диске (zstd) с TTL.
+    Одновременные запросы одного URL объединяются в одну загрузку, тело
+    ответа ограничено max_bytes. Из кэша удаляются страницы, не
+    использованные дольше max_age, и давно не использованные страницы
+    сверх cache_max_bytes.
+    """
+
+    def __init__(
+            self,
+            cache_dir: str,
+            ttl: float,
+            max_bytes: int,
+            cache_max_bytes: int = 256 * 1024 * 1024,
+            max_age: float = 24 * 60 * 60,
+            timeout: float = 10.0,
+            max_connections: int = 20,
+            user_agent: Optional[str] = None
+    ) -> None:
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.cache_max_bytes = cache_max_bytes
+        self.max_age = max_age
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.user_agent = user_agent
+        self._client: Optional[httpx.AsyncClient] = None
+        # Ключ — URL и use_cache: загрузка в обход кэша не отдаётся
+        # тем, кто согласен на кэш, и наоборот
+        self._inflight: Dict[Tuple[str, bool], asyncio.Future] = {}
+        self._lock = threading.Lock()
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            headers = {"User-Agent": self.user_agent} if self.user_agent else None
+            self._client = httpx.AsyncClient(
+                http2=_http2_available(),
+                follow_redirects=True,
+                headers=headers,
+                limits=httpx.Limits(max_connections=self.max_connections),
+                timeout=httpx.Timeout(self.timeout)
+            )
+        return self._client
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _cache_path(self, url: str) -> str:
+        digest = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, f"{digest}.json.zst")
+
+    def _load(self, url: str) -> Optional[FetchedPage]:
+        path = self._cache_path(url)
+        try:
+            with open(path, "rb") as f:
+                data = json.loads(zstandard.ZstdDecompressor().decompress(f.read()))
+            page = FetchedPage(**data)
+            # Время изменения файла — время последнего использования (для очистки)
+            os.utime(path)
+        except (OSError, ValueError, TypeError, zstandard.ZstdError):
+            return None
+        return page if page.url == url else None
+
+    def _store(self, page: FetchedPage) -> None:
+        os.makedirs(self.cache_dir, exist_ok=True)
+        data = asdict(page)
+        data.pop("from_cache")
+        blob = zstandard.ZstdCompressor().compress(json.dumps(data, ensure_ascii=False).encode("utf-8"))
+        path = self._cache_path(page.url)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(blob)
+        os.replace(tmp_path, path)
+        self._evict()
+
+    def _evict(self) -> None:
+        with self._lock:
+            now = time.time()
+            entries = []
+            for name in os.listdir(self.cache_dir):
+                if name.endswith(".tmp"):
+                    continue
+                path = os.path.join(self.cache_dir, name)
+                try:
+                    stat = os.stat(path)
+                    if now - stat.st_mtime > self.max_age:
+                        os.remove(path)
+                        continue
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, name))
+            total = sum(size for _, size, _ in entries)
+            for _, size, name in sorted(entries):
+                if total <= self.cache_max_bytes:
+                    break
+                try:
+                    os.remove(os.path.join(self.cache_dir, name))
+                except OSError:
+                    continue
+                total -= size
+
+    async def fetch(self, url: str, use_cache: bool = True) -> FetchedPage:
+        """
+        Загружает страницу.
+
+        Args:
+            url: Адрес страницы
+            use_cache: False — игнорировать кэш и загрузить страницу заново
+
+        Returns:
+            Страница; from_cache=True, если тело взято из кэша
+        """
+        key = (url, use_cache)
+        if key in self._inflight:
+            return await asyncio.shield(self._inflight[key])
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            page = await self._fetch(url, use_cache)
+            future.set_result(page)
+            return page
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Исключение получают ожидающие; без них не логируем как необработанное
+            future.exception()
+            raise
+        finally:
+            del self._inflight[key]
+
+    async def _fetch(self, url: str, use_cache: bool) -> FetchedPage:
+        cached = await asyncio.to_thread(self._load, url) if use_cache else None
+        if cached is not None and time.time() - cached.fetched_at < self.ttl:
+            return replace(cached, from_cache=True)
+
+        headers = {}
+        if cached is not None:
+            if cached.etag:
+                headers["If-None-Match"] = cached.etag
+            if cached.last_modified:
+                headers["If-Modified-Since"] = cached.last_modified
+
+        async with self._get_client().stream("GET", url, headers=headers) as response:
+            if response.status_code == 304 and cached is not None:
+                page = replace(cached, fetched_at=time.time())
+                await asyncio.to_thread(self._store, page)
+                logger.info(f"Страница не изменилась (304), взята из кэша: {url}")
+                return replace(page, from_cache=True)
+
+            content_length = response.headers.get("Content-Length")
+            if content_length and content_length.isdigit() and int(content_length) > self.max_bytes:
+                raise PageTooLargeError(f"Страница {url} больше {self.max_bytes} байт")
+
+            chunks = []
+            size = 0
+            async for chunk in response.aiter_bytes():
+                size += len(chunk)
+                if size > self.max_bytes:
+                    raise PageTooLargeError(f"Страница {url} больше {self.max_bytes} байт")
+                chunks.append(chunk)
+
+            page = FetchedPage(
+                url=url,
+                status=response.status_code,
+                text=b"".join(chunks).decode(response.encoding or "utf-8", errors="replace"),
+                etag=response.headers.get("ETag"),
+                last_modified=response.headers.get("Last-Modified"),
+                fetched_at=time.time()
+            )
+
+        logger.info(f"Страница загружена: {url} ({response.http_version}, {size} байт)")
+        if page.status == 200:
+            await asyncio.to_thread(self._store, page)
+        return page
+
+
+# Экземпляр загрузчика — глобальный для всего приложения
+page_fetcher = PageFetcher(
+    cache_dir=settings.PAGE_CACHE_DIR,
+    ttl=settings.PAGE_CACHE_TTL,
+    max_bytes=settings.PAGE_MAX_BYTES,
+    cache_max_bytes=settings.PAGE_CACHE_MAX_MB * 1024 * 1024,
+    max_age=settings.PAGE_CACHE_MAX_AGE,
+    timeout=settings.PAGE_FETCH_TIMEOUT,
+    max_connections=settings.PAGE_FETCH_MAX_CONNECTIONS,
+    user_agent=settings.PAGE_USER_AGENT
+)
@@ -0,0 +1,111 @@
+"""
+Прогретый процесс-сервер pytest для VerificationPool.
+
+Запуск (делает сам пул):
+    python -u -m app.services.pytest_worker
+
+Процесс один раз импортирует pytest и тяжёлые плагины, затем читает из
+stdin задачи — JSON-строки {"token", "workdir", "args", "env"}. Для каждой задачи
+делается fork: дочерний процесс в собственной группе процессов переходит
+в workdir и выполняет pytest.main(args), поэтому импорты уже прогреты, а
+сгенерированные тесты не попадают в память сервера. Вывод дочернего
+процесса идёт в stdout сервера между строками START_MARK и DONE_MARK.
+"""
+import contextlib
+import importlib
+import json
+import os
+import sys
+import tempfile
+import traceback
+
+START_MARK = "\x00pytest-worker-start"
+DONE_MARK = "\x00pytest-worker-done"
+
+# Модули, импорт которых занимает основную часть запуска pytest
+PRELOAD = (
+    "pytest",
+    "_pytest.config",
+    "_pytest.main",
+    "_pytest.python",
+    "_pytest.junitxml",
+    "allure",
+    "allure_pytest.plugin",
+    "playwright.sync_api",
+    "pytest_playwright.pytest_playwright",
+    "pytest_base_url.plugin",
+    "app.services.browser_pool_plugin",
+    "requests",
+    "pydantic",
+)
+
+
+def _preload() -> None:
+    for name in PRELOAD:
+        try:
+            importlib.import_module(name)
+        except Exception:
+            pass
+
+    # Пустая сессия загружает плагины из entry points и кэширует метаданные пакетов
+    try:
+        import pytest
+
+        with tempfile.TemporaryDirectory() as empty_dir, \
+                open(os.devnull, "w") as devnull, \
+                contextlib.redirect_stdout(devnull), \
+                contextlib.redirect_stderr(devnull):
+            pytest.main(["--collect-only", "-q", "-p", "no:cacheprovider", empty_dir])
+    except Exception:
+        pass
+
+
+def _run_child(job: dict) -> None:
+    try:
+        os.setsid()
+        # Канал задач сервера дочернему процессу не нужен
+        devnull = os.open(os.devnull, os.O_RDONLY)
+        os.dup2(devnull, 0)
+        os.write(1, f"{START_MARK} {job['token']} {os.getpid()}\n".encode())
+        sys.stdout.reconfigure(line_buffering=True)
+        sys.stderr.reconfigure(line_buffering=True)
+        # sys.path как у консольной команды pytest: без каталога сервера
+        server_dir = os.getcwd()
+        sys.path[:] = [p for p in sys.path if p not in ("", server_dir)]
+        os.environ.update(job.get("env") or {})
+        os.chdir(job["workdir"])
+
+        import pytest
+
+        code = int(pytest.main(job["args"]))
+    except BaseException:
+        traceback.print_exc()
+        code = 3
+    sys.stdout.flush()
+    sys.stderr.flush()
+    os._exit(code)
+
+
+def _run_job(job: dict) -> None:
+    sys.stdout.flush()
+    sys.stderr.flush()
+    pid = os.fork()
+    if pid == 0:
+        _run_child(job)
+    _, status = os.waitpid(pid, 0)
+    code = os.waitstatus_to_exitcode(status)
+    sys.stdout.write(f"{DONE_MARK} {job['token']} {code}\n")
+    sys.stdout.flush()
+
+
+def main() -> None:
+    _preload()
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+        _run_job(json.loads(line))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+import json
+import posixpath
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional
+
+from app.core.logger import logger
+from app.services.file_tree import FileTree
+
+# Ключ ответа модели с изменёнными файлами: {"files": {"путь": "содержимое" | null}}
+PATCH_KEY = "files"
+
+_TRACEBACK_LIMIT = 4000
+
+
+@dataclass(frozen=True)
+class TestFailure:
+    """Упавший тест или ошибка сбора из отчёта pytest (junit XML)."""
+
+    nodeid: str
+    file: Optional[str]
+    kind: str
+    message: str
+    traceback: str
+
+
+def _resolve_file(classname: str, files: Iterable[str]) -> Optional[str]:
+    # classname вида "tests.ui.test_login.TestLogin": модуль — самый длинный
+    # префикс, которому соответствует файл дерева
+    files = set(files)
+    parts = [p for p in classname.split(".") if p]
+    for end in range(len(parts), 0, -1):
+        candidate = "/".join(parts[:end]) + ".py"
+        if candidate in files:
+            return candidate
+    return None
+
+
+def parse_junit_xml(report: str, files: Iterable[str] = ()) -> List[TestFailure]:
+    """
+    Разбирает отчёт pytest --junitxml в список падений.
+
+    Args:
+        report: Содержимое XML-отчёта
+        files: Пути файлов дерева — для сопоставления тестов с модулями
+
+    Returns:
+        Падения (failure) и ошибки (error, в т.ч. ошибки сбора модулей)
+    """
+    files = list(files)
+    failures: List[TestFailure] = []
+    root = ET.fromstring(report)
+    for case in root.iter("testcase"):
+        for kind in ("failure", "error"):
+            node = case.find(kind)
+            if node is None:
+                continue
+            classname = case.get("classname", "")
+            name = case.get("name", "")
+            file = case.get("file")
+            if file is None:
+                # Ошибка сбора: classname пустой, в name — путь модуля через точки
+                file = _resolve_file(classname or name, files)
+            nodeid = f"{file or classname}::{name}" if classname else (file or name)
+            failures.append(TestFailure(
+                nodeid=nodeid,
+                file=file,
+                kind=kind,
+                message=node.get("message", ""),
+                traceback=(node.text or "")[-_TRACEBACK_LIMIT:]
+            ))
+    return failures
+
+
+def read_junit_report(path: str, files: Iterable[str] = ()) -> List[TestFailure]:
+    """Читает отчёт с диска; отсутствующий или битый отчёт — пустой список."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return parse_junit_xml(f.read(), files)
+    except (OSError, ET.ParseError) as e:
+        logger.warning(f"Отчёт pytest {path} недоступен: {e}")
+        return []
+
+
+def failures_from_diagnostics(diagnostics: Iterable[Any]) -> List[TestFailure]:
+    """Ошибки статической проверки (static_validator.Diagnostic) в формате падений."""
+    return [
+        TestFailure(
+            nodeid=f"{d.file}:{d.line}",
+            file=d.file,
+            kind=d.kind,
+            message=d.message,
+            traceback=d.format()
+        )
+        for d in diagnostics
+    ]
+
+
+def files_to_repair(failures: List[TestFailure], files: Dict[str, str]) -> Dict[str, str]:
+    """
+    Файлы, которые нужно показать модели: упавшие модули, файлы дерева,
+    упомянутые в трейсбэках, и conftest.py на их пути.
+    """
+    selected = set()
+    for failure in failures:
+        if failure.file in files:
+            selected.add(failure.file)
+        for path in files:
+            if path in failure.traceback:
+                selected.add(path)
+
+    for path in list(selected):
+        parts = path.split("/")[:-1]
+        for end in range(len(parts) + 1):
+            conftest = "/".join(parts[:end] + ["conftest.py"])
+            if conftest in files:
+                selected.add(conftest)
+    return {path: files[path] for path in sorted(selected)}
+
+
+def build_repair_messages(
+        failures: List[TestFailure],
+        files: Dict[str, str],
+        output_tail: str = ""
+) -> List[Dict[str, str]]:
+    """
+    Сообщения для кодовой модели в режиме точечного исправления.
+
+    Модели отправляются только проблемные файлы и трейсбэки, а в ответ
+    запрашиваются только изменённые файлы.
+    """
+    selected = files_to_repair(failures, files)
+    report = [
+        {"test": f.nodeid, "kind": f.kind, "message": f.message, "traceback": f.traceback}
+        for f in failures
+    ]
+    return [
+        {
+            "role": "system",
+            "content": f"""Тесты запускаются с ошибками. Ниже — отчёт pytest с трейсбэками, список всех файлов проекта и содержимое файлов, связанных с ошибками. Найди и исправь ошибки. Внимательно следи за импортами, пустыми папками, __init__.py и правильными названиями функций, классов и фикстур.
+В ответ верни строго JSON вида {{"{PATCH_KEY}": {{"путь/к/файлу.py": "новое полное содержимое файла"}}}} только с изменёнными или новыми файлами. Чтобы удалить файл, укажи для него null. Неизменённые файлы не возвращай.""",
+        },
+        {
+            "role": "user",
+            "content": json.dumps({
+                "failures": report,
+                "pytest_output_tail": output_tail,
+                "project_files": sorted(files),
+                "files": selected,
+            }, ensure_ascii=False),
+        },
+    ]
+
+
+def apply_patch(tree: FileTree, patch: Dict[str, Any]) -> FileTree:
+    """
+    Применяет файловый патч модели к дереву проекта.
+
+    Args:
+        tree: Текущая версия дерева
+        patch: Ответ модели ({"files": {путь: содержимое | null}})
+
+    Returns:
+        Новая версия дерева (общие с исходной узлы не копируются)
+    """
+    changes = patch.get(PATCH_KEY)
+    if not isinstance(changes, dict):
+        raise ValueError(f"В ответе модели нет ключа '{PATCH_KEY}'")
+
+    normalized: Dict[str, Optional[str]] = {}
+    for path, content in changes.items():
+        path = posixpath.normpath(path.strip("/"))
+        if path.startswith("..") or path == ".":
+            raise ValueError(f"Путь вне проекта: {path}")
+        if content is not None and not isinstance(content, str):
+            raise ValueError(f"Неподдерживаемое содержимое для '{path}': {type(content)}")
+        normalized[path] = content
+    return tree.with_changes(normalized)
@@ -0,0 +1,450 @@
+import ast
+import configparser
+import fnmatch
+import os
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Set
+
+SEVERITY_ERROR = "error"
+SEVERITY_WARNING = "warning"
+
+# Фикстуры pytest и плагинов из requirements.txt (pytest-playwright, pytest-base-url, allure)
+BUILTIN_FIXTURES = frozenset({
+    "cache", "capfd", "capfdbinary", "caplog", "capsys", "capsysbinary", "capteesys",
+    "doctest_namespace", "monkeypatch", "pytestconfig", "record_property",
+    "record_testsuite_property", "record_xml_attribute", "recwarn", "request",
+    "subtests", "tmp_path", "tmp_path_factory", "tmpdir", "tmpdir_factory",
+    "base_url", "_verify_url",
+    "browser", "browser_channel", "browser_context_args", "browser_name",
+    "browser_type", "browser_type_launch_args", "connect_options", "context",
+    "device", "is_chromium", "is_firefox", "is_webkit", "launch_browser",
+    "new_context", "output_path", "page", "playwright",
+})
+
+_DEFAULT_PYTHON_FILES = ("test_*.py", "*_test.py")
+
+# Ручной запуск браузера в обход фикстур pytest-playwright (и пула браузеров)
+_BROWSER_LAUNCH_CALLS = frozenset({
+    "sync_playwright", "async_playwright", "launch", "launch_persistent_context",
+})
+
+
+@dataclass(frozen=True)
+class Diagnostic:
+    """Проблема, найденная статической проверкой."""
+
+    kind: str
+    file: str
+    line: int
+    message: str
+    severity: str = SEVERITY_ERROR
+
+    def format(self) -> str:
+        return f"{self.file}:{self.line}: [{self.kind}] {self.message}"
+
+
+@dataclass
+class _Module:
+    path: str
+    tree: Optional[ast.Module]
+    names: Set[str] = field(default_factory=set)
+    star_import: bool = False
+
+
+def _module_names(tree: ast.Module) -> Set[str]:
+    """Имена, определённые на верхнем уровне модуля."""
+    names: Set[str] = set()
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            names.add(node.name)
+        elif isinstance(node, (ast.Import, ast.ImportFrom)):
+            for alias in node.names:
+                names.add((alias.asname or alias.name).split(".")[0])
+        elif isinstance(node, ast.Name) and isinstance(node.ctx, ast.Store):
+            names.add(node.id)
+    return names
+
+
+def _python_files_patterns(root: str) -> Iterable[str]:
+    for ini_name, section in (("pytest.ini", "pytest"), ("tox.ini", "pytest"), ("setup.cfg", "tool:pytest")):
+        path = os.path.join(root, ini_name)
+        if not os.path.isfile(path):
+            continue
+        parser = configparser.ConfigParser(interpolation=None)
+        try:
+            parser.read(path, encoding="utf-8")
+        except configparser.Error:
+            continue
+        if parser.has_option(section, "python_files"):
+            return parser.get(section, "python_files").split()
+    return _DEFAULT_PYTHON_FILES
+
+
+def _decorator_name(node: ast.expr) -> str:
+    if isinstance(node, ast.Call):
+        node = node.func
+    if isinstance(node, ast.Attribute):
+        return f"{_decorator_name(node.value)}.{node.attr}"
+    if isinstance(node, ast.Name):
+        return node.id
+    return ""
+
+
+def _fixture_name(func: ast.AST) -> Optional[str]:
+    for decorator in getattr(func, "decorator_list", ()):
+        if _decorator_name(decorator).split(".")[-1] != "fixture":
+            continue
+        if isinstance(decorator, ast.Call):
+            for keyword in decorator.keywords:
+                if keyword.arg == "name" and isinstance(keyword.value, ast.Constant):
+                    return str(keyword.value.value)
+        return func.name
+    return None
+
+
+def _parametrize_argnames(call: ast.expr) -> Optional[Set[str]]:
+    """
+    Имена аргументов вызова parametrize(...) или None, если это не
+    parametrize либо имена не заданы литералом.
+    """
+    if not isinstance(call, ast.Call) or _decorator_name(call).split(".")[-1] != "parametrize":
+        return None
+    argnames = call.args[0] if call.args else next(
+        (k.value for k in call.keywords if k.arg == "argnames"), None
+    )
+    if isinstance(argnames, ast.Constant) and isinstance(argnames.value, str):
+        return {n.strip() for n in argnames.value.split(",") if n.strip()}
+    if isinstance(argnames, (ast.List, ast.Tuple)):
+        names = {e.value for e in argnames.elts if isinstance(e, ast.Constant) and isinstance(e.value, str)}
+        if len(names) == len(argnames.elts):
+            return names
+    return None
+
+
+def _parametrized_args(node: ast.AST) -> Set[str]:
+    """Аргументы из декораторов @pytest.mark.parametrize функции или класса."""
+    names: Set[str] = set()
+    for decorator in getattr(node, "decorator_list", ()):
+        names |= _parametrize_argnames(decorator) or set()
+    return names
+
+
+def _generated_args(body: Iterable[ast.stmt]) -> Optional[Set[str]]:
+    """
+    Аргументы, параметризуемые хуком pytest_generate_tests из body.
+
+    Returns:
+        Пустое множество, если хука нет; None, если хук параметризует
+        аргументы, имена которых не определить без запуска
+    """
+    names: Set[str] = set()
+    for node in body:
+        if not isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) or node.name != "pytest_generate_tests":
+            continue
+        for call in ast.walk(node):
+            if isinstance(call, ast.Call) and _decorator_name(call).split(".")[-1] == "parametrize":
+                argnames = _parametrize_argnames(call)
+                if argnames is None:
+                    return None
+                names |= argnames
+    return names
+
+
+def _plugin_modules(tree: ast.Module) -> List[str]:
+    """Модули из pytest_plugins = [...] (или строки) на верхнем уровне модуля."""
+    modules: List[str] = []
+    for node in tree.body:
+        if not isinstance(node, (ast.Assign, ast.AnnAssign)) or node.value is None:
+            continue
+        targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+        if not any(isinstance(t, ast.Name) and t.id == "pytest_plugins" for t in targets):
+            continue
+        values = node.value.elts if isinstance(node.value, (ast.List, ast.Tuple)) else [node.value]
+        modules.extend(v.value for v in values if isinstance(v, ast.Constant) and isinstance(v.value, str))
+    return modules
+
+
+def _usefixtures(decorators: Iterable[ast.expr]) -> List[ast.Constant]:
+    found = []
+    for decorator in decorators:
+        if isinstance(decorator, ast.Call) and _decorator_name(decorator).split(".")[-1] == "usefixtures":
+            found.extend(a for a in decorator.args if isinstance(a, ast.Constant) and isinstance(a.value, str))
+    return found
+
+
+class TreeValidator:
+    """
+    Статическая проверка сгенерированного проекта тестов.
+
+    Выполняется за миллисекунды и ловит ошибки, из-за которых pytest не
+    соберёт тесты: синтаксис, импорты модулей проекта, конфликты имён
+    тестовых модулей без __init__.py и неизвестные фикстуры. Сбор тестов
+    повторяет правила pytest (python_files, классы Test*, функции test_*)
+    по AST, без импорта сгенерированного кода в процесс сервиса.
+
+    Ошибками считаются только синтаксис и импорты. Остальное (фикстуры,
+    __init__.py) проверяется приблизительно — фикстуры могут прийти из
+    сторонних плагинов или хуков — и сообщается предупреждениями, не
+    мешающими запуску pytest.
+
+    Для UI тестов (ui=True) дополнительно предупреждает о ручном запуске
+    браузера: такие тесты не подключаются к общему браузеру из пула.
+    """
+
+    def __init__(self, root: str, known_fixtures: Iterable[str] = BUILTIN_FIXTURES, ui: bool = False) -> None:
+        self.root = root
+        self.known_fixtures = frozenset(known_fixtures)
+        self.ui = ui
+        self.modules: Dict[str, _Module] = {}
+        self.diagnostics: List[Diagnostic] = []
+
+    def validate(self) -> List[Diagnostic]:
+        self._compile_all()
+        self._check_init_files()
+        for module in self.modules.values():
+            if module.tree is not None:
+                self._check_imports(module)
+                if self.ui:
+                    self._check_browser_launch(module)
+        self._check_fixtures()
+        return self.diagnostics
+
+    def _add(self, kind: str, file: str, line: int, message: str, severity: str = SEVERITY_ERROR) -> None:
+        self.diagnostics.append(Diagnostic(kind, file, line, message, severity))
+
+    def _compile_all(self) -> None:
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            dirnames[:] = sorted(d for d in dirnames if not d.startswith(".") and d != "__pycache__")
+            for name in sorted(filenames):
+                if not name.endswith(".py"):
+                    continue
+                path = os.path.relpath(os.path.join(dirpath, name), self.root).replace(os.sep, "/")
+                try:
+                    with open(os.path.join(dirpath, name), "rb") as f:
+                        source = f.read()
+                    tree = ast.parse(source, filename=path)
+                    compile(tree, path, "exec")
+                except SyntaxError as e:
+                    self._add("syntax", path, e.lineno or 0, e.msg or "синтаксическая ошибка")
+                    self.modules[path] = _Module(path, None)
+                    continue
+                except (OSError, ValueError) as e:
+                    self._add("syntax", path, 0, str(e))
+                    self.modules[path] = _Module(path, None)
+                    continue
+                module = _Module(path, tree, _module_names(tree))
+                module.star_import = any(
+                    isinstance(n, ast.ImportFrom) and any(a.name == "*" for a in n.names)
+                    for n in ast.walk(tree)
+                )
+                self.modules[path] = module
+
+    def _is_test_module(self, path: str, patterns: Iterable[str]) -> bool:
+        return any(fnmatch.fnmatch(os.path.basename(path), p) for p in patterns)
+
+    def _check_init_files(self) -> None:
+        # Без __init__.py pytest импортирует тестовые модули по basename,
+        # и одинаковые имена в разных каталогах ломают сбор
+        patterns = list(_python_files_patterns(self.root))
+        seen: Dict[str, str] = {}
+        for path in self.modules:
+            if not self._is_test_module(path, patterns):
+                continue
+            directory = os.path.dirname(path)
+            if directory and f"{directory}/__init__.py" in self.modules:
+                continue
+            basename = os.path.basename(path)
+            if basename in seen:
+                self._add(
+                    "init", path, 0,
+                    f"модуль с таким же именем уже есть: {seen[basename]}; добавьте __init__.py в каталоги тестов",
+                    SEVERITY_WARNING
+                )
+            else:
+                seen[basename] = path
+
+    def _resolve(self, dotted: str) -> Optional[str]:
+        """Путь модуля проекта по имени или None, если это не модуль проекта."""
+        base = dotted.replace(".", "/")
+        for candidate in (f"{base}.py", f"{base}/__init__.py"):
+            if candidate in self.modules:
+                return candidate
+        if os.path.isdir(os.path.join(self.root, base)):
+            return base
+        return None
+
+    def _is_local(self, dotted: str) -> bool:
+        top = dotted.split(".")[0]
+        return f"{top}.py" in self.modules or os.path.isdir(os.path.join(self.root, top))
+
+    def _check_imports(self, module: _Module) -> None:
+        package = os.path.dirname(module.path).replace("/", ".")
+        for node in ast.walk(module.tree):
+            if isinstance(node, ast.Import):
+                for alias in node.names:
+                    if self._is_local(alias.name) and self._resolve(alias.name) is None:
+                        self._add("import", module.path, node.lineno, f"модуль '{alias.name}' не найден в проекте")
+            elif isinstance(node, ast.ImportFrom):
+                if node.level:
+                    parts = package.split(".") if package else []
+                    if node.level - 1 > len(parts):
+                        self._add("import", module.path, node.lineno, "относительный импорт выходит за пределы проекта")
+                        continue
+                    base = parts[:len(parts) - (node.level - 1)]
+                    dotted = ".".join(base + ([node.module] if node.module else []))
+                elif node.module and self._is_local(node.module):
+                    dotted = node.module
+                else:
+                    continue
+
+                target = self._resolve(dotted) if dotted else ""
+                if target is None:
+                    self._add("import", module.path, node.lineno, f"модуль '{dotted}' не найден в проекте")
+                    continue
+                self._check_imported_names(module, node, dotted, target)
+
+    def _check_imported_names(self, module: _Module, node: ast.ImportFrom, dotted: str, target: str) -> None:
+        source = self.modules.get(target)
+        for alias in node.names:
+            if alias.name == "*":
+                continue
+            submodule = f"{dotted}.{alias.name}" if dotted else alias.name
+            if self._resolve(submodule) is not None:
+                continue
+            if source is None or source.tree is None or source.star_import:
+                continue
+            if alias.name not in source.names:
+                self._add(
+                    "import", module.path, node.lineno,
+                    f"в модуле '{dotted}' нет имени '{alias.name}'"
+                )
+
+    def _check_browser_launch(self, module: _Module) -> None:
+        for node in ast.walk(module.tree):
+            if not isinstance(node, ast.Call):
+                continue
+            name = _decorator_name(node).split(".")[-1]
+            if name in _BROWSER_LAUNCH_CALLS:
+                self._add(
+                    "browser", module.path, node.lineno,
+                    f"ручной запуск браузера ({name}); используйте фикстуры page/context/browser pytest-playwright",
+                    SEVERITY_WARNING
+                )
+
+    def _conftests(self, path: str) -> List[_Module]:
+        """conftest.py, действующие для модуля path (от корня вглубь)."""
+        found = []
+        parts = path.split("/")[:-1]
+        for end in range(len(parts) + 1):
+            conftest = self.modules.get("/".join(parts[:end] + ["conftest.py"]))
+            if conftest is not None and conftest.tree is not None:
+                found.append(conftest)
+        return found
+
+    def _plugin_fixtures(self, module: _Module) -> Set[str]:
+        """Фикстуры из модулей проекта, подключённых через pytest_plugins."""
+        fixtures: Set[str] = set()
+        for dotted in _plugin_modules(module.tree):
+            target = self.modules.get(self._resolve(dotted) or "")
+            if target is not None and target.tree is not None:
+                fixtures |= self._fixtures_in(target.tree.body)
+        return fixtures
+
+    @staticmethod
+    def _fixtures_in(body: Iterable[ast.stmt]) -> Set[str]:
+        names = set()
+        for node in body:
+            name = _fixture_name(node)
+            if name:
+                names.add(name)
+        return names
+
+    def _check_fixtures(self) -> None:
+        patterns = list(_python_files_patterns(self.root))
+        for path, module in self.modules.items():
+            if module.tree is None or not self._is_test_module(path, patterns):
+                continue
+            available = set(self.known_fixtures) | self._fixtures_in(module.tree.body) | self._plugin_fixtures(module)
+            generated = _generated_args(module.tree.body)
+            for conftest in self._conftests(path):
+                available |= self._fixtures_in(conftest.tree.body) | self._plugin_fixtures(conftest)
+                conftest_generated = _generated_args(conftest.tree.body)
+                generated = None if generated is None or conftest_generated is None else generated | conftest_generated
+            if generated is None:
+                # Хук параметризует неизвестные аргументы — любой из них может быть параметром
+                continue
+            available |= generated
+            for node in module.tree.body:
+                if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and node.name.startswith("test"):
+                    self._check_test(path, node, available, [])
+                elif isinstance(node, ast.ClassDef) and node.name.startswith("Test"):
+                    if any(isinstance(n, ast.FunctionDef) and n.name == "__init__" for n in node.body):
+                        self._add(
+                            "collect", path, node.lineno,
+                            f"класс {node.name} с __init__ не будет собран pytest",
+                            SEVERITY_WARNING
+                        )
+                        continue
+                    class_generated = _generated_args(node.body)
+                    if class_generated is None:
+                        continue
+                    class_fixtures = available | self._fixtures_in(node.body) | class_generated | _parametrized_args(node)
+                    for item in node.body:
+                        if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef)) and item.name.startswith("test"):
+                            self._check_test(path, item, class_fixtures, node.decorator_list, method=True)
+
+    def _check_test(
+            self,
+            path: str,
+            func: ast.FunctionDef,
+            available: Set[str],
+            class_decorators: List[ast.expr],
+            method: bool = False
+    ) -> None:
+        args = func.args.posonlyargs + func.args.args + func.args.kwonlyargs
+        if method and args:
+            args = args[1:]
+        # Аргументы со значениями по умолчанию pytest не считает фикстурами
+        defaults = len(func.args.defaults)
+        positional = func.args.posonlyargs + func.args.args
+        with_defaults = {a.arg for a in positional[len(positional) - defaults:]} if defaults else set()
+        with_defaults |= {
+            a.arg for a, d in zip(func.args.kwonlyargs, func.args.kw_defaults) if d is not None
+        }
+        parametrized = _parametrized_args(func)
+
+        for arg in args:
+            name = arg.arg
+            if name in available or name in parametrized or name in with_defaults:
+                continue
+            self._add("fixture", path, func.lineno, f"фикстура '{name}' для {func.name} не найдена", SEVERITY_WARNING)
+
+        for const in _usefixtures(list(func.decorator_list) + list(class_decorators)):
+            if const.value not in available:
+                self._add(
+                    "fixture", path, func.lineno,
+                    f"фикстура '{const.value}' из usefixtures не найдена",
+                    SEVERITY_WARNING
+                )
+
+
+def validate_tree(
+        root: str,
+        known_fixtures: Iterable[str] = BUILTIN_FIXTURES,
+        ui: bool = False
+) -> List[Diagnostic]:
+    """
+    Проверяет проект тестов в каталоге root до запуска pytest.
+
+    Args:
+        ui: проект UI тестов — проверяется и ручной запуск браузера
+
+    Returns:
+        Найденные проблемы; ошибки (severity="error") означают, что запуск
+        pytest бессмысленен
+    """
+    return TreeValidator(root, known_fixtures, ui).validate()
+
+
+def errors(diagnostics: Iterable[Diagnostic]) -> List[Diagnostic]:
+    return [d for d in diagnostics if d.severity == SEVERITY_ERROR]
@@ -0,0 +1,253 @@
+"""
+Трассировка прогонов агентов: дерево спанов с таймингами на каждый прогон.
+
+Модель данных повторяет спаны OpenTelemetry (trace_id, span_id,
+parent_span_id, время начала и конца в наносекундах, атрибуты, статус,
+события), но экспорт только локальный: по завершении прогона трасса
+записывается в его рабочий каталог, а пока прогон идёт — доступна из
+памяти процесса. Решение о сэмплировании принимается один раз на прогон;
+для несэмплированных прогонов span() ничего не делает.
+"""
+import json
+import os
+import random
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.logger import logger
+
+# Имя файла трассы в рабочем каталоге прогона
+TRACE_FILE = "trace.json"
+
+STATUS_UNSET = "UNSET"
+STATUS_OK = "OK"
+STATUS_ERROR = "ERROR"
+
+KIND_INTERNAL = "INTERNAL"
+KIND_CLIENT = "CLIENT"
+
+
+@dataclass
+class SpanEvent:
+    name: str
+    time_unix_nano: int
+    attributes: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class Span:
+    """Спан в терминах OpenTelemetry."""
+
+    trace_id: str
+    span_id: str
+    parent_span_id: Optional[str]
+    name: str
+    kind: str = KIND_INTERNAL
+    start_time_unix_nano: int = 0
+    end_time_unix_nano: Optional[int] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    status_code: str = STATUS_UNSET
+    status_message: Optional[str] = None
+    events: List[SpanEvent] = field(default_factory=list)
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def add_event(self, name: str, **attributes: Any) -> None:
+        self.events.append(SpanEvent(name=name, time_unix_nano=time.time_ns(), attributes=attributes))
+
+
+@dataclass
+class Trace:
+    """Трасса одного прогона."""
+
+    trace_id: str
+    root: Span
+    run_id: Optional[str] = None
+    path: Optional[str] = None
+    spans: List[Span] = field(default_factory=list)
+    dropped_spans: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "run_id": self.run_id,
+            "trace_id": self.trace_id,
+            "dropped_spans": self.dropped_spans,
+            "spans": [asdict(span) for span in self.spans],
+        }
+
+
+# Текущая трасса и спан задачи (наследуются дочерними задачами и to_thread)
+_current: ContextVar[Optional[Tuple[Trace, Span]]] = ContextVar("cloud_ai_span", default=None)
+
+
+class Tracer:
+    """
+    Трассировщик прогонов.
+
+    Args:
+        sample_rate: Доля прогонов, для которых пишется трасса (0 — выключено)
+        max_spans: Предел спанов на трассу, лишние отбрасываются
+    """
+
+    def __init__(self, sample_rate: float = 1.0, max_spans: int = 5000) -> None:
+        self.sample_rate = sample_rate
+        self.max_spans = max_spans
+        self._active: Dict[str, Trace] = {}
+        self._lock = threading.Lock()
+
+    def _sampled(self) -> bool:
+        return self.sample_rate >= 1.0 or (self.sample_rate > 0 and random.random() < self.sample_rate)
+
+    def start_trace(self, name: str, **attributes: Any) -> Optional[Tuple[Trace, Any]]:
+        """
+        Начинает трассу прогона с корневым спаном.
+
+        Returns:
+            Дескриптор для end_trace() или None, если прогон не сэмплирован
+        """
+        if not self._sampled():
+            return None
+        trace_id = secrets.token_hex(16)
+        root = Span(
+            trace_id=trace_id,
+            span_id=secrets.token_hex(8),
+            parent_span_id=None,
+            name=name,
+            start_time_unix_nano=time.time_ns(),
+            attributes=dict(attributes)
+        )
+        trace = Trace(trace_id=trace_id, root=root, spans=[root])
+        return trace, _current.set((trace, root))
+
+    def end_trace(self, handle: Optional[Tuple[Trace, Any]], error: Optional[BaseException] = None) -> Optional[Trace]:
+        """Завершает корневой спан; трассу затем нужно сохранить через export()."""
+        if handle is None:
+            return None
+        trace, token = handle
+        self._finish(trace.root, error)
+        _current.reset(token)
+        if trace.run_id is not None:
+            with self._lock:
+                self._active.pop(trace.run_id, None)
+        return trace
+
+    def bind_run(self, run_id: str, path: str) -> None:
+        """Привязывает текущую трассу к прогону и файлу, куда она будет записана."""
+        current = _current.get()
+        if current is None:
+            return
+        trace, _ = current
+        trace.run_id = run_id
+        trace.path = path
+        trace.root.set_attribute("run_id", run_id)
+        with self._lock:
+            self._active[run_id] = trace
+
+    @contextmanager
+    def span(
+            self,
+            name: str,
+            kind: str = KIND_INTERNAL,
+            activate: bool = True,
+            **attributes: Any
+    ) -> Iterator[Optional[Span]]:
+        """
+        Дочерний спан текущего спана (None вне сэмплированной трассы).
+
+        Args:
+            name: Имя спана
+            kind: Вид спана (INTERNAL, CLIENT)
+            activate: Сделать спан текущим; в асинхронных генераторах нужно
+                False — между yield контекст принадлежит вызывающему коду
+            **attributes: Атрибуты спана
+        """
+        current = _current.get()
+        if current is None:
+            yield None
+            return
+        trace, parent = current
+        if len(trace.spans) >= self.max_spans:
+            trace.dropped_spans += 1
+            yield None
+            return
+
+        span = Span(
+            trace_id=trace.trace_id,
+            span_id=secrets.token_hex(8),
+            parent_span_id=parent.span_id,
+            name=name,
+            kind=kind,
+            start_time_unix_nano=time.time_ns(),
+            attributes=dict(attributes)
+        )
+        trace.spans.append(span)
+        token = _current.set((trace, span)) if activate else None
+        error: Optional[BaseException] = None
+        try:
+            yield span
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            if token is not None:
+                _current.reset(token)
+            self._finish(span, error)
+
+    @staticmethod
+    def current_span() -> Optional[Span]:
+        current = _current.get()
+        return current[1] if current is not None else None
+
+    @staticmethod
+    def _finish(span: Span, error: Optional[BaseException]) -> None:
+        span.end_time_unix_nano = time.time_ns()
+        if error is not None:
+            span.status_code = STATUS_ERROR
+            span.status_message = f"{type(error).__name__}: {error}"[:500]
+        elif span.status_code == STATUS_UNSET:
+            span.status_code = STATUS_OK
+
+    def export(self, trace: Optional[Trace]) -> None:
+        """Записывает завершённую трассу в файл прогона (локальный экспортёр)."""
+        if trace is None or trace.path is None:
+            return
+        tmp_path = f"{trace.path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(trace.to_dict(), f, ensure_ascii=False, default=str)
+            os.replace(tmp_path, trace.path)
+        except OSError as e:
+            logger.error(f"Не удалось сохранить трассу прогона {trace.run_id}: {e}")
+
+    def snapshot(self, run_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Трасса идущего прогона из памяти.
+
+        Вызывается из потока event loop: спаны дописываются в нём же.
+        """
+        with self._lock:
+            trace = self._active.get(run_id)
+        return trace.to_dict() if trace is not None else None
+
+    @staticmethod
+    def load(path: str) -> Optional[Dict[str, Any]]:
+        """Сохранённая трасса завершённого прогона."""
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+
+# Экземпляр трассировщика — глобальный для всего приложения
+tracer = Tracer(
+    sample_rate=settings.TRACE_SAMPLE_RATE,
+    max_spans=settings.TRACE_MAX_SPANS
+)
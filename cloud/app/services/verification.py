@@ -0,0 +1,343 @@
+import asyncio
+import json
+import os
+import signal
+import sys
+import time
+import uuid
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from app.core.config import settings
+from app.core.logger import logger
+from app.services.pytest_worker import DONE_MARK, START_MARK
+from app.services.tracing import tracer
+
+OutputCallback = Callable[[str], Awaitable[None]]
+
+
+@dataclass
+class VerificationResult:
+    """Результат запуска pytest над сгенерированными тестами."""
+
+    returncode: Optional[int]
+    output: str
+    timed_out: bool
+    duration: float
+
+    @property
+    def ok(self) -> bool:
+        """
+        Код запускается: 0 — все тесты прошли, 1 — часть тестов упала.
+        Коды больше 1 означают ошибки сбора, импорта или запуска pytest.
+        """
+        return not self.timed_out and self.returncode is not None and self.returncode <= 1
+
+
+class _WorkerDied(RuntimeError):
+    """Прогретый процесс pytest завершился посреди задачи."""
+
+
+class _PytestWorker:
+    """Прогретый процесс-сервер pytest (см. app.services.pytest_worker)."""
+
+    def __init__(self, process: asyncio.subprocess.Process) -> None:
+        self.process = process
+        self.runs = 0
+        self.killed = False
+
+    @property
+    def alive(self) -> bool:
+        return not self.killed and self.process.returncode is None
+
+    def kill(self) -> None:
+        self.killed = True
+        try:
+            os.killpg(self.process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
+
+class VerificationPool:
+    """
+    Пул запусков pytest в отдельных процессах.
+
+    Каждый запуск выполняется в собственной группе процессов, поэтому не
+    блокирует event loop и может быть целиком убит по таймауту. Число
+    одновременных запусков ограничено количеством слотов.
+
+    В режиме prewarmed запуски выполняют заранее запущенные процессы с уже
+    импортированными pytest и плагинами (fork на каждый запуск), и время
+    проверки определяется самими тестами, а не импортами. Процесс
+    пересоздаётся после worker_max_runs запусков.
+    """
+
+    def __init__(
+            self,
+            slots: int,
+            timeout: float,
+            max_output: int = 1_000_000,
+            prewarmed: bool = False,
+            worker_max_runs: int = 20
+    ) -> None:
+        self.slots = slots
+        self.timeout = timeout
+        self.max_output = max_output
+        self.prewarmed = prewarmed
+        self.worker_max_runs = worker_max_runs
+        self._semaphore = asyncio.Semaphore(slots)
+        self._idle: List[_PytestWorker] = []
+        self._workers: List[_PytestWorker] = []
+
+    async def start(self) -> None:
+        """Заранее запускает прогретые процессы (вызывается из lifespan)."""
+        if not self.prewarmed:
+            return
+        while len(self._workers) < self.slots:
+            self._idle.append(await self._spawn())
+        logger.info(f"Прогретых процессов pytest: {len(self._workers)}")
+
+    async def stop(self) -> None:
+        for worker in self._workers:
+            worker.kill()
+        await asyncio.gather(*(w.process.wait() for w in self._workers), return_exceptions=True)
+        self._workers = []
+        self._idle = []
+
+    async def _spawn(self) -> _PytestWorker:
+        process = await asyncio.create_subprocess_exec(
+            sys.executable, "-u", "-m", "app.services.pytest_worker",
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT,
+            start_new_session=True
+        )
+        worker = _PytestWorker(process)
+        self._workers.append(worker)
+        return worker
+
+    def _retire(self, worker: _PytestWorker) -> None:
+        if worker in self._workers:
+            self._workers.remove(worker)
+        if worker.alive:
+            worker.process.stdin.close()
+            # Процесс завершится сам, прочитав конец stdin; ждём его в фоне
+            asyncio.create_task(worker.process.wait())
+
+    async def _acquire(self) -> _PytestWorker:
+        while self._idle:
+            worker = self._idle.pop()
+            if worker.alive:
+                return worker
+            self._retire(worker)
+        return await self._spawn()
+
+    def _release(self, worker: _PytestWorker) -> None:
+        worker.runs += 1
+        if worker.alive and worker.runs < self.worker_max_runs:
+            self._idle.append(worker)
+            return
+        self._retire(worker)
+        if self.prewarmed:
+            # Замена прогревается заранее, пока слот свободен
+            asyncio.create_task(self._replace())
+
+    async def _replace(self) -> None:
+        if len(self._workers) < self.slots:
+            try:
+                self._idle.append(await self._spawn())
+            except OSError as e:
+                logger.error(f"Не удалось запустить процесс pytest: {e}")
+
+    @asynccontextmanager
+    async def _slot(self) -> AsyncIterator[None]:
+        # Ожидание свободного слота — отдельный спан в трассе прогона
+        with tracer.span("verification.queue", slots=self.slots):
+            await self._semaphore.acquire()
+        try:
+            yield
+        finally:
+            self._semaphore.release()
+
+    async def run(
+            self,
+            workdir: str,
+            args: Optional[List[str]] = None,
+            timeout: Optional[float] = None,
+            on_output: Optional[OutputCallback] = None,
+            env: Optional[Dict[str, str]] = None
+    ) -> VerificationResult:
+        """
+        Запускает pytest в указанном каталоге.
+
+        Args:
+            workdir: Каталог с тестами (рабочий каталог процесса)
+            args: Аргументы командной строки (по умолчанию — pytest с allure)
+            timeout: Таймаут запуска в секундах
+            on_output: Корутина, получающая вывод pytest построчно
+            env: Дополнительные переменные окружения процесса pytest
+
+        Returns:
+            Результат запуска
+
+        Raises:
+            FileNotFoundError: Если pytest не найден
+        """
+        command = args or ["pytest", "--alluredir=./allure-results"]
+        timeout = timeout or self.timeout
+
+        if self.prewarmed and command[0] == "pytest":
+            async with self._slot():
+                worker = await self._acquire()
+                try:
+                    return await self._run_prewarmed(worker, workdir, command[1:], timeout, on_output, env)
+                except _WorkerDied:
+                    logger.warning("Прогретый процесс pytest завершился, запуск повторяется в новом процессе")
+                    worker.kill()
+                finally:
+                    self._release(worker)
+
+        return await self._run_subprocess(command, workdir, timeout, on_output, env)
+
+    async def _run_prewarmed(
+            self,
+            worker: _PytestWorker,
+            workdir: str,
+            args: List[str],
+            timeout: float,
+            on_output: Optional[OutputCallback],
+            env: Optional[Dict[str, str]] = None
+    ) -> VerificationResult:
+        token = uuid.uuid4().hex
+        started = time.monotonic()
+        job = {"token": token, "workdir": os.path.abspath(workdir), "args": args, "env": env or {}}
+        try:
+            worker.process.stdin.write((json.dumps(job) + "\n").encode("utf-8"))
+            await worker.process.stdin.drain()
+        except (BrokenPipeError, ConnectionResetError) as e:
+            raise _WorkerDied() from e
+
+        output: List[str] = []
+        output_size = 0
+        child_pid: Optional[int] = None
+        returncode: Optional[int] = None
+
+        async def _pump() -> None:
+            nonlocal output_size, child_pid, returncode
+            async for raw_line in worker.process.stdout:
+                line = raw_line.decode("utf-8", errors="replace")
+                if line.startswith(START_MARK):
+                    _, job_token, pid = line.split()
+                    if job_token == token:
+                        child_pid = int(pid)
+                    continue
+                done_at = line.find(DONE_MARK)
+                if done_at >= 0:
+                    # Вывод без перевода строки в конце оказывается в одной строке с маркером
+                    _, job_token, code = line[done_at:].split()
+                    line = line[:done_at]
+                    if job_token == token:
+                        returncode = int(code)
+                if line:
+                    if output_size < self.max_output:
+                        output.append(line)
+                        output_size += len(line)
+                    if on_output is not None:
+                        await on_output(line.rstrip("\n"))
+                if returncode is not None:
+                    return
+            raise _WorkerDied()
+
+        timed_out = False
+        try:
+            await asyncio.wait_for(_pump(), timeout)
+        except asyncio.TimeoutError:
+            timed_out = True
+            logger.warning(f"pytest не уложился в {timeout} с, процесс остановлен")
+            if child_pid is not None:
+                try:
+                    os.killpg(child_pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+            # Дочитываем маркер завершения, чтобы процесс можно было переиспользовать
+            try:
+                await asyncio.wait_for(_pump(), 10)
+            except (asyncio.TimeoutError, _WorkerDied):
+                worker.kill()
+
+        return VerificationResult(
+            returncode=None if timed_out else returncode,
+            output="".join(output),
+            timed_out=timed_out,
+            duration=time.monotonic() - started
+        )
+
+    async def _run_subprocess(
+            self,
+            command: List[str],
+            workdir: str,
+            timeout: float,
+            on_output: Optional[OutputCallback],
+            env: Optional[Dict[str, str]] = None
+    ) -> VerificationResult:
+        async with self._slot():
+            started = time.monotonic()
+            process = await asyncio.create_subprocess_exec(
+                *command,
+                cwd=workdir,
+                env={**os.environ, **env} if env else None,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.STDOUT,
+                start_new_session=True
+            )
+
+            output: List[str] = []
+            output_size = 0
+
+            async def _pump() -> None:
+                nonlocal output_size
+                async for raw_line in process.stdout:
+                    line = raw_line.decode("utf-8", errors="replace")
+                    if output_size < self.max_output:
+                        output.append(line)
+                        output_size += len(line)
+                    if on_output is not None:
+                        await on_output(line.rstrip("\n"))
+                await process.wait()
+
+            timed_out = False
+            try:
+                await asyncio.wait_for(_pump(), timeout)
+            except asyncio.TimeoutError:
+                timed_out = True
+                logger.warning(f"pytest не уложился в {timeout} с, процесс остановлен")
+            finally:
+                if process.returncode is None:
+                    self._kill(process)
+                    await process.wait()
+
+            return VerificationResult(
+                returncode=None if timed_out else process.returncode,
+                output="".join(output),
+                timed_out=timed_out,
+                duration=time.monotonic() - started
+            )
+
+    @staticmethod
+    def _kill(process: asyncio.subprocess.Process) -> None:
+        # Убиваем всю группу: pytest может запускать браузеры и другие дочерние процессы
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
+
+# Экземпляр пула — глобальный для всего приложения
+verification_pool = VerificationPool(
+    slots=settings.VERIFICATION_SLOTS,
+    timeout=settings.VERIFICATION_TIMEOUT,
+    max_output=settings.VERIFICATION_MAX_OUTPUT,
+    prewarmed=settings.VERIFICATION_PREWARMED,
+    worker_max_runs=settings.VERIFICATION_WORKER_MAX_RUNS
+)
@@ -0,0 +1,311 @@
+import asyncio
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional, Set
+
+from app.core.config import settings
+from app.core.logger import logger
+from app.services.file_tree import FileTree
+
+# Статусы жизненного цикла рабочего каталога
+STATUS_CREATED = "created"
+STATUS_RUNNING = "running"
+STATUS_COMPLETED = "completed"
+STATUS_FAILED = "failed"
+
+_META_FILE = "workspace.json"
+_TREE_DIR = "tree"
+
+
+def _dir_size(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(root, name)).st_size
+            except OSError:
+                pass
+    return total
+
+
+@dataclass
+class Workspace:
+    """Рабочий каталог одного прогона агента."""
+
+    run_id: str
+    path: str
+    kind: str
+    status: str = STATUS_CREATED
+    created_at: float = field(default_factory=time.time)
+    updated_at: float = field(default_factory=time.time)
+    size: int = 0
+
+    @property
+    def tree_path(self) -> str:
+        """Каталог со сгенерированным проектом тестов (рабочий каталог pytest)."""
+        return os.path.join(self.path, _TREE_DIR)
+
+    def file_path(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+
+class WorkspaceManager:
+    """
+    Менеджер рабочих каталогов прогонов.
+
+    Каждый прогон получает свой run ID и отдельный каталог, поэтому
+    параллельные генерации не затирают файлы друг друга. Старые каталоги
+    удаляются по возрасту и по квоте суммарного размера.
+
+    Прогоны, созданные другими процессами (воркерами Celery при
+    JOB_BACKEND=celery), читаются из метаданных на диске при обращении.
+    """
+
+    def __init__(
+            self,
+            root: str,
+            max_age: float,
+            max_total_bytes: int
+    ) -> None:
+        self.root = root
+        self.max_age = max_age
+        self.max_total_bytes = max_total_bytes
+        self._workspaces: Dict[str, Workspace] = {}
+        # Последнее записанное дерево прогона: следующая версия пишется по разнице
+        self._trees: Dict[str, FileTree] = {}
+        # Прогоны, созданные этим процессом: их метаданные в памяти актуальны
+        self._owned: Set[str] = set()
+        # Время изменения прочитанных метаданных чужих прогонов
+        self._mtimes: Dict[str, int] = {}
+        # Прогоны выполняются другими процессами (воркерами Celery)
+        self._shared = settings.JOB_BACKEND != "local"
+        self._lock = threading.RLock()
+        self._loaded = False
+
+    def _read(self, run_id: str) -> Optional[Workspace]:
+        """Метаданные прогона с диска или None, если их нет."""
+        try:
+            with open(os.path.join(self.root, run_id, _META_FILE), "r", encoding="utf-8") as f:
+                workspace = Workspace(**json.load(f))
+        except (OSError, ValueError, TypeError):
+            return None
+        # В локальной очереди чужой незавершённый прогон прерван перезапуском
+        # процесса и уже не завершится; при Celery его выполняет воркер
+        if not self._shared and workspace.status in (STATUS_CREATED, STATUS_RUNNING):
+            workspace.status = STATUS_FAILED
+        return workspace
+
+    def _scan(self) -> None:
+        """Перечитывает с диска метаданные прогонов, созданных не этим процессом."""
+        os.makedirs(self.root, exist_ok=True)
+        run_ids = set(os.listdir(self.root))
+        with self._lock:
+            for run_id in list(self._workspaces):
+                if run_id not in run_ids and run_id not in self._owned:
+                    del self._workspaces[run_id]
+                    self._mtimes.pop(run_id, None)
+        for run_id in run_ids:
+            if run_id in self._owned:
+                continue
+            try:
+                mtime = os.stat(os.path.join(self.root, run_id, _META_FILE)).st_mtime_ns
+            except OSError:
+                continue
+            if self._mtimes.get(run_id) == mtime:
+                continue
+            workspace = self._read(run_id)
+            if workspace is None:
+                continue
+            with self._lock:
+                self._workspaces[run_id] = workspace
+                self._mtimes[run_id] = mtime
+
+    def _ensure_loaded(self) -> None:
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            self._scan()
+            self._loaded = True
+
+    def _refresh(self) -> None:
+        """Актуализирует список прогонов перед выборкой по всем прогонам."""
+        self._ensure_loaded()
+        if self._shared:
+            self._scan()
+
+    def _save(self, workspace: Workspace) -> None:
+        workspace.updated_at = time.time()
+        # Метаданные читают другие процессы: файл заменяется целиком
+        path = workspace.file_path(_META_FILE)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(asdict(workspace), f)
+        os.replace(tmp_path, path)
+
+    def create(self, kind: str, run_id: Optional[str] = None) -> Workspace:
+        """
+        Выделяет новый run ID и рабочий каталог.
+
+        Args:
+            kind: Тип прогона ("ui" или "api")
+            run_id: Заранее выданный идентификатор (например, ID задачи)
+
+        Returns:
+            Новый рабочий каталог
+        """
+        self._ensure_loaded()
+        run_id = run_id or uuid.uuid4().hex
+        workspace = Workspace(run_id=run_id, path=os.path.join(self.root, run_id), kind=kind)
+        os.makedirs(workspace.tree_path, exist_ok=True)
+        self._save(workspace)
+        with self._lock:
+            self._workspaces[run_id] = workspace
+            self._owned.add(run_id)
+        logger.info(f"Создан рабочий каталог прогона {run_id}")
+        return workspace
+
+    def get(self, run_id: str) -> Optional[Workspace]:
+        """
+        Рабочий каталог прогона.
+
+        Прогон, которого нет в памяти или который создан другим процессом,
+        читается из метаданных на диске.
+        """
+        self._ensure_loaded()
+        with self._lock:
+            workspace = self._workspaces.get(run_id)
+            if workspace is not None and (run_id in self._owned or not self._shared):
+                return workspace
+        if os.path.basename(run_id) != run_id or run_id in ("", ".", ".."):
+            return None
+        workspace = self._read(run_id)
+        with self._lock:
+            if workspace is not None:
+                self._workspaces[run_id] = workspace
+            else:
+                self._workspaces.pop(run_id, None)
+        return workspace
+
+    def latest(self, status: str = STATUS_COMPLETED) -> Optional[Workspace]:
+        """Последний по времени прогон с указанным статусом."""
+        self._refresh()
+        candidates = [w for w in self._workspaces.values() if w.status == status]
+        return max(candidates, key=lambda w: w.created_at, default=None)
+
+    def list_workspaces(self) -> List[Workspace]:
+        self._refresh()
+        return sorted(self._workspaces.values(), key=lambda w: w.created_at)
+
+    def set_status(self, workspace: Workspace, status: str) -> None:
+        workspace.status = status
+        self._save(workspace)
+        if status in (STATUS_COMPLETED, STATUS_FAILED):
+            self._trees.pop(workspace.run_id, None)
+
+    def write_file(self, workspace: Workspace, name: str, content: str) -> str:
+        """Записывает служебный файл прогона (например, тест-план)."""
+        path = workspace.file_path(name)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+        return path
+
+    def materialize(self, workspace: Workspace, tree: FileTree) -> str:
+        """
+        Заменяет сгенерированный проект в рабочем каталоге новой версией.
+
+        Если прошлая версия прогона уже записана, на диске меняются только
+        изменившиеся файлы; иначе каталог проекта пересоздаётся целиком.
+
+        Args:
+            workspace: Рабочий каталог прогона
+            tree: Новая версия дерева проекта
+
+        Returns:
+            Путь к каталогу проекта
+        """
+        previous = self._trees.get(workspace.run_id)
+        if previous is None:
+            shutil.rmtree(workspace.tree_path, ignore_errors=True)
+            os.makedirs(workspace.tree_path, exist_ok=True)
+        diff = tree.materialize(workspace.tree_path, previous)
+        self._trees[workspace.run_id] = tree
+        if previous is not None:
+            logger.info(
+                f"Прогон {workspace.run_id}: записано файлов {len(diff.changed)}, удалено {len(diff.removed)}"
+            )
+        return workspace.tree_path
+
+    async def amaterialize(self, workspace: Workspace, tree: FileTree) -> str:
+        """Асинхронная обёртка над materialize(): запись на диск вне event loop."""
+        return await asyncio.to_thread(self.materialize, workspace, tree)
+
+    def remove(self, run_id: str) -> None:
+        with self._lock:
+            workspace = self._workspaces.pop(run_id, None)
+            self._trees.pop(run_id, None)
+            self._owned.discard(run_id)
+            self._mtimes.pop(run_id, None)
+        if workspace is not None:
+            shutil.rmtree(workspace.path, ignore_errors=True)
+
+    def gc(self) -> int:
+        """
+        Удаляет завершённые прогоны старше max_age и самые старые прогоны
+        сверх квоты суммарного размера.
+
+        Returns:
+            Количество удалённых каталогов
+        """
+        self._ensure_loaded()
+        now = time.time()
+        finished = [
+            w for w in self.list_workspaces()
+            if w.status in (STATUS_COMPLETED, STATUS_FAILED)
+        ]
+
+        for workspace in finished:
+            if not workspace.size:
+                workspace.size = _dir_size(workspace.path)
+
+        expired = [w for w in finished if now - w.updated_at > self.max_age]
+        for workspace in expired:
+            self.remove(workspace.run_id)
+
+        total = sum(w.size for w in self._workspaces.values())
+        removed = len(expired)
+        for workspace in finished:
+            if total <= self.max_total_bytes:
+                break
+            if workspace.run_id not in self._workspaces:
+                continue
+            total -= workspace.size
+            self.remove(workspace.run_id)
+            removed += 1
+
+        if removed:
+            logger.info(f"Удалено рабочих каталогов: {removed}")
+        return removed
+
+    async def run_gc_forever(self, interval: float) -> None:
+        """Периодическая сборка мусора (запускается из lifespan)."""
+        while True:
+            try:
+                await asyncio.to_thread(self.gc)
+            except Exception as e:
+                logger.error(f"Ошибка очистки рабочих каталогов: {e}")
+            await asyncio.sleep(interval)
+
+
+# Экземпляр менеджера — глобальный для всего приложения
+workspace_manager = WorkspaceManager(
+    root=settings.WORKSPACES_TMPFS_DIR or settings.WORKSPACES_DIR,
+    max_age=settings.WORKSPACE_MAX_AGE,
+    max_total_bytes=settings.WORKSPACES_MAX_TOTAL_MB * 1024 * 1024
+)
@@ -0,0 +1,69 @@
+"""
+Celery-воркер для прогонов агентов.
+
+Запуск:
+    celery -A app.worker worker --loglevel=info
+"""
+import asyncio
+from typing import Any, Dict, Optional
+
+from celery import Celery
+from celery.signals import worker_process_shutdown
+
+from app.core.config import settings
+
+celery_app = Celery(
+    "cloud_ai",
+    broker=settings.CELERY_BROKER_URL,
+    backend=settings.CELERY_RESULT_BACKEND
+)
+celery_app.conf.update(
+    task_track_started=True,
+    task_acks_late=True,
+    worker_prefetch_multiplier=1,
+    result_expires=int(settings.JOB_RESULT_TTL),
+    task_serializer="json",
+    result_serializer="json",
+    accept_content=["json"]
+)
+
+# Один event loop на процесс воркера: клиент LLM и пулы соединений
+# привязаны к циклу и переиспользуются между задачами
+_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def _get_loop() -> asyncio.AbstractEventLoop:
+    global _loop
+    if _loop is None:
+        from app.services.browser_pool import browser_pool
+
+        _loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(_loop)
+        _loop.run_until_complete(browser_pool.start())
+    return _loop
+
+
+@celery_app.task(name="agents.run")
+def run_agent_task(kind: str, payload: Dict[str, Any], job_id: str) -> Dict[str, Any]:
+    """Выполняет прогон агента в процессе воркера."""
+    from app.services.jobs import run_agent_job
+
+    return _get_loop().run_until_complete(run_agent_job(kind, payload, job_id))
+
+
+@worker_process_shutdown.connect
+def _close_loop(**kwargs: Any) -> None:
+    if _loop is None:
+        return
+    from app.api.v1.endpoints.ws_manager import manager
+    from app.services.browser_pool import browser_pool
+    from app.services.llm_client import close_llm_client
+    from app.services.metrics import mark_process_dead
+    from app.services.verification import verification_pool
+
+    _loop.run_until_complete(verification_pool.stop())
+    _loop.run_until_complete(browser_pool.stop())
+    _loop.run_until_complete(manager.stop())
+    _loop.run_until_complete(close_llm_client())
+    _loop.close()
+    mark_process_dead()
@@ -0,0 +1,537 @@
+#!/usr/bin/env python3
+"""
+Сквозной бенчмарк сервиса: прогоны UI и API агентов под нагрузкой.
+
+Поднимает локальные заменители модели и тестируемого сайта
+(benchmarks.e2e_standins) и сам сервис (uvicorn app.main:app) с рабочими
+каталогами во временной папке, затем запускает --runs прогонов через
+/ui_agent_entry_point и /api_agent_entry_point не более чем по
+--concurrency одновременно. Ход каждого прогона читается из /ws.
+Перед замером выполняется --warmup прогонов каждого вида: их результаты
+(и первые импорты, и прогрев пулов) в отчёт не попадают.
+
+В отчёте: перцентили p50/p95/p99 постановки задачи, первого события в
+сокете и всего прогона, прогонов в минуту, пиковый RSS процесса сервиса,
+задержка event loop (гистограмма cloud_ai_event_loop_lag_seconds и время
+ответа /health во время нагрузки). Результат пишется в JSON вместе с
+коммитом, чтобы сравнивать прогоны бенчмарка между коммитами (--compare).
+
+Запуск из каталога cloud:
+    python -m benchmarks.bench_e2e --runs 20 --concurrency 4 --kind mixed
+    python -m benchmarks.bench_e2e --runs 20 --compare benchmarks/results/e2e-<commit>.json
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional
+
+import httpx
+from prometheus_client.parser import text_string_to_metric_families
+from websockets.asyncio.client import connect
+
+_CLOUD_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_RESULTS_DIR = os.path.join(_CLOUD_DIR, "benchmarks", "results")
+_API = "/api/v1"
+
+# Метрики, которые --compare сравнивает между отчётами (путь в отчёте)
+_COMPARED = [
+    ("run.p50", ("latency", "run", "p50")),
+    ("run.p95", ("latency", "run", "p95")),
+    ("run.p99", ("latency", "run", "p99")),
+    ("submit.p99", ("latency", "submit", "p99")),
+    ("first_event.p99", ("latency", "first_event", "p99")),
+    ("runs_per_minute", ("runs", "runs_per_minute")),
+    ("rss_peak_mb", ("rss_mb", "peak")),
+    ("loop_lag.p99", ("event_loop_lag", "p99")),
+    ("health.p99", ("health_probe", "p99")),
+]
+
+
+@dataclass
+class RunSample:
+    """Замеры одного прогона агента."""
+
+    kind: str
+    job_id: Optional[str] = None
+    status: str = "error"
+    submit: Optional[float] = None
+    first_event: Optional[float] = None
+    total: Optional[float] = None
+    ws_messages: int = 0
+    error: Optional[str] = None
+
+
+def percentiles(values: List[float]) -> Dict[str, Optional[float]]:
+    """p50/p95/p99 (ближайший ранг), среднее и максимум."""
+    if not values:
+        return {"count": 0, "p50": None, "p95": None, "p99": None, "mean": None, "max": None}
+    ordered = sorted(values)
+
+    def _rank(q: float) -> float:
+        return ordered[max(0, math.ceil(q * len(ordered)) - 1)]
+
+    return {
+        "count": len(ordered),
+        "p50": round(_rank(0.50), 4),
+        "p95": round(_rank(0.95), 4),
+        "p99": round(_rank(0.99), 4),
+        "mean": round(sum(ordered) / len(ordered), 4),
+        "max": round(ordered[-1], 4),
+    }
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _git_commit() -> Dict[str, Any]:
+    try:
+        commit = subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=_CLOUD_DIR, text=True).strip()
+        dirty = bool(subprocess.check_output(["git", "status", "--porcelain"], cwd=_CLOUD_DIR, text=True).strip())
+    except (OSError, subprocess.CalledProcessError):
+        return {"commit": None, "dirty": None}
+    return {"commit": commit, "dirty": dirty}
+
+
+def _read_proc_status(pid: int) -> Dict[str, int]:
+    """VmRSS и VmHWM (пиковый RSS) процесса в КБ; только Linux."""
+    values = {}
+    try:
+        with open(f"/proc/{pid}/status", "r") as f:
+            for line in f:
+                if line.startswith(("VmRSS:", "VmHWM:")):
+                    key, value = line.split(":", 1)
+                    values[key] = int(value.split()[0])
+    except OSError:
+        pass
+    return values
+
+
+def _lag_histogram(text: str) -> tuple:
+    buckets: Dict[float, float] = {}
+    count = total = 0.0
+    for family in text_string_to_metric_families(text):
+        if family.name != "cloud_ai_event_loop_lag_seconds":
+            continue
+        for sample in family.samples:
+            if sample.name.endswith("_bucket"):
+                buckets[float(sample.labels["le"])] = sample.value
+            elif sample.name.endswith("_count"):
+                count = sample.value
+            elif sample.name.endswith("_sum"):
+                total = sample.value
+    return buckets, count, total
+
+
+def _lag_from_metrics(text: str, baseline: Optional[str] = None) -> Dict[str, Optional[float]]:
+    """
+    Среднее и перцентили задержки event loop по бакетам гистограммы.
+
+    baseline — метрики на начало замера: гистограмма накопительная, поэтому
+    его значения вычитаются (прогрев не попадает в результат).
+    """
+    current, count, total = _lag_histogram(text)
+    if baseline is not None:
+        before, before_count, before_total = _lag_histogram(baseline)
+        current = {upper: value - before.get(upper, 0.0) for upper, value in current.items()}
+        count -= before_count
+        total -= before_total
+    if not count:
+        return {"count": 0, "mean": None, "p50": None, "p99": None}
+    buckets = sorted(current.items())
+
+    def _bucket(q: float) -> float:
+        # Верхняя граница бакета, в который попадает перцентиль
+        for upper, cumulative in buckets:
+            if cumulative >= q * count:
+                return upper
+        return buckets[-1][0]
+
+    return {"count": int(count), "mean": round(total / count, 5), "p50": _bucket(0.5), "p99": _bucket(0.99)}
+
+
+async def _wait_ready(client: httpx.AsyncClient, url: str, process: Optional[subprocess.Popen], timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(f"Процесс завершился при запуске (код {process.returncode}): {url}")
+        try:
+            if (await client.get(url, timeout=1.0)).status_code < 500:
+                return
+        except httpx.HTTPError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError(f"Не дождались готовности {url}")
+
+
+class Benchmark:
+    """Сквозной бенчмарк: процессы заменителей и сервиса, нагрузка, отчёт."""
+
+    def __init__(self, args: argparse.Namespace) -> None:
+        self.args = args
+        self.tmp_dir = tempfile.mkdtemp(prefix="cloud-ai-bench-")
+        self.standins_url = f"http://127.0.0.1:{args.standins_port or _free_port()}"
+        self.service_url = args.service_url or f"http://127.0.0.1:{_free_port()}"
+        self.processes: List[subprocess.Popen] = []
+        self.service: Optional[subprocess.Popen] = None
+        self.rss_samples: List[int] = []
+        self.health_latencies: List[float] = []
+        self.listener_messages = 0
+
+    def _spawn(self, command: List[str], log_name: str, env: Optional[Dict[str, str]] = None) -> subprocess.Popen:
+        log = open(os.path.join(self.tmp_dir, log_name), "wb")
+        process = subprocess.Popen(
+            command,
+            cwd=_CLOUD_DIR,
+            env={**os.environ, **(env or {})},
+            stdout=log,
+            stderr=subprocess.STDOUT
+        )
+        self.processes.append(process)
+        return process
+
+    def start(self) -> None:
+        a = self.args
+        port = self.standins_url.rsplit(":", 1)[1]
+        self._spawn([
+            sys.executable, "-m", "benchmarks.e2e_standins",
+            "--port", port,
+            "--latency", str(a.llm_latency),
+            "--tokens-per-sec", str(a.tokens_per_sec),
+            "--broken-rate", str(a.broken_rate),
+            "--code-files", str(a.code_files),
+            "--page-kb", str(a.page_kb),
+            "--seed", str(a.seed),
+        ], "standins.log")
+
+        if a.service_url:
+            return
+        env = {
+            "LLM_BASE_URL": f"{self.standins_url}/v1",
+            "LLM_API_KEY": "benchmark",
+            "LLM_STREAMING": str(not a.no_streaming).lower(),
+            "WORKSPACES_DIR": os.path.join(self.tmp_dir, "workspaces"),
+            "ARTIFACTS_DIR": os.path.join(self.tmp_dir, "artifacts"),
+            "ARCHIVE_CACHE_DIR": os.path.join(self.tmp_dir, "archive_cache"),
+            "LLM_CACHE_DIR": os.path.join(self.tmp_dir, "llm_cache"),
+            "PAGE_CACHE_DIR": os.path.join(self.tmp_dir, "page_cache"),
+            "BROWSER_POOL_ENABLED": "false",
+            "JOB_BACKEND": "local",
+            "JOB_WORKERS": str(a.concurrency),
+            "DEBUG": "false",
+            # Подписчики --ws-listeners получают события всех прогонов
+            "WS_FIREHOSE": str(a.ws_listeners > 0).lower(),
+        }
+        port = self.service_url.rsplit(":", 1)[1]
+        self.service = self._spawn([
+            sys.executable, "-m", "uvicorn", "app.main:app",
+            "--host", "127.0.0.1", "--port", port,
+            "--no-access-log", "--log-level", "warning",
+        ], "service.log", env)
+
+    def stop(self) -> None:
+        for process in self.processes:
+            if process.poll() is None:
+                process.terminate()
+        for process in self.processes:
+            try:
+                process.wait(10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        if self.args.keep_tmp:
+            print(f"Логи и рабочие каталоги: {self.tmp_dir}")
+        else:
+            shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def _payload(self, kind: str) -> Dict[str, Any]:
+        use_cache = self.args.llm_cache
+        if kind == "ui":
+            return {
+                "ui_url": f"{self.standins_url}/site/",
+                "text": "Проверить форму входа и карточки товаров",
+                "use_llm_cache": use_cache,
+            }
+        return {
+            "base_endpoint": "http://127.0.0.1:1/api",
+            "tags": self.args.api_tags,
+            "token": "benchmark",
+            "text": "Проверить операции раздела",
+            "spec": "default",
+            "use_llm_cache": use_cache,
+        }
+
+    async def _run_once(self, client: httpx.AsyncClient, kind: str) -> RunSample:
+        sample = RunSample(kind=kind)
+        ws_url = self.service_url.replace("http", "ws", 1)
+        started = time.perf_counter()
+        try:
+            response = await client.post(f"{self.service_url}{_API}/{kind}_agent_entry_point", json=self._payload(kind))
+            sample.submit = time.perf_counter() - started
+            response.raise_for_status()
+            sample.job_id = response.json()["job_id"]
+
+            deadline = started + self.args.run_timeout
+            async with connect(f"{ws_url}{_API}/ws?run_id={sample.job_id}", max_size=None) as ws:
+                while time.perf_counter() < deadline:
+                    try:
+                        raw = await asyncio.wait_for(ws.recv(), timeout=1.0)
+                    except asyncio.TimeoutError:
+                        # Статус мог смениться до подключения к сокету
+                        status = (await client.get(f"{self.service_url}{_API}/jobs/{sample.job_id}")).json()["status"]
+                        if status in ("completed", "failed"):
+                            sample.status = status
+                            break
+                        continue
+                    if sample.first_event is None:
+                        sample.first_event = time.perf_counter() - started
+                    sample.ws_messages += 1
+                    job = json.loads(raw).get("job") if raw.startswith("{") else None
+                    if isinstance(job, dict) and job.get("status") in ("completed", "failed"):
+                        sample.status = job["status"]
+                        break
+                else:
+                    sample.status = "timeout"
+        except Exception as e:
+            sample.error = f"{type(e).__name__}: {e}"
+        sample.total = time.perf_counter() - started
+        return sample
+
+    async def _sample_process(self, stop: asyncio.Event) -> None:
+        while not stop.is_set():
+            if self.service is not None:
+                status = _read_proc_status(self.service.pid)
+                if "VmRSS" in status:
+                    self.rss_samples.append(status["VmRSS"])
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=0.5)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _probe_health(self, client: httpx.AsyncClient, stop: asyncio.Event) -> None:
+        while not stop.is_set():
+            started = time.perf_counter()
+            try:
+                await client.get(f"{self.service_url}{_API}/health")
+                self.health_latencies.append(time.perf_counter() - started)
+            except httpx.HTTPError:
+                pass
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=self.args.probe_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _listen(self, stop: asyncio.Event) -> None:
+        # Подписчик на все прогоны: нагрузка на рассылку событий
+        ws_url = self.service_url.replace("http", "ws", 1)
+        async with connect(f"{ws_url}{_API}/ws", max_size=None) as ws:
+            while not stop.is_set():
+                try:
+                    await asyncio.wait_for(ws.recv(), timeout=0.5)
+                    self.listener_messages += 1
+                except asyncio.TimeoutError:
+                    pass
+
+    async def run(self) -> Dict[str, Any]:
+        a = self.args
+        limits = httpx.Limits(max_connections=a.concurrency * 2 + 4)
+        async with httpx.AsyncClient(timeout=60.0, limits=limits) as client:
+            await _wait_ready(client, f"{self.standins_url}/stats", self.processes[0], 30)
+            await _wait_ready(client, f"{self.service_url}{_API}/health", self.service, a.start_timeout)
+
+            kinds = [a.kind] * a.runs if a.kind != "mixed" else [("ui", "api")[i % 2] for i in range(a.runs)]
+
+            # Прогрев: первые прогоны каждого вида платят за импорты и создание
+            # пулов; их результаты и накопленные до замера метрики отбрасываются
+            warmup = [kind for kind in sorted(set(kinds)) for _ in range(a.warmup)]
+            for sample in await asyncio.gather(*(self._run_once(client, kind) for kind in warmup)):
+                if sample.status != "completed":
+                    print(f"Прогревочный прогон {sample.kind}: {sample.status} {sample.error or ''}", file=sys.stderr)
+            metrics_before = (await client.get(f"{self.service_url}/metrics")).text
+            llm_before = (await client.get(f"{self.standins_url}/stats")).json()
+
+            stop = asyncio.Event()
+            background = [
+                asyncio.create_task(self._sample_process(stop)),
+                asyncio.create_task(self._probe_health(client, stop)),
+            ]
+            background += [asyncio.create_task(self._listen(stop)) for _ in range(a.ws_listeners)]
+
+            semaphore = asyncio.Semaphore(a.concurrency)
+
+            async def _limited(kind: str) -> RunSample:
+                async with semaphore:
+                    return await self._run_once(client, kind)
+
+            started = time.perf_counter()
+            samples = await asyncio.gather(*(_limited(kind) for kind in kinds))
+            wall = time.perf_counter() - started
+
+            stop.set()
+            await asyncio.gather(*background, return_exceptions=True)
+
+            metrics_text = (await client.get(f"{self.service_url}/metrics")).text
+            llm_stats = (await client.get(f"{self.standins_url}/stats")).json()
+            llm_stats = {k: v - llm_before.get(k, 0) for k, v in llm_stats.items()}
+
+        return self._report(list(samples), wall, metrics_text, llm_stats, metrics_before)
+
+    def _report(
+            self,
+            samples: List[RunSample],
+            wall: float,
+            metrics_text: str,
+            llm_stats: Dict[str, int],
+            metrics_before: Optional[str] = None
+    ) -> Dict[str, Any]:
+        completed = [s for s in samples if s.status == "completed"]
+
+        def _latency(selected: List[RunSample]) -> Dict[str, Any]:
+            return {
+                "submit": percentiles([s.submit for s in selected if s.submit is not None]),
+                "first_event": percentiles([s.first_event for s in selected if s.first_event is not None]),
+                "run": percentiles([s.total for s in selected if s.status == "completed"]),
+            }
+
+        peak = None
+        if self.service is not None:
+            status = _read_proc_status(self.service.pid)
+            peak = status.get("VmHWM") or (max(self.rss_samples) if self.rss_samples else None)
+
+        def _mb(kb: Optional[int]) -> Optional[float]:
+            return round(kb / 1024, 1) if kb is not None else None
+
+        return {
+            "meta": {
+                **_git_commit(),
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+                "python": sys.version.split()[0],
+                "platform": platform.platform(),
+                "cpu_count": os.cpu_count(),
+                "args": {k: v for k, v in vars(self.args).items() if k not in ("output", "compare")},
+            },
+            "runs": {
+                "total": len(samples),
+                "completed": len(completed),
+                "failed": sum(1 for s in samples if s.status == "failed"),
+                "timeout": sum(1 for s in samples if s.status == "timeout"),
+                "errors": sum(1 for s in samples if s.status == "error"),
+                "wall_seconds": round(wall, 3),
+                "runs_per_minute": round(len(completed) / wall * 60, 3) if wall else None,
+            },
+            "latency": _latency(samples),
+            "latency_by_kind": {
+                kind: _latency([s for s in samples if s.kind == kind])
+                for kind in sorted({s.kind for s in samples})
+            },
+            "rss_mb": {
+                "start": _mb(self.rss_samples[0]) if self.rss_samples else None,
+                "end": _mb(self.rss_samples[-1]) if self.rss_samples else None,
+                "peak": _mb(peak),
+            },
+            "event_loop_lag": _lag_from_metrics(metrics_text, metrics_before),
+            "health_probe": percentiles(self.health_latencies),
+            "ws": {
+                "listeners": self.args.ws_listeners,
+                "listener_messages": self.listener_messages,
+                "run_messages": percentiles([float(s.ws_messages) for s in samples]),
+            },
+            "llm_requests": llm_stats,
+            "errors": sorted({s.error for s in samples if s.error})[:20],
+        }
+
+
+def _lookup(report: Dict[str, Any], path: tuple) -> Optional[float]:
+    value: Any = report
+    for key in path:
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return value if isinstance(value, (int, float)) else None
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any]) -> None:
+    """Печатает изменение ключевых метрик относительно прошлого отчёта."""
+    print(f"\nСравнение с {baseline['meta'].get('commit') or '?'} ({baseline['meta'].get('timestamp')}):")
+    print(f"{'метрика':<18} {'было':>12} {'стало':>12} {'изменение':>10}")
+    for name, path in _COMPARED:
+        old, new = _lookup(baseline, path), _lookup(report, path)
+        change = f"{(new - old) / old * 100:+.1f}%" if old and new is not None else "—"
+        print(f"{name:<18} {old if old is not None else '—':>12} {new if new is not None else '—':>12} {change:>10}")
+
+
+def _print_summary(report: Dict[str, Any]) -> None:
+    runs = report["runs"]
+    print(f"Прогонов: {runs['completed']}/{runs['total']} завершено, {runs['failed']} с ошибкой, "
+          f"{runs['timeout']} по таймауту; {runs['runs_per_minute']} прогонов/мин")
+    print(f"{'этап':<12} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9}")
+    for name, stats in report["latency"].items():
+        print(f"{name:<12} {stats['p50'] or 0:>8.3f}s {stats['p95'] or 0:>8.3f}s {stats['p99'] or 0:>8.3f}s {stats['max'] or 0:>8.3f}s")
+    lag = report["event_loop_lag"]
+    print(f"RSS пик: {report['rss_mb']['peak']} МБ; задержка event loop: среднее {lag['mean']} с, p99 <= {lag['p99']} с; "
+          f"/health p99: {report['health_probe']['p99']} с")
+    print(f"Запросы к модели: {report['llm_requests']}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10, help="Всего прогонов")
+    parser.add_argument("--concurrency", type=int, default=4, help="Одновременных прогонов")
+    parser.add_argument("--warmup", type=int, default=1, help="Прогревочных прогонов каждого вида (не в отчёте)")
+    parser.add_argument("--kind", choices=("ui", "api", "mixed"), default="mixed")
+    parser.add_argument("--api-tags", nargs="+", default=["Flavors"], help="Тэги OpenAPI для API агента")
+    parser.add_argument("--ws-listeners", type=int, default=0, help="Дополнительные подписчики на все события")
+    parser.add_argument("--run-timeout", type=float, default=600.0)
+    parser.add_argument("--start-timeout", type=float, default=60.0)
+    parser.add_argument("--probe-interval", type=float, default=0.2, help="Период запросов /health, с")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="Задержка модели до первого токена, с")
+    parser.add_argument("--tokens-per-sec", type=float, default=300.0)
+    parser.add_argument("--broken-rate", type=float, default=0.3, help="Доля проектов, требующих исправления")
+    parser.add_argument("--code-files", type=int, default=8)
+    parser.add_argument("--page-kb", type=int, default=64)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--llm-cache", action="store_true", help="Разрешить кэш ответов LLM")
+    parser.add_argument("--no-streaming", action="store_true", help="Запускать сервис с LLM_STREAMING=false")
+    parser.add_argument("--standins-port", type=int, default=0)
+    parser.add_argument("--service-url", default=None,
+                        help="Уже запущенный сервис (LLM_BASE_URL должен указывать на заменитель; RSS не замеряется)")
+    parser.add_argument("--output", default=None, help="Файл отчёта (по умолчанию benchmarks/results/)")
+    parser.add_argument("--compare", default=None, help="Прошлый отчёт для сравнения")
+    parser.add_argument("--keep-tmp", action="store_true", help="Не удалять логи и рабочие каталоги")
+    args = parser.parse_args()
+
+    benchmark = Benchmark(args)
+    try:
+        benchmark.start()
+        report = asyncio.run(benchmark.run())
+    finally:
+        benchmark.stop()
+
+    output = args.output
+    if output is None:
+        commit = (report["meta"]["commit"] or "nogit")[:10]
+        output = os.path.join(_RESULTS_DIR, f"e2e-{commit}-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    _print_summary(report)
+    print(f"Отчёт: {output}")
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            compare(report, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк среза OpenAPI-спецификации (filter_openapi_full).
+
+Строит синтетическую спецификацию с цепочками $ref между схемами и сравнивает
+прежний алгоритм (повторные проходы по всем компонентам до фиксированной
+точки) с обходом в ширину по предпостроенному графу.
+
+Запуск из каталога cloud:
+    python -m benchmarks.bench_openapi_filter --schemas 5000
+"""
+import argparse
+import time
+from typing import Any, Dict, List, Set
+
+from app.services.openapi_filter import _slice_openapi, filter_openapi_full
+from app.services.openapi_spec import build_spec, extract_refs
+
+
+def make_spec(schemas: int, tags: int = 50) -> Dict[str, Any]:
+    """
+    Синтетическая спецификация: схема i ссылается на схему i-1 и на одну
+    «дальнюю» схему, операции ссылаются на последние схемы каждой группы.
+    Порядок ссылок обратный порядку компонентов — худший случай для
+    алгоритма с фиксированной точкой.
+    """
+    components = {}
+    for i in range(schemas):
+        properties = {"id": {"type": "integer"}}
+        if i > 0:
+            properties["prev"] = {"$ref": f"#/components/schemas/Schema{i - 1}"}
+        if i > 10:
+            properties["far"] = {"$ref": f"#/components/schemas/Schema{(i * 7) % (i - 1)}"}
+        components[f"Schema{i}"] = {"type": "object", "properties": properties}
+
+    paths = {}
+    per_tag = max(1, schemas // tags)
+    for t in range(tags):
+        target = min(schemas - 1, (t + 1) * per_tag - 1)
+        paths[f"/resource{t}"] = {
+            "get": {
+                "tags": [f"Tag{t}"],
+                "responses": {
+                    "200": {
+                        "description": "OK",
+                        "content": {
+                            "application/json": {
+                                "schema": {"$ref": f"#/components/schemas/Schema{target}"}
+                            }
+                        }
+                    }
+                }
+            }
+        }
+
+    return {
+        "openapi": "3.0.0",
+        "info": {"title": "Synthetic", "version": "1.0"},
+        "paths": paths,
+        "components": {"schemas": components},
+    }
+
+
+def legacy_filter(openapi_data: Dict[str, Any], selected_tags: List[str]) -> Set[str]:
+    """Прежний алгоритм замыкания: проходы по всем компонентам до фиксированной точки."""
+    used_refs: Set[str] = set()
+    for path_item in openapi_data["paths"].values():
+        for operation in path_item.values():
+            if any(tag in selected_tags for tag in operation.get("tags", [])):
+                used_refs |= extract_refs(operation)
+
+    components = openapi_data["components"]
+    prev_len = -1
+    while len(used_refs) != prev_len:
+        prev_len = len(used_refs)
+        found: Set[str] = set()
+        for comp_type, items in components.items():
+            for name, item in items.items():
+                if f"#/components/{comp_type}/{name}" in used_refs:
+                    found |= extract_refs(item)
+        used_refs |= found
+    return used_refs
+
+
+def _timed(func, *args) -> float:
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--schemas", type=int, default=5000, help="Максимальное число схем")
+    parser.add_argument("--skip-legacy-above", type=int, default=5000,
+                        help="Не запускать прежний алгоритм на спецификациях больше этого размера")
+    args = parser.parse_args()
+
+    sizes = sorted({s for s in (500, 1000, 2000, args.schemas) if s <= args.schemas})
+    print(f"{'схем':>8} {'построение':>12} {'прежний':>12} {'BFS':>12} {'из кэша':>12}")
+    for size in sizes:
+        data = make_spec(size)
+        tags = [f"Tag{t}" for t in range(0, 50, 5)]
+
+        start = time.perf_counter()
+        spec = build_spec("bench", "<memory>", f"bench-{size}", 0.0, 0, data)
+        build_time = time.perf_counter() - start
+
+        legacy_time = _timed(legacy_filter, data, tags) if size <= args.skip_legacy_above else float("nan")
+        bfs_time = _timed(_slice_openapi, spec, frozenset(tags))
+        filter_openapi_full(spec, tags)
+        cached_time = _timed(filter_openapi_full, spec, tags)
+
+        print(f"{size:>8} {build_time:>11.4f}s {legacy_time:>11.4f}s {bfs_time:>11.4f}s {cached_time:>11.6f}s")
+
+
+if __name__ == "__main__":
+    main()
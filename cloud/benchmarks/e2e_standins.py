@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Локальные заменители внешних сервисов для сквозного бенчмарка.
+
+Один HTTP-сервер отдаёт:
+  - /v1/chat/completions — OpenAI-совместимый API с заданной задержкой до
+    первого токена и скоростью генерации (обычный и потоковый режим);
+  - /site/ — статическую страницу для ui_url;
+  - /stats — число запросов к модели по видам ответа.
+
+Ответы заготовлены под промпты агентов: тест-план в markdown, проект с
+тестами (directory_structure), патч ({"files": ...}) и исправленное дерево.
+С вероятностью --broken-rate сгенерированный проект не проходит сбор тестов,
+чтобы цикл исправления тоже нагружался.
+
+Запуск из каталога cloud (обычно его запускает benchmarks.bench_e2e):
+    python -m benchmarks.e2e_standins --port 8900 --latency 0.5 --tokens-per-sec 300
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, List
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse
+
+KIND_PLAN = "plan"
+KIND_CODE = "code"
+KIND_PATCH = "patch"
+KIND_REPAIR_TREE = "repair_tree"
+
+_PASSING_TEST = '''import allure
+
+
+def add(a, b):
+    return a + b
+
+
+@allure.feature("Бенчмарк")
+def test_add():
+    assert add(1, 2) == 3
+'''
+
+# Упавший тест агент считает рабочим кодом (pytest вернул 1), исправление
+# запускает только ошибка сбора — импорт несуществующего класса
+_BROKEN_TEST = "from pages.page_0 import MissingPage\n" + _PASSING_TEST
+
+
+@dataclass
+class StandinConfig:
+    """Параметры заменителей."""
+
+    latency: float = 0.5
+    tokens_per_sec: float = 300.0
+    chars_per_token: int = 4
+    chunk_tokens: int = 8
+    broken_rate: float = 0.3
+    plan_chars: int = 3000
+    code_files: int = 8
+    page_kb: int = 64
+    seed: int = 0
+
+
+def _plan(config: StandinConfig) -> str:
+    lines = ["# Тест-план", ""]
+    n = 0
+    while sum(len(line) + 1 for line in lines) < config.plan_chars:
+        n += 1
+        lines += [f"## Сценарий {n}", f"1. Открыть страницу и проверить элемент #{n}", "2. Ожидаемый результат: элемент виден", ""]
+    return "\n".join(lines)
+
+
+def _project(config: StandinConfig, test_source: str) -> Dict[str, Any]:
+    pages = {"__init__.py": ""}
+    for i in range(config.code_files):
+        methods = "\n".join(
+            f"    def check_element_{j}(self):\n        return \"#element-{i}-{j}\"\n" for j in range(20)
+        )
+        pages[f"page_{i}.py"] = f"class Page{i}:\n    url = \"/site/\"\n\n{methods}"
+    return {
+        "directory_structure": {
+            "pytest.ini": "[pytest]\ntestpaths = tests\n",
+            "pages/": pages,
+            "tests/": {"__init__.py": "", "test_smoke.py": test_source},
+        }
+    }
+
+
+def _page(config: StandinConfig) -> str:
+    rows = []
+    i = 0
+    while sum(len(r) for r in rows) < config.page_kb * 1024:
+        rows.append(
+            f'<div class="card" id="element-{i}"><h2>Карточка {i}</h2>'
+            f'<p>Описание карточки {i}</p><button type="button" data-id="{i}">Купить</button></div>\n'
+        )
+        i += 1
+    return (
+        "<!doctype html><html lang=\"ru\"><head><meta charset=\"utf-8\"><title>Стенд</title>"
+        "<style>.card{padding:8px;border:1px solid #ccc}</style></head><body>"
+        "<form id=\"login\"><input name=\"email\" type=\"email\"><input name=\"password\" type=\"password\">"
+        "<button type=\"submit\">Войти</button></form>\n"
+        f"{''.join(rows)}</body></html>"
+    )
+
+
+def classify(body: Dict[str, Any]) -> str:
+    """Вид ответа по промптам agent_service и repair."""
+    text = "\n".join(
+        m.get("content", "") for m in body.get("messages", []) if isinstance(m.get("content"), str)
+    )
+    if (body.get("response_format") or {}).get("type") != "json_object":
+        return KIND_PLAN
+    if '"project_files"' in text:
+        return KIND_PATCH
+    if "Вывод pytest" in text:
+        return KIND_REPAIR_TREE
+    return KIND_CODE
+
+
+def create_app(config: StandinConfig) -> FastAPI:
+    app = FastAPI(title="cloud-ai benchmark stand-ins")
+    rng = random.Random(config.seed)
+    stats: Counter = Counter()
+    page = _page(config)
+    plan = _plan(config)
+
+    def _content(kind: str) -> str:
+        if kind == KIND_PLAN:
+            return plan
+        if kind == KIND_PATCH:
+            return json.dumps({"files": {"tests/test_smoke.py": _PASSING_TEST}}, ensure_ascii=False)
+        broken = kind == KIND_CODE and rng.random() < config.broken_rate
+        if broken:
+            stats["broken_projects"] += 1
+        return json.dumps(_project(config, _BROKEN_TEST if broken else _PASSING_TEST), ensure_ascii=False)
+
+    def _tokens(content: str) -> List[str]:
+        step = config.chars_per_token * config.chunk_tokens
+        return [content[i:i + step] for i in range(0, len(content), step)]
+
+    def _usage(body: Dict[str, Any], content: str) -> Dict[str, int]:
+        prompt = sum(len(str(m.get("content", ""))) for m in body.get("messages", [])) // config.chars_per_token
+        completion = len(content) // config.chars_per_token
+        return {"prompt_tokens": prompt, "completion_tokens": completion, "total_tokens": prompt + completion}
+
+    async def _stream(body: Dict[str, Any], content: str, completion_id: str) -> AsyncIterator[bytes]:
+        model = body.get("model", "fake")
+        created = int(time.time())
+
+        def _chunk(delta: Dict[str, Any], finish_reason=None, **extra: Any) -> bytes:
+            payload = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+                **extra,
+            }
+            return f"data: {json.dumps(payload, ensure_ascii=False)}\n\n".encode("utf-8")
+
+        await asyncio.sleep(config.latency)
+        yield _chunk({"role": "assistant", "content": ""})
+        interval = config.chunk_tokens / config.tokens_per_sec if config.tokens_per_sec > 0 else 0
+        started = time.monotonic()
+        for n, piece in enumerate(_tokens(content), 1):
+            # Темп выдерживается по общему времени, а не по сумме sleep
+            delay = started + n * interval - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            yield _chunk({"content": piece})
+        yield _chunk({}, finish_reason="stop")
+        if (body.get("stream_options") or {}).get("include_usage"):
+            usage_chunk = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [],
+                "usage": _usage(body, content),
+            }
+            yield f"data: {json.dumps(usage_chunk)}\n\n".encode("utf-8")
+        yield b"data: [DONE]\n\n"
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        kind = classify(body)
+        stats[kind] += 1
+        content = _content(kind)
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        if body.get("stream"):
+            return StreamingResponse(_stream(body, content, completion_id), media_type="text/event-stream")
+
+        generation = len(content) / config.chars_per_token / config.tokens_per_sec if config.tokens_per_sec > 0 else 0
+        await asyncio.sleep(config.latency + generation)
+        return JSONResponse({
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "fake"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }],
+            "usage": _usage(body, content),
+        })
+
+    @app.get("/site/", response_class=HTMLResponse)
+    async def site() -> str:
+        return page
+
+    @app.get("/stats")
+    async def get_stats() -> Dict[str, int]:
+        return dict(stats)
+
+    return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency", type=float, default=0.5, help="Задержка до первого токена, с")
+    parser.add_argument("--tokens-per-sec", type=float, default=300.0, help="Скорость генерации (0 — мгновенно)")
+    parser.add_argument("--broken-rate", type=float, default=0.3, help="Доля проектов с ошибкой импорта в тесте")
+    parser.add_argument("--plan-chars", type=int, default=3000, help="Размер тест-плана, символов")
+    parser.add_argument("--code-files", type=int, default=8, help="Файлов page object в проекте")
+    parser.add_argument("--page-kb", type=int, default=64, help="Размер тестируемой страницы, КБ")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    config = StandinConfig(
+        latency=args.latency,
+        tokens_per_sec=args.tokens_per_sec,
+        broken_rate=args.broken_rate,
+        plan_chars=args.plan_chars,
+        code_files=args.code_files,
+        page_kb=args.page_kb,
+        seed=args.seed
+    )
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning", access_log=False)
+
+
+if __name__ == "__main__":
+    main()